@@ -0,0 +1,95 @@
+import argparse
+import itertools
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+def run_shard(job):
+    """Play every seed of one shard for one configuration; runs in a worker process"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import simulation
+    config_index, config, seeds = job
+    results = [simulation.run_game(config["level"], seed, evasion=config["evasion"], max_ticks=config["max_ticks"],
+                                   settings=config["settings"], constants=config["constants"])
+               for seed in seeds]
+    return config_index, results
+
+def build_configs(args):
+    """One configuration per combination of the swept values"""
+    configs = []
+    for level, enemies, speed, hunt_duration, evasion in itertools.product(
+            args.difficulty, args.enemies or [None], args.speed or [None], args.hunt_duration or [None], args.evasion):
+        settings = {}
+        if enemies is not None:
+            settings["enemies"] = enemies
+        if speed is not None:
+            settings["enemy_speed_multiplier"] = speed
+        constants = {"HUNT_DURATION": hunt_duration} if hunt_duration is not None else {}
+        configs.append({"level": level, "settings": settings, "constants": constants, "evasion": evasion,
+                        "max_ticks": int(args.max_seconds * 60)})
+    return configs
+
+def shard_seeds(games, shard_size):
+    return [list(range(first, min(games, first + shard_size))) for first in range(0, games, shard_size)]
+
+def summarize(config, results):
+    won = [result for result in results if result["result"] == "won"]
+    lost = [result for result in results if result["result"] == "lost"]
+    games = len(results)
+    return {
+        "config": config,
+        "games": games,
+        "win_rate": len(won) / games,
+        "loss_rate": len(lost) / games,
+        "timeout_rate": (games - len(won) - len(lost)) / games,
+        "mean_win_seconds": statistics.mean(result["ticks"] for result in won) / 60 if won else None,
+        "median_survival_seconds": statistics.median(result["ticks"] for result in lost) / 60 if lost else None,
+        "mean_evasions": statistics.mean(result["evasions"] for result in results),
+    }
+
+def describe(config):
+    parts = [f"level {config['level']}", f"evasion {config['evasion']}"]
+    parts += [f"{name} {value}" for name, value in config["settings"].items()]
+    parts += [f"{name} {value}" for name, value in config["constants"].items()]
+    return ", ".join(parts)
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:6.1f}s"
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scripted-bot games headlessly to balance difficulty settings")
+    parser.add_argument("--games", type=int, default=200, help="games per configuration")
+    parser.add_argument("--difficulty", type=int, nargs="+", default=[1, 2, 3], choices=[1, 2, 3])
+    parser.add_argument("--enemies", type=int, nargs="+", help="override enemy counts to sweep")
+    parser.add_argument("--speed", type=float, nargs="+", help="enemy_speed_multiplier values to sweep")
+    parser.add_argument("--hunt-duration", type=int, nargs="+", help="HUNT_DURATION values (ticks) to sweep")
+    parser.add_argument("--evasion", type=float, nargs="+", default=[0], help="bot evasion radii in maze steps")
+    parser.add_argument("--max-seconds", type=float, default=120, help="game length before a timeout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=None, help="seeds per job (default: spread evenly)")
+    args = parser.parse_args()
+
+    configs = build_configs(args)
+    shard_size = args.shard_size or max(1, args.games // (args.workers * 4))
+    jobs = [(index, config, seeds) for index, config in enumerate(configs)
+            for seeds in shard_seeds(args.games, shard_size)]
+
+    started = time.perf_counter()
+    results = [[] for _ in configs]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for config_index, shard_results in executor.map(run_shard, jobs):
+            results[config_index].extend(shard_results)
+    elapsed = time.perf_counter() - started
+
+    print(f"{'configuration':<52} {'win':>6} {'loss':>6} {'timeout':>8} {'win time':>9} {'survival':>9} {'evasions':>9}")
+    for config, config_results in zip(configs, results):
+        summary = summarize(config, config_results)
+        print(f"{describe(config):<52} {summary['win_rate']:6.1%} {summary['loss_rate']:6.1%} "
+              f"{summary['timeout_rate']:8.1%} {format_seconds(summary['mean_win_seconds']):>9} "
+              f"{format_seconds(summary['median_survival_seconds']):>9} {summary['mean_evasions']:9.1f}")
+    total_games = sum(len(config_results) for config_results in results)
+    print(f"{total_games} games in {elapsed:.1f} s ({total_games / elapsed:.1f} games/s, {args.workers} workers)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import random
+import time
+import numpy as np
+
+# (dy, dx) of the four neighbours, in the order the trace prefers them
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+def stack_mazes(mazes):
+    """(walls, starts, goals) for a batch of MazeGenerators or (walls, start, goal) tuples.
+
+    walls is an (N, height, width) boolean stack, True = wall, with smaller
+    mazes padded with walls on the right and bottom; starts and goals are
+    (N, 2) arrays of (x, y) cells.
+    """
+    grids, starts, goals = [], [], []
+    for maze in mazes:
+        if isinstance(maze, tuple):
+            walls, start, goal = maze
+        else:
+            walls, start, goal = maze.maze, maze.start_pos, maze.goal_pos
+        grids.append(np.asarray(walls, dtype=bool))
+        starts.append(start)
+        goals.append(goal)
+    height = max(grid.shape[0] for grid in grids)
+    width = max(grid.shape[1] for grid in grids)
+    walls = np.ones((len(grids), height, width), dtype=bool)
+    for number, grid in enumerate(grids):
+        walls[number, :grid.shape[0], :grid.shape[1]] = grid
+    return walls, np.array(starts, dtype=np.int32).reshape(-1, 2), np.array(goals, dtype=np.int32).reshape(-1, 2)
+
+def _pack(stack):
+    """Pack an (N, height, width) boolean stack into (ceil(N / 64), height, width) uint64 words, maze i in bit i % 64"""
+    count, height, width = stack.shape
+    words = -(-count // 64)
+    padded = np.zeros((words * 64, height, width), dtype=bool)
+    padded[:count] = stack
+    packed = np.packbits(padded.reshape(words, 64, height, width), axis=1, bitorder="little")
+    return np.ascontiguousarray(packed.transpose(0, 2, 3, 1)).view("<u8")[..., 0]
+
+def _unpack(words, count):
+    bits = np.unpackbits(words[..., None].view(np.uint8), axis=-1, bitorder="little")
+    return bits.transpose(0, 3, 1, 2).reshape(-1, *words.shape[1:])[:count].astype(bool)
+
+def _bits(words, mazes, y, x):
+    """Bit of each maze at its own (y, x) cell"""
+    return (words[mazes // 64, y, x] >> (mazes % 64).astype(np.uint64)) & np.uint64(1)
+
+def _cells(count, cells, height, width):
+    """A packed, wall-padded stack with one (x, y) cell set per maze"""
+    words = np.zeros((-(-count // 64), height + 2, width + 2), dtype=np.uint64)
+    mazes = np.arange(count)
+    np.bitwise_or.at(words, (mazes // 64, cells[:, 1] + 1, cells[:, 0] + 1),
+                     np.left_shift(np.uint64(1), (mazes % 64).astype(np.uint64)))
+    return words
+
+def _fill_packed(open_words, kept_words):
+    """Fill dead ends in place in packed, wall-padded open cells; returns the rounds it took"""
+    inner = open_words[:, 1:-1, 1:-1]
+    kept = kept_words[:, 1:-1, 1:-1]
+    rounds = 0
+    while True:
+        up, down = open_words[:, :-2, 1:-1], open_words[:, 2:, 1:-1]
+        left, right = open_words[:, 1:-1, :-2], open_words[:, 1:-1, 2:]
+        # Bitwise "at least two of the four neighbours are open", for 64 mazes per word
+        corridor = (up & down) | (left & right) | ((up | down) & (left | right))
+        dead = inner & ~corridor & ~kept
+        rounds += 1
+        if not dead.any():
+            return rounds
+        inner &= ~dead
+
+def fill_dead_ends(walls, starts, goals):
+    """Open cells left once dead ends are filled in every maze of the stack, and the rounds it took.
+
+    Each round closes every open cell other than a start or goal that has
+    at most one open neighbour, in all mazes at once. What remains is the
+    solution corridor, plus any loops the maze has that dead-end filling
+    cannot remove.
+    """
+    count, height, width = walls.shape
+    open_words = _pack(np.pad(~np.asarray(walls, dtype=bool), ((0, 0), (1, 1), (1, 1))))
+    rounds = _fill_packed(open_words, _cells(count, starts, height, width) | _cells(count, goals, height, width))
+    return _unpack(open_words, count)[:, 1:-1, 1:-1], rounds
+
+def solve_batch(walls, starts, goals):
+    """Solution masks and lengths for a stack of mazes from stack_mazes.
+
+    The stack is packed 64 mazes to a machine word, so every round of
+    dead-end filling is a handful of bitwise operations on a small array.
+    Because the generator's mazes keep a few loops, a breadth-first wave
+    over the remaining cells then picks one shortest route: it keeps only
+    each cell's distance modulo 3 in two bit planes, which is enough to
+    step back from every goal towards its start in step. lengths counts
+    cells including start and goal, like Pathfinder.get_solution_path,
+    and is 0 where the goal cannot be reached.
+    """
+    walls = np.asarray(walls, dtype=bool)
+    starts = np.asarray(starts, dtype=np.int32)
+    goals = np.asarray(goals, dtype=np.int32)
+    count, height, width = walls.shape
+    open_words = _pack(np.pad(~walls, ((0, 0), (1, 1), (1, 1))))
+    start_words = _cells(count, starts, height, width)
+    _fill_packed(open_words, start_words | _cells(count, goals, height, width))
+
+    batch = np.arange(count)
+    goal_y = goals[:, 1] + 1
+    goal_x = goals[:, 0] + 1
+    visited = start_words & open_words
+    frontier = visited.copy()
+    planes = np.zeros((2,) + open_words.shape, dtype=np.uint64)
+    grown = np.zeros_like(frontier)
+    inner = grown[:, 1:-1, 1:-1]
+    distances = np.where(_bits(visited, batch, goal_y, goal_x) == 1, 0, -1)
+    pending = batch[distances < 0]
+    step = 0
+    while len(pending) and frontier.any():
+        step += 1
+        np.bitwise_or(frontier[:, :-2, 1:-1], frontier[:, 2:, 1:-1], out=inner)
+        inner |= frontier[:, 1:-1, :-2]
+        inner |= frontier[:, 1:-1, 2:]
+        np.bitwise_and(grown, open_words, out=frontier)
+        frontier &= ~visited
+        visited |= frontier
+        if step % 3 & 1:
+            planes[0] |= frontier
+        if step % 3 & 2:
+            planes[1] |= frontier
+        reached = _bits(frontier, pending, goal_y[pending], goal_x[pending]) == 1
+        distances[pending[reached]] = step
+        pending = pending[~reached]
+
+    lengths = np.where(distances >= 0, distances + 1, 0)
+    masks = np.zeros((count, height + 2, width + 2), dtype=bool)
+    solved = batch[distances >= 0]
+    masks[solved, goal_y[solved], goal_x[solved]] = True
+    offsets = np.array(NEIGHBOURS, dtype=np.int32)
+    ids = batch[distances > 0]
+    y, x, remaining = goal_y[ids], goal_x[ids], distances[ids]
+    while len(ids):
+        # Step to the first visited neighbour whose distance is one less, modulo 3
+        ny = y + offsets[:, :1]
+        nx = x + offsets[:, 1:]
+        residue = _bits(planes[0], ids, ny, nx) + 2 * _bits(planes[1], ids, ny, nx)
+        candidates = (_bits(visited, ids, ny, nx) == 1) & (residue == (remaining - 1) % 3)
+        choice = np.argmax(candidates, axis=0)
+        y = y + offsets[choice, 0]
+        x = x + offsets[choice, 1]
+        remaining = remaining - 1
+        masks[ids, y, x] = True
+        walking = remaining > 0
+        ids, y, x, remaining = ids[walking], y[walking], x[walking], remaining[walking]
+    return masks[:, 1:-1, 1:-1], lengths
+
+def solution_cells(mask, start):
+    """The (x, y) cells of one solution mask in order from start"""
+    path = [tuple(start)]
+    previous = None
+    height, width = mask.shape
+    while True:
+        x, y = path[-1]
+        for dy, dx in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and mask[ny, nx] and (nx, ny) != previous:
+                previous = (x, y)
+                path.append((nx, ny))
+                break
+        else:
+            return path if mask[start[1], start[0]] else []
+
+def generate_mazes(count, cell_size, width=800, height=720, first_seed=0):
+    from maze_generator import MazeGenerator
+    mazes = []
+    for seed in range(first_seed, first_seed + count):
+        maze = MazeGenerator(width, height, cell_size, rng=random.Random(seed))
+        maze.generate_maze()
+        mazes.append(maze)
+    return mazes
+
+def compare_with_astar(mazes, masks, lengths):
+    """Mazes whose batch solution is not a start-to-goal path as short as Pathfinder's A* path"""
+    from maze_generator import Pathfinder
+    mismatched = []
+    for number, maze in enumerate(mazes):
+        expected = len(Pathfinder(maze).get_solution_path())
+        cells = solution_cells(masks[number], maze.start_pos)
+        if (lengths[number] != expected or len(cells) != expected or int(masks[number].sum()) != expected or
+                (expected and cells[-1] != tuple(maze.goal_pos))):
+            mismatched.append(number)
+    return mismatched
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a batch of generated mazes at once and compare with A*")
+    parser.add_argument("--count", type=int, default=500, help="mazes per batch")
+    parser.add_argument("--cell-size", type=int, default=10, help="cell size in pixels of an 800x720 maze")
+    parser.add_argument("--first-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mazes = generate_mazes(args.count, args.cell_size, first_seed=args.first_seed)
+    walls, starts, goals = stack_mazes(mazes)
+    started = time.perf_counter()
+    masks, lengths = solve_batch(walls, starts, goals)
+    batch_seconds = time.perf_counter() - started
+
+    from maze_generator import Pathfinder
+    started = time.perf_counter()
+    for maze in mazes:
+        Pathfinder(maze).get_solution_path()
+    astar_seconds = time.perf_counter() - started
+
+    mismatched = compare_with_astar(mazes, masks, lengths)
+    print(f"{len(mazes)} mazes of {walls.shape[2]}x{walls.shape[1]} cells, mean solution {lengths.mean():.0f} cells")
+    print(f"batch dead-end filling: {len(mazes) / batch_seconds:,.0f} mazes/s; "
+          f"A* one maze at a time: {len(mazes) / astar_seconds:,.0f} mazes/s")
+    print(f"{len(mismatched)} mazes differ from A*" + (f" (first: {mismatched[:5]})" if mismatched else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Run in a fresh interpreter so module import costs are measured cold
+STARTUP_PROBE = """
+import time
+import main
+import pygame
+main.init_display()
+main.draw_menu()
+pygame.display.flip()
+main.startup_timings["first_frame"] = (time.perf_counter() - main.IMPORT_STARTED) * 1000
+print(main.startup_timings["import"], main.startup_timings["display"], main.startup_timings["first_frame"])
+"""
+
+# A headless worker: import the core and build one Hard maze, optionally after bringing up pygame as before
+HEADLESS_PROBE = """
+import sys
+import time
+started = time.perf_counter()
+if "--with-pygame" in sys.argv:
+    import pygame
+    pygame.init()
+import maze_generator
+imported = (time.perf_counter() - started) * 1000
+generator = maze_generator.MazeGenerator(800, 720, cell_size=10)
+generator.generate_maze()
+maze_generator.Pathfinder(generator).get_solution_path()
+try:
+    import resource
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    peak_mb = float("nan")
+print(imported, (time.perf_counter() - started) * 1000, peak_mb)
+"""
+
+# A reader process: follow a shared-state block for a while, copying a consistent snapshot as often as it can
+SHARED_STATE_READER_PROBE = """
+import sys
+import time
+from shared_state import SharedStateReader
+reader = SharedStateReader(sys.argv[1])
+version, walls = reader.maze()
+walls_sum = int(walls.sum())
+del walls
+snapshots = 0
+ticks = set()
+started = time.perf_counter()
+while time.perf_counter() - started < float(sys.argv[2]):
+    tick, state, entities = reader.snapshot()
+    assert len(entities) == 0 or entities["x"][0] == tick
+    ticks.add(tick)
+    snapshots += 1
+elapsed = time.perf_counter() - started
+print(snapshots / elapsed, len(ticks), reader.retries, walls_sum)
+reader.close()
+"""
+
+def run_probe(probe, runs, *args):
+    """Median of each number a probe prints over fresh processes"""
+    env = dict(os.environ, SDL_VIDEODRIVER=os.environ.get("SDL_VIDEODRIVER", "dummy"),
+               PYGAME_HIDE_SUPPORT_PROMPT="1")
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", probe, *args], capture_output=True, text=True,
+                                check=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+        samples.append([float(value) for value in output.stdout.strip().splitlines()[-1].split()])
+    return [statistics.median(sample[i] for sample in samples) for i in range(len(samples[0]))]
+
+def measure_startup(runs):
+    """Median import, display and first-menu-frame times over fresh processes"""
+    return dict(zip(["import", "display", "first_frame"], run_probe(STARTUP_PROBE, runs)))
+
+def measure_headless_worker(runs):
+    """Import time, import-plus-first-maze time and peak memory of a headless worker, with and without pygame"""
+    return {label: run_probe(HEADLESS_PROBE, runs, *args)
+            for label, args in (("core only", ()), ("with pygame", ("--with-pygame",)))}
+
+def measure_maze_builds(runs):
+    """Median time to build a maze and its solution path for each difficulty"""
+    import main
+    results = {}
+    for level in sorted(main.CELL_SIZES):
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            main.build_maze(level)
+            times.append((time.perf_counter() - started) * 1000)
+        results[main.DIFFICULTY_SETTINGS[level]["name"]] = statistics.median(times)
+    return results
+
+def measure_allocations(frames, level, warmup=300):
+    """Run headless PLAYING ticks under the allocation profiler and return its reports"""
+    import main
+    import pygame
+    from allocation_profiler import AllocationProfiler
+    main.init_display()
+    main.difficulty = level
+    main.reset_game()
+    for _ in range(warmup):
+        main.update_playing(pygame.key.get_pressed())
+        main.draw_playing()
+
+    profiler = AllocationProfiler(window=frames)
+    profiler.start()
+    for _ in range(frames):
+        profiler.begin_frame()
+        main.update_playing(pygame.key.get_pressed())
+        main.draw_playing()
+        profiler.end_frame()
+    profiler.stop()
+    main.path_service.shutdown()
+    return profiler
+
+def measure_telemetry(records=1_000_000, calls=200_000):
+    """Frame-thread cost per telemetry call, writer throughput, and reading back a log of many records"""
+    import shutil
+    import telemetry
+    directory = tempfile.mkdtemp()
+    try:
+        recorder = telemetry.Telemetry(directory, capacity=calls + 64)
+        started = time.perf_counter()
+        for tick in range(calls):
+            recorder.frame(tick, 5.0 + tick % 30)
+        frame_us = (time.perf_counter() - started) / calls * 1e6
+        started = time.perf_counter()
+        for tick in range(calls):
+            recorder.tracking_changed(tick, 1, tick & 1, 120.0, 80.0)
+        push_us = (time.perf_counter() - started) / calls * 1e6
+        recorder.writer.flush()
+
+        # Fill a log of run-shaped records through the writer, one flush per batch as the thread would
+        ring = recorder.ring
+        started = time.perf_counter()
+        for run in range(records // 32):
+            ring.push(telemetry.RUN_START, run % 3 + 1, 0, run, 0, run * 2654435761 & 0xFFFFFFFF)
+            for tick in range(30):
+                ring.push(telemetry.FRAME_TIMES if tick % 3 else telemetry.TRACKING, run % 3 + 1, 1, run, tick,
+                          *((0, 60, 0, 0, 0, 0, 0, 0, 0, 0) if tick % 3 else (tick & 1, 100.0, 200.0)))
+            ring.push(telemetry.RUN_END, run % 3 + 1, 0, run, 30, run % 3 + 1, 40.0, 900.0, 100.0, 200.0)
+            if ring.head - ring.tail > 4096:
+                recorder.writer.flush()
+        recorder.writer.flush()
+        write_seconds = time.perf_counter() - started
+        log_bytes = sum(os.path.getsize(path) for path in telemetry.log_files(directory))
+
+        started = time.perf_counter()
+        summary = telemetry.summarize(telemetry.read_records(telemetry.log_files(directory)))
+        read_seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(directory)
+    return {"frame_us": frame_us, "push_us": push_us, "records": summary["records"], "write_s": write_seconds,
+            "log_mb": log_bytes / 1e6, "read_s": read_seconds}
+
+def measure_shared_state(seconds=2.0, entities=9):
+    """Publisher cost per tick, a reader process's snapshot rate, and what pickling the same state would cost"""
+    import pickle
+    import numpy as np
+    from maze_generator import MazeGenerator
+    from shared_state import SharedStatePublisher
+    generator = MazeGenerator(800, 720, cell_size=10)
+    generator.generate_maze()
+    publisher = SharedStatePublisher(max_maze_cells=generator.maze_width * generator.maze_height)
+    try:
+        publisher.publish_maze(generator)
+        ticks = 20_000
+        started = time.perf_counter()
+        for tick in range(ticks):
+            # Entity x carries the tick so the reader can check every snapshot is from a single tick
+            publisher.publish(tick, 2, [(index, 0, float(tick), float(index)) for index in range(entities)])
+        publish_us = (time.perf_counter() - started) / ticks * 1e6
+
+        reader = subprocess.Popen([sys.executable, "-c", SHARED_STATE_READER_PROBE, publisher.name, str(seconds)],
+                                  stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        tick = ticks
+        while reader.poll() is None:
+            publisher.publish(tick, 2, [(index, 0, float(tick), float(index)) for index in range(entities)])
+            tick += 1
+            time.sleep(0.0005)
+        output = reader.stdout.read().split()
+        if reader.returncode != 0 or not output:
+            raise RuntimeError("shared-state reader failed")
+        snapshot_rate, ticks_seen, retries, walls_sum = [float(value) for value in output]
+        assert walls_sum == int(np.asarray(generator.maze).sum())
+
+        state = (generator.maze, [(index, 0, 0.0, float(index)) for index in range(entities)])
+        started = time.perf_counter()
+        for _ in range(200):
+            pickle.loads(pickle.dumps(state))
+        pickle_us = (time.perf_counter() - started) / 200 * 1e6
+    finally:
+        publisher.close()
+    return {"publish_us": publish_us, "snapshot_rate": snapshot_rate, "ticks_seen": int(ticks_seen),
+            "ticks_published": tick - ticks, "retries": int(retries), "pickle_us": pickle_us}
+
+def measure_rewind(enemy_counts=(3, 16, 64), ticks=20_000):
+    """Snapshot capture cost per tick and restore cost for several enemy counts"""
+    from types import SimpleNamespace
+    from rewind import SnapshotRing
+    player = SimpleNamespace(x=100.0, y=200.0)
+    results = {}
+    for count in enemy_counts:
+        roster = [SimpleNamespace(x=10.0 * i, y=20.0, direction_x=1.0, direction_y=-0.5, spawn_timer=180,
+                                  tracking_timer=90, tracking_chance_timer=12, safe_zone_timer=0,
+                                  direction_change_timer=0, stuck_counter=0, last_decision_tick=40,
+                                  removed=False, is_spawned=True, is_tracking=i % 2 == 0) for i in range(count)]
+        ring = SnapshotRing(360, count)
+        started = time.perf_counter()
+        for tick in range(ticks):
+            ring.capture(tick, tick / 60, 0.0, player, roster)
+        capture_us = (time.perf_counter() - started) / ticks * 1e6
+        started = time.perf_counter()
+        for _ in range(1000):
+            ring.restore(300, player, roster)
+            ring.count += 300
+        restore_us = (time.perf_counter() - started) / 1000 * 1e6
+        results[count] = (capture_us, restore_us, ring.record_size)
+    return results
+
+def measure_levels(count=300, level=3, loads=200):
+    """Parallel conversion of exported text levels into a cache, then per-game load cost against generating"""
+    import random
+    import shutil
+    import main as game
+    import level_loader
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "levels")
+        os.makedirs(source)
+        for number in range(count):
+            random.seed(number)
+            generator, _ = game.build_maze(level)
+            with open(os.path.join(source, f"level{number:05d}.txt"), "wb") as text:
+                text.write(level_loader.format_text(generator.maze, generator.start_pos, generator.goal_pos))
+        paths = level_loader.level_files(source)
+        started = time.perf_counter()
+        rejected = level_loader.build_cache(paths, os.path.join(directory, "cache"))
+        convert_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for path in paths[:20]:
+            level_loader.load_level(path)
+        parse_ms = (time.perf_counter() - started) / 20 * 1000
+        cache = level_loader.LevelCache(os.path.join(directory, "cache"))
+        started = time.perf_counter()
+        for number in range(loads):
+            cache.load(number % len(cache), game.CELL_SIZES[level])
+        load_ms = (time.perf_counter() - started) / loads * 1000
+        started = time.perf_counter()
+        for _ in range(5):
+            game.build_maze(level)
+        build_ms = (time.perf_counter() - started) / 5 * 1000
+    finally:
+        shutil.rmtree(directory)
+    return {"levels": count, "rejected": len(rejected), "convert_s": convert_s, "files_per_s": count / convert_s,
+            "parse_ms": parse_ms, "load_ms": load_ms, "build_ms": build_ms}
+
+def measure_batch_solver(count=500, cell_sizes=(20, 15, 10)):
+    """Batch dead-end-filling solver throughput against A* one maze at a time, per maze size"""
+    import batch_solver
+    from maze_generator import Pathfinder
+    results = {}
+    for cell_size in cell_sizes:
+        mazes = batch_solver.generate_mazes(count, cell_size)
+        walls, starts, goals = batch_solver.stack_mazes(mazes)
+        started = time.perf_counter()
+        masks, lengths = batch_solver.solve_batch(walls, starts, goals)
+        batch_rate = count / (time.perf_counter() - started)
+        started = time.perf_counter()
+        for maze in mazes:
+            Pathfinder(maze).get_solution_path()
+        astar_rate = count / (time.perf_counter() - started)
+        mismatched = len(batch_solver.compare_with_astar(mazes, masks, lengths))
+        results[f"{walls.shape[2]}x{walls.shape[1]}"] = (batch_rate, astar_rate, mismatched)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Maze Runner startup, maze build and per-frame allocation costs")
+    parser.add_argument("--runs", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--allocations", type=int, metavar="FRAMES",
+                        help="profile allocations over this many headless PLAYING frames instead")
+    parser.add_argument("--difficulty", type=int, default=3, choices=[1, 2, 3])
+    parser.add_argument("--telemetry", action="store_true", help="measure the run telemetry recorder and reader instead")
+    parser.add_argument("--shared-state", action="store_true",
+                        help="measure publishing game state to shared memory and reading it from another process instead")
+    parser.add_argument("--rewind", action="store_true", help="measure rewind snapshot capture and restore instead")
+    parser.add_argument("--levels", action="store_true", help="measure level file conversion and cached level loads instead")
+    parser.add_argument("--batch-solver", action="store_true",
+                        help="measure the batch dead-end-filling solver against A* instead")
+    args = parser.parse_args()
+
+    if args.batch_solver:
+        print("Batch solver (maze size: batch mazes/s, A* mazes/s, mazes differing from A*):")
+        for size, (batch_rate, astar_rate, mismatched) in measure_batch_solver().items():
+            print(f"  {size:<8} {batch_rate:8,.0f} {astar_rate:8,.0f} {mismatched:4d}")
+        return
+
+    if args.levels:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        stats = measure_levels(level=args.difficulty)
+        print(f"Level cache: {stats['levels']} text levels converted in {stats['convert_s']:.2f} s "
+              f"({stats['files_per_s']:.0f} files/s, {stats['rejected']} rejected)")
+        print(f"  per game: {stats['load_ms']:.2f} ms to load from the cache, {stats['parse_ms']:.2f} ms to parse and "
+              f"validate the file, {stats['build_ms']:.1f} ms to generate a maze")
+        return
+
+    if args.rewind:
+        print("Rewind snapshots (enemies: capture per tick, restore, bytes per tick):")
+        for count, (capture_us, restore_us, record_size) in measure_rewind().items():
+            print(f"  {count:4d} enemies {capture_us:8.1f} us {restore_us:8.1f} us {record_size:6d} B")
+        return
+
+    if args.shared_state:
+        stats = measure_shared_state()
+        print(f"Shared state: {stats['publish_us']:.1f} us to publish a tick, "
+              f"reader copied {stats['snapshot_rate']:,.0f} consistent snapshots/s")
+        print(f"  reader saw {stats['ticks_seen']} of {stats['ticks_published']} ticks published, "
+              f"{stats['retries']} torn reads retried; pickling the maze and entities instead: {stats['pickle_us']:.0f} us")
+        return
+
+    if args.telemetry:
+        stats = measure_telemetry()
+        print(f"Telemetry frame-thread cost: {stats['frame_us']:.2f} us per frame sample, "
+              f"{stats['push_us']:.2f} us per event record")
+        print(f"  {stats['records']} records written in {stats['write_s']:.2f} s ({stats['log_mb']:.1f} MB compressed), "
+              f"read and aggregated in {stats['read_s'] * 1000:.0f} ms")
+        return
+
+    if args.allocations:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        profiler = measure_allocations(args.allocations, args.difficulty)
+        for report in profiler.reports:
+            print(profiler.format_report(report))
+        return
+
+    print("Startup (median of fresh processes):")
+    for name, ms in measure_startup(args.runs).items():
+        print(f"  {name:<12} {ms:8.1f} ms")
+    print("Headless worker (import ms, import + Hard maze ms, peak MB):")
+    for label, (imported, built, peak_mb) in measure_headless_worker(args.runs).items():
+        print(f"  {label:<12} {imported:8.1f} ms {built:8.1f} ms {peak_mb:6.1f} MB")
+    print("Maze build on difficulty select:")
+    for name, ms in measure_maze_builds(args.runs).items():
+        print(f"  {name:<12} {ms:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
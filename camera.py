@@ -0,0 +1,261 @@
+import pygame
+from collections import OrderedDict
+
+class Camera:
+    """Viewport onto the maze world; every world-to-screen conversion goes through here"""
+    def __init__(self, view_x, view_y, view_width, view_height, world_width, world_height):
+        self.view_rect = pygame.Rect(view_x, view_y, view_width, view_height)
+        self.world_width = world_width
+        self.world_height = world_height
+        # Top-left corner of the view in world pixels
+        self.x = 0
+        self.y = 0
+
+    def follow(self, target_x, target_y):
+        """Center the view on a world position, clamped to the world edges unless the world is unbounded"""
+        if self.world_width is None:
+            self.x = int(target_x - self.view_rect.width // 2)
+            self.y = int(target_y - self.view_rect.height // 2)
+            return
+        self.x = self._clamp(target_x - self.view_rect.width // 2, self.world_width - self.view_rect.width)
+        self.y = self._clamp(target_y - self.view_rect.height // 2, self.world_height - self.view_rect.height)
+
+    def _clamp(self, value, limit):
+        if limit <= 0:
+            return 0
+        return int(max(0, min(limit, value)))
+
+    def world_to_screen(self, x, y):
+        return (int(x - self.x + self.view_rect.x), int(y - self.y + self.view_rect.y))
+
+    def screen_to_world(self, x, y):
+        return (x - self.view_rect.x + self.x, y - self.view_rect.y + self.y)
+
+    def is_visible(self, x, y, margin=0):
+        """Check if a world position is inside the view, with an optional margin in pixels"""
+        return (self.x - margin <= x < self.x + self.view_rect.width + margin and
+                self.y - margin <= y < self.y + self.view_rect.height + margin)
+
+class ChunkedMazeRenderer:
+    """Renders the maze as fixed-size chunk surfaces kept in an LRU cache"""
+    def __init__(self, maze_generator, chunk_cells=32, max_chunks=64, keep_radius=2):
+        self.maze = maze_generator
+        self.chunk_cells = chunk_cells
+        self.chunk_pixels = chunk_cells * maze_generator.cell_size
+        self.max_chunks = max_chunks
+        self.keep_radius = keep_radius
+        self.chunks = OrderedDict()
+        self.chunks_rendered = 0
+
+    def draw(self, screen, camera):
+        """Blit only the chunks overlapping the camera view"""
+        first_x = camera.x // self.chunk_pixels
+        first_y = camera.y // self.chunk_pixels
+        last_x = (camera.x + camera.view_rect.width - 1) // self.chunk_pixels
+        last_y = (camera.y + camera.view_rect.height - 1) // self.chunk_pixels
+
+        previous_clip = screen.get_clip()
+        screen.set_clip(camera.view_rect)
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                surface = self._get_chunk(chunk_x, chunk_y)
+                if surface is not None:
+                    screen.blit(surface, camera.world_to_screen(chunk_x * self.chunk_pixels,
+                                                                chunk_y * self.chunk_pixels))
+        screen.set_clip(previous_clip)
+
+        self._evict((first_x + last_x) // 2, (first_y + last_y) // 2)
+
+    def invalidate(self):
+        """Forget every cached chunk, e.g. after the maze was edited"""
+        self.chunks.clear()
+
+    def _get_chunk(self, chunk_x, chunk_y):
+        key = (chunk_x, chunk_y)
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+        if chunk_x < 0 or chunk_y < 0:
+            return None
+        if chunk_x * self.chunk_cells >= self.maze.maze_width or chunk_y * self.chunk_cells >= self.maze.maze_height:
+            return None
+
+        surface = self._render_chunk(chunk_x, chunk_y)
+        self.chunks[key] = surface
+        self.chunks_rendered += 1
+        return surface
+
+    def _render_chunk(self, chunk_x, chunk_y):
+        cell_size = self.maze.cell_size
+        surface = pygame.Surface((self.chunk_pixels, self.chunk_pixels))
+        surface.fill(self.maze.WHITE)
+
+        first_x = chunk_x * self.chunk_cells
+        first_y = chunk_y * self.chunk_cells
+        last_x = min(first_x + self.chunk_cells, self.maze.maze_width)
+        last_y = min(first_y + self.chunk_cells, self.maze.maze_height)
+        for y in range(first_y, last_y):
+            row = self.maze.maze[y]
+            x = first_x
+            while x < last_x:
+                if not row[x]:
+                    x += 1
+                    continue
+                # Draw each horizontal run of wall cells as one rect
+                run_start = x
+                while x < last_x and row[x]:
+                    x += 1
+                pygame.draw.rect(surface, self.maze.BLACK,
+                                 ((run_start - first_x) * cell_size, (y - first_y) * cell_size,
+                                  (x - run_start) * cell_size, cell_size))
+
+        goal_x, goal_y = self.maze.goal_pos
+        if first_x <= goal_x < last_x and first_y <= goal_y < last_y:
+            pygame.draw.rect(surface, self.maze.RED,
+                             ((goal_x - first_x) * cell_size, (goal_y - first_y) * cell_size, cell_size, cell_size))
+        return surface
+
+    def _evict(self, center_x, center_y):
+        for key in list(self.chunks):
+            if max(abs(key[0] - center_x), abs(key[1] - center_y)) > self.keep_radius + 1:
+                del self.chunks[key]
+        while len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+
+class StreamingMazeRenderer:
+    """Renders a StreamingWorld's loaded chunks, one cached surface per chunk.
+
+    A surface is dropped as soon as the world unloads its chunk, so the
+    cache never outgrows the world's own load radius.
+    """
+    def __init__(self, world, wall_color=(0, 0, 0), open_color=(255, 255, 255), missing_color=(64, 64, 64)):
+        self.world = world
+        self.chunk_pixels = world.chunk_cells * world.cell_size
+        self.wall_color = wall_color
+        self.open_color = open_color
+        self.missing_color = missing_color
+        self.chunks = {}
+        self.chunks_rendered = 0
+
+    def draw(self, screen, camera):
+        """Blit the loaded chunks overlapping the camera view; chunks still being generated show as missing"""
+        first_x = camera.x // self.chunk_pixels
+        first_y = camera.y // self.chunk_pixels
+        last_x = (camera.x + camera.view_rect.width - 1) // self.chunk_pixels
+        last_y = (camera.y + camera.view_rect.height - 1) // self.chunk_pixels
+
+        for key in list(self.chunks):
+            if self.chunks[key][0] is not self.world.chunks.get(key):
+                del self.chunks[key]
+
+        previous_clip = screen.get_clip()
+        screen.set_clip(camera.view_rect)
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                position = camera.world_to_screen(chunk_x * self.chunk_pixels, chunk_y * self.chunk_pixels)
+                surface = self._get_chunk((chunk_x, chunk_y))
+                if surface is None:
+                    screen.fill(self.missing_color, (position, (self.chunk_pixels, self.chunk_pixels)))
+                else:
+                    screen.blit(surface, position)
+        screen.set_clip(previous_clip)
+
+    def _get_chunk(self, key):
+        rows = self.world.chunks.get(key)
+        if rows is None:
+            return None
+        cached = self.chunks.get(key)
+        if cached is not None:
+            return cached[1]
+        surface = self._render_chunk(rows)
+        self.chunks[key] = (rows, surface)
+        self.chunks_rendered += 1
+        return surface
+
+    def _render_chunk(self, rows):
+        cell_size = self.world.cell_size
+        surface = pygame.Surface((self.chunk_pixels, self.chunk_pixels))
+        surface.fill(self.open_color)
+        for y, row in enumerate(rows):
+            x = 0
+            while x < len(row):
+                if not row[x]:
+                    x += 1
+                    continue
+                # Draw each horizontal run of wall cells as one rect
+                run_start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                pygame.draw.rect(surface, self.wall_color,
+                                 (run_start * cell_size, y * cell_size, (x - run_start) * cell_size, cell_size))
+        return surface
+
+def render_maze_surface(maze_generator):
+    """The whole maze on one surface, walls black and the goal red"""
+    surface = pygame.Surface((maze_generator.width, maze_generator.height))
+    surface.fill(maze_generator.WHITE)
+    cell_size = maze_generator.cell_size
+    for y in range(maze_generator.maze_height):
+        for x in range(maze_generator.maze_width):
+            if maze_generator.maze[y][x]:
+                pygame.draw.rect(surface, maze_generator.BLACK, (x * cell_size, y * cell_size, cell_size, cell_size))
+    goal_x, goal_y = maze_generator.goal_pos
+    pygame.draw.rect(surface, maze_generator.RED, (goal_x * cell_size, goal_y * cell_size, cell_size, cell_size))
+    return surface
+
+class PathRevealLayer:
+    """A solution path drawn once onto a world-sized layer and revealed point by point.
+
+    reveal() stamps only the segments added since the last call onto the
+    layer, so a whole animation draws each segment once and every frame is
+    a single blit of the camera's view. Segment alpha rises along the path
+    (style "fade") or the line is opaque (style "flat").
+    """
+    def __init__(self, path, world_width, world_height, color, style="fade", width=6, point_radius=3, max_alpha=200):
+        self.path = path
+        self.color = color
+        self.style = style
+        self.width = width
+        self.point_radius = point_radius
+        self.max_alpha = max_alpha
+        if style == "flat":
+            # Opaque line on a colour key blits faster than per-pixel alpha
+            self.surface = pygame.Surface((world_width, world_height))
+            self.surface.set_colorkey((0, 0, 0))
+        else:
+            self.surface = pygame.Surface((world_width, world_height), pygame.SRCALPHA)
+        self.bounds = None  # World rect holding everything stamped so far
+        self.revealed = 0
+        self.segments_drawn = 0
+
+    def _color(self, index, cap):
+        if self.style == "flat":
+            return self.color
+        return (*self.color[:3], min(cap, int(255 * (index + 1) / len(self.path))))
+
+    def reveal(self, count):
+        """Show the first count points of the path"""
+        count = min(count, len(self.path))
+        if count <= self.revealed:
+            return
+        first = max(0, self.revealed - 1)
+        for i in range(first, count - 1):
+            self._grow(pygame.draw.line(self.surface, self._color(i, self.max_alpha), self.path[i], self.path[i + 1],
+                                        self.width))
+            self.segments_drawn += 1
+        if self.style != "flat":
+            # Points go over the segments that meet them, including the last point of the previous stamp
+            for i in range(first, count):
+                self._grow(pygame.draw.circle(self.surface, self._color(i, 255), self.path[i], self.point_radius))
+        self.revealed = count
+
+    def _grow(self, rect):
+        self.bounds = rect if self.bounds is None else self.bounds.union(rect)
+
+    def draw(self, screen, camera):
+        """Blit the stamped part of the layer that the camera sees"""
+        if self.bounds is None:
+            return
+        area = self.bounds.clip(pygame.Rect(camera.x, camera.y, camera.view_rect.width, camera.view_rect.height))
+        if area.width and area.height:
+            screen.blit(self.surface, camera.world_to_screen(area.x, area.y), area)
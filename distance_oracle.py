@@ -0,0 +1,159 @@
+from array import array
+import numpy as np
+
+class DistanceOracle:
+    """Exact cell-to-cell maze distances without a search per query.
+
+    A breadth-first spanning tree of the open cells is rooted once per
+    maze; its depths plus an Euler tour with a sparse table of minima give
+    the tree distance of any pair from one lowest-common-ancestor lookup.
+    The backtracker leaves few edges outside the tree, so one endpoint of
+    each becomes a portal with its own distance table: a shorter path than
+    the tree path must pass through a portal.
+    """
+    def __init__(self, maze, maze_width, maze_height):
+        self.maze_width = maze_width
+        self.maze_height = maze_height
+
+        # Compact node ids for open cells; -1 for walls
+        self.node_of = array('i', [-1]) * (maze_width * maze_height)
+        cells = []
+        for y in range(maze_height):
+            row = maze[y]
+            for x in range(maze_width):
+                if not row[x]:
+                    self.node_of[y * maze_width + x] = len(cells)
+                    cells.append((x, y))
+        count = len(cells)
+        self.node_count = count
+        neighbours = []
+        for x, y in cells:
+            node_neighbours = []
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < maze_width and 0 <= ny < maze_height and not maze[ny][nx]:
+                    node_neighbours.append(self.node_of[ny * maze_width + nx])
+            neighbours.append(node_neighbours)
+
+        # Breadth-first spanning forest; edges that close a cycle are collected as extra edges
+        self.depth = [-1] * count
+        self.component = [-1] * count
+        children = [[] for _ in range(count)]
+        roots = []
+        extra_edges = []
+        for root in range(count):
+            if self.depth[root] != -1:
+                continue
+            self.depth[root] = 0
+            self.component[root] = len(roots)
+            roots.append(root)
+            queue = [root]
+            for node in queue:
+                next_depth = self.depth[node] + 1
+                for neighbour in neighbours[node]:
+                    if self.depth[neighbour] == -1:
+                        self.depth[neighbour] = next_depth
+                        self.component[neighbour] = self.component[node]
+                        children[node].append(neighbour)
+                        queue.append(neighbour)
+                    elif node < neighbour and neighbour not in children[node] and node not in children[neighbour]:
+                        extra_edges.append((node, neighbour))
+
+        # Euler tour of every tree, then a sparse table over (depth, node) packed into one int
+        self.first_visit = [0] * count
+        tour = []
+        for root in roots:
+            self.first_visit[root] = len(tour)
+            tour.append(root)
+            stack = [(root, iter(children[root]))]
+            while stack:
+                child = next(stack[-1][1], None)
+                if child is None:
+                    stack.pop()
+                    if stack:
+                        tour.append(stack[-1][0])
+                else:
+                    self.first_visit[child] = len(tour)
+                    tour.append(child)
+                    stack.append((child, iter(children[child])))
+        level = np.array([self.depth[node] * count + node for node in tour], dtype=np.int64)
+        self.sparse_table = [level.tolist()]
+        span = 1
+        while span * 2 <= len(tour):
+            level = np.minimum(level[:-span], level[span:])
+            self.sparse_table.append(level.tolist())
+            span *= 2
+
+        # Portals: a greedy cover of the extra edges, each with a full distance table
+        portals = []
+        covered = set()
+        for a, b in extra_edges:
+            if a not in covered and b not in covered:
+                covered.add(a)
+                portals.append(a)
+        self.extra_edges = extra_edges
+        self.portals = portals
+        unreachable = 4 * count
+        tables = []
+        for portal in portals:
+            distances = [unreachable] * count
+            distances[portal] = 0
+            queue = [portal]
+            for node in queue:
+                next_distance = distances[node] + 1
+                for neighbour in neighbours[node]:
+                    if distances[neighbour] == unreachable:
+                        distances[neighbour] = next_distance
+                        queue.append(neighbour)
+            tables.append(distances)
+        self.portal_distances = np.array(tables, dtype=np.int32).reshape(len(portals), count)
+        # No path through a portal is shorter than the two nearest-portal distances combined
+        self.nearest_portal = (self.portal_distances.min(axis=0).tolist() if portals else [unreachable] * count)
+        self.tree_queries = 0
+        self.portal_queries = 0
+
+    def node(self, cell):
+        x, y = cell
+        if 0 <= x < self.maze_width and 0 <= y < self.maze_height:
+            return self.node_of[y * self.maze_width + x]
+        return -1
+
+    def tree_distance(self, a, b):
+        """Distance between two nodes along the spanning tree"""
+        left = self.first_visit[a]
+        right = self.first_visit[b]
+        if left > right:
+            left, right = right, left
+        level = (right - left + 1).bit_length() - 1
+        row = self.sparse_table[level]
+        ancestor = min(row[left], row[right - (1 << level) + 1]) % self.node_count
+        return self.depth[a] + self.depth[b] - 2 * self.depth[ancestor]
+
+    def distance(self, a, b):
+        """Steps between cells a and b through the maze, or None if either is a wall or they are not connected"""
+        node_a = self.node(a)
+        node_b = self.node(b)
+        if node_a < 0 or node_b < 0 or self.component[node_a] != self.component[node_b]:
+            return None
+        distance = self.tree_distance(node_a, node_b)
+        # The tree path is exact when it is as short as a straight run or no portal detour could beat it
+        if (distance <= abs(a[0] - b[0]) + abs(a[1] - b[1]) or
+                distance <= self.nearest_portal[node_a] + self.nearest_portal[node_b]):
+            self.tree_queries += 1
+            return distance
+        self.portal_queries += 1
+        return min(distance, int((self.portal_distances[:, node_a] + self.portal_distances[:, node_b]).min()))
+
+    def nearest(self, source, targets):
+        """Index and distance of the target cell closest to source, or (None, None) if none is reachable"""
+        best_index = None
+        best_distance = None
+        for index, target in enumerate(targets):
+            distance = self.distance(source, target)
+            if distance is not None and (best_distance is None or distance < best_distance):
+                best_index, best_distance = index, distance
+        return best_index, best_distance
+
+    def get_stats(self):
+        queries = max(1, self.tree_queries + self.portal_queries)
+        return {"cells": self.node_count, "extra_edges": len(self.extra_edges), "portals": len(self.portals),
+                "tree_share": self.tree_queries / queries}
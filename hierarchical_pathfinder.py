@@ -0,0 +1,248 @@
+import heapq
+from collections import deque
+
+class HierarchicalPathfinder:
+    """HPA* pathfinder that searches a graph of cluster entrances instead of single cells"""
+    def __init__(self, maze_generator, cluster_size=16, max_entrance_width=6):
+        self.maze = maze_generator
+        self.cluster_size = cluster_size
+        self.max_entrance_width = max_entrance_width
+        self.clusters_x = (self.maze.maze_width + cluster_size - 1) // cluster_size
+        self.clusters_y = (self.maze.maze_height + cluster_size - 1) // cluster_size
+
+        # border key -> list of (cell_a, cell_b) transitions across that border
+        self.border_transitions = {}
+        # node -> {node in neighbouring cluster: 1}
+        self.inter_edges = {}
+        # cluster -> {node: {node in same cluster: distance}}
+        self.intra_edges = {}
+
+        self.build()
+
+    def build(self):
+        """Precompute entrances and intra-cluster distances for the whole maze"""
+        self.border_transitions = {}
+        self.inter_edges = {}
+        self.intra_edges = {}
+
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                if cx + 1 < self.clusters_x:
+                    self._build_border(((cx, cy), (cx + 1, cy)))
+                if cy + 1 < self.clusters_y:
+                    self._build_border(((cx, cy), (cx, cy + 1)))
+
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                self._build_intra_edges((cx, cy))
+
+    def update_cell(self, grid_x, grid_y):
+        """Re-cluster only the cluster containing a mutated cell"""
+        cluster = self.cluster_of((grid_x, grid_y))
+        cx, cy = cluster
+        neighbours = [(cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)]
+        neighbours = [c for c in neighbours if 0 <= c[0] < self.clusters_x and 0 <= c[1] < self.clusters_y]
+
+        for other in neighbours:
+            self._build_border(tuple(sorted((cluster, other))))
+
+        # Entrances on the shared borders moved, so neighbouring clusters need new intra edges too
+        for affected in [cluster] + neighbours:
+            self._build_intra_edges(affected)
+
+    def cluster_of(self, cell):
+        return cell[0] // self.cluster_size, cell[1] // self.cluster_size
+
+    def find_path(self, start_grid, target_grid):
+        """Get the abstract path as a list of entrance cells from start to target"""
+        if self._is_blocked(start_grid) or self._is_blocked(target_grid):
+            return []
+        if start_grid == target_grid:
+            return [start_grid]
+
+        start_cluster = self.cluster_of(start_grid)
+        target_cluster = self.cluster_of(target_grid)
+
+        # Paths that stay inside one cluster never need the abstract graph
+        if start_cluster == target_cluster:
+            local_path = self._local_path(start_grid, target_grid, start_cluster)
+            if local_path:
+                return [start_grid, target_grid]
+
+        start_links = self._links_to_nodes(start_grid, start_cluster)
+        target_links = self._links_to_nodes(target_grid, target_cluster)
+
+        open_set = [(self.heuristic(start_grid, target_grid), 0, start_grid)]
+        came_from = {}
+        g_score = {start_grid: 0}
+
+        while open_set:
+            _, current_g, current = heapq.heappop(open_set)
+            if current_g > g_score.get(current, float('inf')):
+                continue
+
+            if current == target_grid:
+                path = [current]
+                while current in came_from:
+                    current = came_from[current]
+                    path.append(current)
+                path.reverse()
+                return path
+
+            edges = list(self._node_edges(current))
+            if current == start_grid:
+                edges.extend(start_links.items())
+            if current in target_links:
+                edges.append((target_grid, target_links[current]))
+
+            for neighbour, cost in edges:
+                tentative_g_score = current_g + cost
+                if tentative_g_score < g_score.get(neighbour, float('inf')):
+                    came_from[neighbour] = current
+                    g_score[neighbour] = tentative_g_score
+                    heapq.heappush(open_set, (tentative_g_score + self.heuristic(neighbour, target_grid),
+                                              tentative_g_score, neighbour))
+
+        return []
+
+    def get_next_steps(self, start_grid, target_grid, max_steps=8):
+        """Refine only the first few abstract edges into a cell path of up to max_steps moves"""
+        abstract_path = self.find_path(start_grid, target_grid)
+        if not abstract_path:
+            return []
+
+        path = [abstract_path[0]]
+        for node_a, node_b in zip(abstract_path, abstract_path[1:]):
+            path.extend(self._refine_edge(node_a, node_b)[1:])
+            if max_steps is not None and len(path) > max_steps:
+                return path[:max_steps + 1]
+        return path
+
+    def get_full_path(self, start_grid, target_grid):
+        """Refine the whole abstract path into a cell path"""
+        return self.get_next_steps(start_grid, target_grid, max_steps=None)
+
+    def heuristic(self, a, b):
+        """Manhattan distance heuristic"""
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def _is_blocked(self, cell):
+        x, y = cell
+        return not (0 <= x < self.maze.maze_width and 0 <= y < self.maze.maze_height) or self.maze.maze[y][x]
+
+    def _cluster_bounds(self, cluster):
+        cx, cy = cluster
+        min_x = cx * self.cluster_size
+        min_y = cy * self.cluster_size
+        max_x = min(min_x + self.cluster_size, self.maze.maze_width)
+        max_y = min(min_y + self.cluster_size, self.maze.maze_height)
+        return min_x, min_y, max_x, max_y
+
+    def _build_border(self, border):
+        """Find the open runs along a border and place transitions on them"""
+        for cell_a, cell_b in self.border_transitions.get(border, []):
+            for node, other in ((cell_a, cell_b), (cell_b, cell_a)):
+                links = self.inter_edges.get(node)
+                if links is not None:
+                    links.pop(other, None)
+                    if not links:
+                        del self.inter_edges[node]
+
+        (ax, ay), (bx, by) = border
+        min_x, min_y, max_x, max_y = self._cluster_bounds((ax, ay))
+        if bx != ax:
+            # Vertical border: cells (max_x - 1, y) and (max_x, y)
+            pairs = [((max_x - 1, y), (max_x, y)) for y in range(min_y, max_y)]
+        else:
+            # Horizontal border: cells (x, max_y - 1) and (x, max_y)
+            pairs = [((x, max_y - 1), (x, max_y)) for x in range(min_x, max_x)]
+
+        transitions = []
+        run = []
+        for cell_a, cell_b in pairs + [(None, None)]:
+            if cell_a is not None and not self._is_blocked(cell_a) and not self._is_blocked(cell_b):
+                run.append((cell_a, cell_b))
+                continue
+            if run:
+                if len(run) > self.max_entrance_width:
+                    transitions.append(run[0])
+                    transitions.append(run[-1])
+                else:
+                    transitions.append(run[len(run) // 2])
+                run = []
+
+        self.border_transitions[border] = transitions
+        for cell_a, cell_b in transitions:
+            self.inter_edges.setdefault(cell_a, {})[cell_b] = 1
+            self.inter_edges.setdefault(cell_b, {})[cell_a] = 1
+
+    def _cluster_nodes(self, cluster):
+        cx, cy = cluster
+        nodes = set()
+        for other in [(cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)]:
+            for cell_a, cell_b in self.border_transitions.get(tuple(sorted((cluster, other))), []):
+                nodes.add(cell_a if self.cluster_of(cell_a) == cluster else cell_b)
+        return nodes
+
+    def _build_intra_edges(self, cluster):
+        nodes = self._cluster_nodes(cluster)
+        edges = {}
+        for node in nodes:
+            distances = self._local_distances(node, cluster)
+            edges[node] = {other: distances[other] for other in nodes
+                           if other != node and other in distances}
+        self.intra_edges[cluster] = edges
+
+    def _node_edges(self, node):
+        yield from self.intra_edges.get(self.cluster_of(node), {}).get(node, {}).items()
+        yield from self.inter_edges.get(node, {}).items()
+
+    def _links_to_nodes(self, cell, cluster):
+        """Distances from a temporary start/target cell to the entrances of its cluster"""
+        distances = self._local_distances(cell, cluster)
+        nodes = self._cluster_nodes(cluster)
+        return {node: distances[node] for node in nodes if node in distances}
+
+    def _local_distances(self, source, cluster):
+        """BFS distances from source restricted to one cluster"""
+        min_x, min_y, max_x, max_y = self._cluster_bounds(cluster)
+        distances = {source: 0}
+        queue = deque([source])
+        while queue:
+            x, y = queue.popleft()
+            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+                next_x, next_y = x + dx, y + dy
+                if (min_x <= next_x < max_x and min_y <= next_y < max_y and
+                        not self.maze.maze[next_y][next_x] and (next_x, next_y) not in distances):
+                    distances[(next_x, next_y)] = distances[(x, y)] + 1
+                    queue.append((next_x, next_y))
+        return distances
+
+    def _local_path(self, start, target, cluster):
+        """BFS cell path from start to target restricted to one cluster"""
+        min_x, min_y, max_x, max_y = self._cluster_bounds(cluster)
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                return path
+            x, y = current
+            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+                next_x, next_y = x + dx, y + dy
+                if (min_x <= next_x < max_x and min_y <= next_y < max_y and
+                        not self.maze.maze[next_y][next_x] and (next_x, next_y) not in came_from):
+                    came_from[(next_x, next_y)] = current
+                    queue.append((next_x, next_y))
+        return []
+
+    def _refine_edge(self, node_a, node_b):
+        """Turn one abstract edge into cells, searching only inside the shared cluster"""
+        if self.heuristic(node_a, node_b) == 1 and self.cluster_of(node_a) != self.cluster_of(node_b):
+            return [node_a, node_b]
+        return self._local_path(node_a, node_b, self.cluster_of(node_a))
@@ -0,0 +1,174 @@
+import heapq
+
+INFINITY = float('inf')
+
+class IncrementalPlanner:
+    """D* Lite planner that keeps its search state between replans.
+
+    The search runs backwards from the goal, so a moving start only bumps
+    the key modifier and reuses every g-value found so far. A moving goal
+    shifts the whole g-field, which costs more to repair than to rebuild,
+    so it restarts the search instead. Enemies plan from themselves to the
+    player, so their own steps along the path are nearly free.
+    """
+    def __init__(self, maze_generator, max_cells=None):
+        self.maze = maze_generator
+        self.max_cells = max_cells
+        self.expansions = 0
+        self.path_version = 0
+        self.reset()
+
+    def reset(self):
+        """Drop all search state; the next search starts from scratch"""
+        self.g = {}
+        self.rhs = {}
+        self.open_set = []
+        self.open_keys = {}
+        self.km = 0
+        self.start = None
+        self.goal = None
+        self.last_start = None
+        self.path = []
+        self.dirty = False
+
+    def plan(self, start_grid, goal_grid, max_cells=None):
+        """Get a cell path from start to goal (start included), repairing the previous search.
+
+        The same list object is returned while neither end has moved.
+        """
+        if not self.set_endpoints(start_grid, goal_grid):
+            return []
+        if max_cells != self.max_cells:
+            self.max_cells = max_cells
+            self.path = self._extract_path()
+        self.compute()
+        return self.path
+
+    def set_endpoints(self, start_grid, goal_grid):
+        """Move the start and/or goal; returns False if either lies in a wall"""
+        if self._is_blocked(start_grid) or self._is_blocked(goal_grid):
+            return False
+
+        if self.goal is None or goal_grid != self.goal:
+            self._restart(start_grid, goal_grid)
+            return True
+
+        if start_grid != self.start:
+            self.start = start_grid
+            self.km += self.heuristic(self.last_start, self.start)
+            self.last_start = self.start
+            self.dirty = True
+        return True
+
+    def _restart(self, start_grid, goal_grid):
+        """Search from scratch towards a new goal; the current path stays until the new one is found"""
+        path = self.path
+        self.reset()
+        self.path = path
+        self.start = self.last_start = start_grid
+        self.goal = goal_grid
+        self.rhs[goal_grid] = 0
+        self._push(goal_grid)
+        self.dirty = True
+
+    def compute(self, max_expansions=None):
+        """Continue the repair for at most max_expansions cells; returns (finished, expansions used)"""
+        if not self.dirty:
+            return True, 0
+        finished, used = self._compute_shortest_path(max_expansions)
+        if finished:
+            self.dirty = False
+            self.path = self._extract_path()
+            self.path_version += 1
+        return finished, used
+
+    def heuristic(self, a, b):
+        """Manhattan distance heuristic"""
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def _is_blocked(self, cell):
+        x, y = cell
+        return not (0 <= x < self.maze.maze_width and 0 <= y < self.maze.maze_height) or self.maze.maze[y][x]
+
+    def _neighbours(self, cell):
+        x, y = cell
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            next_x, next_y = x + dx, y + dy
+            if (0 <= next_x < self.maze.maze_width and 0 <= next_y < self.maze.maze_height and
+                    not self.maze.maze[next_y][next_x]):
+                yield next_x, next_y
+
+    def _calculate_key(self, cell):
+        best = min(self.g.get(cell, INFINITY), self.rhs.get(cell, INFINITY))
+        return (best + self.heuristic(self.start, cell) + self.km, best)
+
+    def _push(self, cell):
+        key = self._calculate_key(cell)
+        self.open_keys[cell] = key
+        heapq.heappush(self.open_set, (key, cell))
+
+    def _top_key(self):
+        # Entries are removed lazily, so skip any that no longer match open_keys
+        while self.open_set:
+            key, cell = self.open_set[0]
+            if self.open_keys.get(cell) == key:
+                return key
+            heapq.heappop(self.open_set)
+        return (INFINITY, INFINITY)
+
+    def _update_vertex(self, cell):
+        if cell != self.goal:
+            self.rhs[cell] = min((self.g.get(n, INFINITY) + 1 for n in self._neighbours(cell)), default=INFINITY)
+        self.open_keys.pop(cell, None)
+        if self.g.get(cell, INFINITY) != self.rhs.get(cell, INFINITY):
+            self._push(cell)
+
+    def _compute_shortest_path(self, max_expansions=None):
+        used = 0
+        while (self._top_key() < self._calculate_key(self.start) or
+               self.rhs.get(self.start, INFINITY) != self.g.get(self.start, INFINITY)):
+            if not self.open_keys:
+                break
+            if max_expansions is not None and used >= max_expansions:
+                # Every inconsistent cell is still queued, so the search can resume later
+                return False, used
+            key_old, cell = heapq.heappop(self.open_set)
+            del self.open_keys[cell]
+            self.expansions += 1
+            used += 1
+
+            key_new = self._calculate_key(cell)
+            if key_old < key_new:
+                self.open_keys[cell] = key_new
+                heapq.heappush(self.open_set, (key_new, cell))
+            elif self.g.get(cell, INFINITY) > self.rhs.get(cell, INFINITY):
+                self.g[cell] = self.rhs[cell]
+                for neighbour in self._neighbours(cell):
+                    self._update_vertex(neighbour)
+            else:
+                self.g[cell] = INFINITY
+                self._update_vertex(cell)
+                for neighbour in self._neighbours(cell):
+                    self._update_vertex(neighbour)
+        return True, used
+
+    def _extract_path(self):
+        max_cells = self.max_cells
+        if self.start is None or self.rhs.get(self.start, INFINITY) == INFINITY:
+            return []
+        path = [self.start]
+        current = self.start
+        visited = {current}
+        while current != self.goal and (max_cells is None or len(path) <= max_cells):
+            best = None
+            best_cost = INFINITY
+            for neighbour in self._neighbours(current):
+                cost = self.g.get(neighbour, INFINITY) + 1
+                if cost < best_cost:
+                    best, best_cost = neighbour, cost
+            if best is None or best in visited:
+                break
+            path.append(best)
+            visited.add(best)
+            current = best
+        return path
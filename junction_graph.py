@@ -0,0 +1,199 @@
+import heapq
+
+class JunctionGraph:
+    """Maze compiled into junctions/dead ends (nodes) joined by corridors (edges)"""
+    def __init__(self, maze, maze_width, maze_height):
+        self.maze = maze
+        self.maze_width = maze_width
+        self.maze_height = maze_height
+
+        self.nodes = []  # node id -> (x, y)
+        self.node_ids = {}  # (x, y) -> node id
+        self.edges = []  # edge id -> (node_a, node_b, interior cells from a to b)
+        self.adjacency = []  # node id -> [(neighbour node, length, edge id, forward)]
+        self.corridor_cells = {}  # (x, y) -> (edge id, index into interior cells)
+
+        self._compile()
+
+    def _open_neighbours(self, x, y):
+        neighbours = []
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            next_x, next_y = x + dx, y + dy
+            if (0 <= next_x < self.maze_width and 0 <= next_y < self.maze_height and
+                    not self.maze[next_y][next_x]):
+                neighbours.append((next_x, next_y))
+        return neighbours
+
+    def _add_node(self, cell):
+        self.node_ids[cell] = len(self.nodes)
+        self.nodes.append(cell)
+        self.adjacency.append([])
+
+    def _compile(self):
+        corridor = set()
+        for y in range(self.maze_height):
+            for x in range(self.maze_width):
+                if not self.maze[y][x]:
+                    if len(self._open_neighbours(x, y)) == 2:
+                        corridor.add((x, y))
+                    else:
+                        self._add_node((x, y))
+
+        traced = set()
+        for node in range(len(self.nodes)):
+            self._trace_from(node, traced)
+
+        # Closed loops made only of corridor cells still need an anchor node
+        for cell in sorted(corridor):
+            if cell not in self.corridor_cells and cell not in self.node_ids:
+                self._add_node(cell)
+                self._trace_from(self.node_ids[cell], traced)
+
+    def _trace_from(self, node, traced):
+        start = self.nodes[node]
+        for first in self._open_neighbours(*start):
+            if (start, first) in traced:
+                continue
+            previous, current = start, first
+            cells = []
+            while current not in self.node_ids:
+                cells.append(current)
+                next_cells = [c for c in self._open_neighbours(*current) if c != previous]
+                previous, current = current, next_cells[0]
+
+            end = self.node_ids[current]
+            edge_id = len(self.edges)
+            self.edges.append((node, end, cells))
+            for index, cell in enumerate(cells):
+                self.corridor_cells[cell] = (edge_id, index)
+            traced.add((start, first))
+            traced.add((current, previous))
+
+            length = len(cells) + 1
+            self.adjacency[node].append((end, length, edge_id, True))
+            if end != node or cells:
+                self.adjacency[end].append((node, length, edge_id, False))
+
+    def _links(self, cell):
+        """Nodes reachable from a cell without passing another node: [(node, distance, edge id, index, via_a)]"""
+        if cell in self.node_ids:
+            return [(self.node_ids[cell], 0, None, None, None)]
+        edge_id, index = self.corridor_cells[cell]
+        node_a, node_b, cells = self.edges[edge_id]
+        return [(node_a, index + 1, edge_id, index, True), (node_b, len(cells) - index, edge_id, index, False)]
+
+    def _corridor_cells(self, edge_id, forward):
+        node_a, node_b, cells = self.edges[edge_id]
+        if forward:
+            return cells + [self.nodes[node_b]]
+        return cells[::-1] + [self.nodes[node_a]]
+
+    def search(self, start_grid, target_grid):
+        """A* over junctions; returns (distance, legs) where legs expand lazily into cells"""
+        if start_grid not in self.node_ids and start_grid not in self.corridor_cells:
+            return None
+        if target_grid not in self.node_ids and target_grid not in self.corridor_cells:
+            return None
+        if start_grid == target_grid:
+            return 0, []
+
+        best = None
+        start_links = self._links(start_grid)
+        target_links = {}
+        for node, distance, edge_id, index, via_a in self._links(target_grid):
+            if node not in target_links or distance < target_links[node][0]:
+                target_links[node] = (distance, edge_id, index, via_a)
+
+        # Both cells on the same corridor can be joined directly
+        if start_grid in self.corridor_cells and target_grid in self.corridor_cells:
+            start_edge, start_index = self.corridor_cells[start_grid]
+            target_edge, target_index = self.corridor_cells[target_grid]
+            if start_edge == target_edge:
+                best = (abs(start_index - target_index), [('direct', start_edge, start_index, target_index)])
+
+        target_node = self.node_ids.get(target_grid)
+        open_set = []
+        g_score = {}
+        came_from = {}
+        for node, distance, edge_id, index, via_a in start_links:
+            if distance < g_score.get(node, float('inf')):
+                g_score[node] = distance
+                came_from[node] = ('start', edge_id, index, via_a)
+                heapq.heappush(open_set, (distance + self.heuristic(self.nodes[node], target_grid), distance, node))
+
+        while open_set:
+            f_score, current_g, current = heapq.heappop(open_set)
+            if current_g > g_score.get(current, float('inf')):
+                continue
+            if best is not None and f_score >= best[0]:
+                break
+
+            if current in target_links:
+                distance, edge_id, index, via_a = target_links[current]
+                total = current_g + distance
+                if best is None or total < best[0]:
+                    legs = [] if target_node is not None else [('exit', edge_id, index, via_a)]
+                    node = current
+                    while True:
+                        step = came_from[node]
+                        if step[0] == 'start':
+                            if step[1] is not None:
+                                legs.append(('enter', step[1], step[2], step[3]))
+                            break
+                        previous, edge, forward = step
+                        legs.append(('edge', edge, forward))
+                        node = previous
+                    legs.reverse()
+                    best = (total, legs)
+
+            for neighbour, length, edge_id, forward in self.adjacency[current]:
+                tentative_g_score = current_g + length
+                if tentative_g_score < g_score.get(neighbour, float('inf')):
+                    g_score[neighbour] = tentative_g_score
+                    came_from[neighbour] = (current, edge_id, forward)
+                    heapq.heappush(open_set, (tentative_g_score + self.heuristic(self.nodes[neighbour], target_grid),
+                                              tentative_g_score, neighbour))
+
+        return best
+
+    def expand_legs(self, legs, max_cells=None):
+        """Map search legs back to cells, stopping after max_cells cells"""
+        path = []
+        for leg in legs:
+            kind = leg[0]
+            if kind == 'direct':
+                _, edge_id, start_index, target_index = leg
+                cells = self.edges[edge_id][2]
+                step = 1 if target_index > start_index else -1
+                path.extend(cells[index] for index in range(start_index + step, target_index + step, step))
+            elif kind == 'enter':
+                _, edge_id, index, via_a = leg
+                node_a, node_b, cells = self.edges[edge_id]
+                if via_a:
+                    path.extend(cells[:index][::-1] + [self.nodes[node_a]])
+                else:
+                    path.extend(cells[index + 1:] + [self.nodes[node_b]])
+            elif kind == 'edge':
+                _, edge_id, forward = leg
+                path.extend(self._corridor_cells(edge_id, forward))
+            else:
+                _, edge_id, index, via_a = leg
+                cells = self.edges[edge_id][2]
+                if via_a:
+                    path.extend(cells[:index + 1])
+                else:
+                    path.extend(cells[index:][::-1])
+            if max_cells is not None and len(path) >= max_cells:
+                return path[:max_cells]
+        return path
+
+    def find_path(self, start_grid, target_grid, max_cells=None):
+        """Cell path from start to target (start included), expanded only up to max_cells moves"""
+        result = self.search(start_grid, target_grid)
+        if result is None:
+            return []
+        return [start_grid] + self.expand_legs(result[1], max_cells)
+
+    def heuristic(self, a, b):
+        """Manhattan distance heuristic"""
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
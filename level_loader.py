@@ -0,0 +1,254 @@
+import argparse
+import glob
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from maze_generator import MazeGenerator, OpenCellIndex, Pathfinder
+from maze_validation import validate_maze
+
+# Text levels: one character per cell; short lines are padded with walls
+WALL_CHARS = b"#X"
+OPEN_CHARS = b" ."
+START_CHAR = b"S"
+GOAL_CHAR = b"G"
+TEXT_SUFFIXES = (".txt", ".maze")
+IMAGE_SUFFIXES = (".png", ".bmp", ".gif", ".tga")
+
+# Cell codes shared by both formats
+WALL = 0
+OPEN = 1
+START = 2
+GOAL = 3
+UNKNOWN = 255
+
+CHAR_CODES = np.full(256, UNKNOWN, dtype=np.uint8)
+CHAR_CODES[np.frombuffer(WALL_CHARS, dtype=np.uint8)] = WALL
+CHAR_CODES[np.frombuffer(OPEN_CHARS, dtype=np.uint8)] = OPEN
+CHAR_CODES[ord(START_CHAR)] = START
+CHAR_CODES[ord(GOAL_CHAR)] = GOAL
+
+# A hand-made level must pass these; winding is up to the designer
+REQUIRED_CHECKS = ("border", "start_goal_open", "reachable", "connected")
+
+INDEX_DTYPE = np.dtype([
+    ("name", "S96"), ("width", "<u4"), ("height", "<u4"),
+    ("start_x", "<i4"), ("start_y", "<i4"), ("goal_x", "<i4"), ("goal_y", "<i4"),
+    ("grid_offset", "<u8"),  # bytes into grids.bin (bit-packed walls)
+    ("cell_offset", "<u8"),  # int32 entries into nearest.bin (width * height of them)
+    ("open_offset", "<u8"), ("open_count", "<u4"),  # int32 entries into open.bin: all x, then all y
+    ("path_offset", "<u8"), ("path_length", "<u4"),  # int32 (x, y) pairs into paths.bin
+])
+CACHE_FILES = ("grids.bin", "nearest.bin", "open.bin", "paths.bin")
+
+def _markers(codes, source):
+    """Walls plus the single start and goal cell marked in a code grid"""
+    if (codes == UNKNOWN).any():
+        y, x = np.argwhere(codes == UNKNOWN)[0]
+        raise ValueError(f"{source}: unrecognised cell at ({x}, {y})")
+    found = []
+    for code, label in ((START, "start"), (GOAL, "goal")):
+        cells = np.argwhere(codes == code)
+        if len(cells) != 1:
+            raise ValueError(f"{source}: expected one {label} marker, found {len(cells)}")
+        found.append((int(cells[0][1]), int(cells[0][0])))
+    return codes == WALL, found[0], found[1]
+
+def parse_text(data, source="<text>"):
+    """(walls, start, goal) from a text level given as bytes or str, in one vectorised pass"""
+    if isinstance(data, str):
+        data = data.encode()
+    lines = data.replace(b"\r", b"").rstrip(b"\n").split(b"\n")
+    width = max(len(line) for line in lines)
+    raw = np.frombuffer(b"".join(line.ljust(width, WALL_CHARS[:1]) for line in lines), dtype=np.uint8)
+    return _markers(CHAR_CODES[raw].reshape(len(lines), width), source)
+
+def classify_pixels(pixels, cell_pixels=1):
+    """Cell codes from an (height, width, 3) RGB array in the generator's colours.
+
+    Dark pixels are walls, strongly green ones the start, strongly red ones
+    the goal, and everything else is open. With cell_pixels above 1 each
+    cell is read from the centre pixel of its block.
+    """
+    if cell_pixels > 1:
+        pixels = pixels[cell_pixels // 2::cell_pixels, cell_pixels // 2::cell_pixels]
+    r, g, b = (pixels[..., channel].astype(np.int16) for channel in range(3))
+    codes = np.full(r.shape, OPEN, dtype=np.uint8)
+    codes[r + g + b < 384] = WALL
+    codes[(g >= 160) & (r < 100) & (b < 100)] = START
+    codes[(r >= 160) & (g < 100) & (b < 100)] = GOAL
+    return codes
+
+def parse_image(path, cell_pixels=1):
+    """(walls, start, goal) from a level image, read through pygame.surfarray"""
+    import pygame
+    pixels = pygame.surfarray.array3d(pygame.image.load(path)).transpose(1, 0, 2)
+    return _markers(classify_pixels(pixels, cell_pixels), path)
+
+def format_text(walls, start, goal):
+    """A maze as a text level; parse_text reads it back"""
+    chars = np.where(np.asarray(walls, dtype=bool), ord(WALL_CHARS[:1]), ord(OPEN_CHARS[:1])).astype(np.uint8)
+    chars[start[1], start[0]] = ord(START_CHAR)
+    chars[goal[1], goal[0]] = ord(GOAL_CHAR)
+    return b"\n".join(row.tobytes() for row in chars) + b"\n"
+
+def check_level(walls, start, goal, source="<level>"):
+    """Validate a parsed level and raise ValueError naming every required check it fails"""
+    result = validate_maze(walls, start, goal)
+    failed = [check for check in REQUIRED_CHECKS if not result[check]]
+    if failed:
+        raise ValueError(f"{source}: failed {', '.join(failed)}")
+    return result
+
+def load_level(path, cell_pixels=1):
+    """Parse and validate one level file by its extension"""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix in IMAGE_SUFFIXES:
+        walls, start, goal = parse_image(path, cell_pixels)
+    else:
+        with open(path, "rb") as level:
+            walls, start, goal = parse_text(level.read(), path)
+    check_level(walls, start, goal, path)
+    return walls, start, goal
+
+def compile_level(path, cell_pixels=1):
+    """Everything the cache stores for one level file, or the reason it was rejected"""
+    try:
+        walls, start, goal = load_level(path, cell_pixels)
+    except (ValueError, OSError) as error:
+        return {"path": path, "error": str(error)}
+    height, width = walls.shape
+    generator = MazeGenerator.from_grid(walls.tolist(), start, goal, cell_size=1)
+    open_cells = generator.open_cells
+    path_cells = Pathfinder(generator).junction_graph.find_path(start, goal)
+    return {
+        "path": path, "start": start, "goal": goal, "width": width, "height": height,
+        "grid": np.packbits(walls.ravel()),
+        "nearest": np.frombuffer(open_cells.nearest, dtype=np.int32),
+        "open": np.concatenate([np.frombuffer(open_cells.cells_x, dtype=np.int32),
+                                np.frombuffer(open_cells.cells_y, dtype=np.int32)]),
+        "solution": np.array(path_cells, dtype=np.int32).ravel(),
+    }
+
+def _compile_job(job):
+    return compile_level(*job)
+
+def level_files(directory):
+    suffixes = TEXT_SUFFIXES + IMAGE_SUFFIXES
+    return sorted(path for path in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+                  if os.path.splitext(path)[1].lower() in suffixes)
+
+def level_name(path, root):
+    """A level's cache name: its path below root without the extension, cut on a character boundary to fit the index"""
+    name = os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, "/")
+    return name.encode()[:INDEX_DTYPE["name"].itemsize].decode(errors="ignore")
+
+def build_cache(paths, cache_dir, cell_pixels=1, workers=None):
+    """Parse, validate and index level files across worker processes into one cache directory.
+
+    Levels are named by their path below the directory the files share, so
+    levels in different subdirectories can share a file name. Returns the
+    list of rejected files with their reasons, including files whose name
+    another level already took.
+    """
+    jobs = [(path, cell_pixels) for path in paths]
+    if platform.system() == "Emscripten" or workers == 1 or len(jobs) < 2:
+        compiled = [_compile_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            compiled = list(executor.map(_compile_job, jobs, chunksize=max(1, min(64, len(jobs) // 32))))
+
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else ""
+    accepted = []
+    names = set()
+    for level in compiled:
+        if "error" in level:
+            continue
+        level["name"] = level_name(os.path.abspath(level["path"]), root)
+        if level["name"] in names:
+            level["error"] = f"{level['path']}: another level is already named {level['name']}"
+            continue
+        names.add(level["name"])
+        accepted.append(level)
+    index = np.zeros(len(accepted), dtype=INDEX_DTYPE)
+    offsets = dict.fromkeys(CACHE_FILES, 0)
+    os.makedirs(cache_dir, exist_ok=True)
+    outputs = {name: open(os.path.join(cache_dir, name), "wb") for name in CACHE_FILES}
+    try:
+        for row, level in zip(index, accepted):
+            row["name"] = level["name"].encode()
+            row["width"], row["height"] = level["width"], level["height"]
+            row["start_x"], row["start_y"] = level["start"]
+            row["goal_x"], row["goal_y"] = level["goal"]
+            row["grid_offset"] = offsets["grids.bin"]
+            row["cell_offset"] = offsets["nearest.bin"]
+            row["open_offset"] = offsets["open.bin"]
+            row["open_count"] = len(level["open"]) // 2
+            row["path_offset"] = offsets["paths.bin"] // 2
+            row["path_length"] = len(level["solution"]) // 2
+            for name, key in zip(CACHE_FILES, ("grid", "nearest", "open", "solution")):
+                outputs[name].write(level[key].tobytes())
+                offsets[name] += level[key].nbytes if name == "grids.bin" else len(level[key])
+    finally:
+        for output in outputs.values():
+            output.close()
+    np.save(os.path.join(cache_dir, "index.npy"), index)
+    return [level for level in compiled if "error" in level]
+
+class LevelCache:
+    """Levels from build_cache, memory-mapped; load() only slices and converts, it never parses or searches"""
+    def __init__(self, cache_dir):
+        self.index = np.load(os.path.join(cache_dir, "index.npy"))
+        self.grids = np.memmap(os.path.join(cache_dir, "grids.bin"), dtype=np.uint8, mode="r")
+        self.nearest = np.memmap(os.path.join(cache_dir, "nearest.bin"), dtype=np.int32, mode="r")
+        self.open = np.memmap(os.path.join(cache_dir, "open.bin"), dtype=np.int32, mode="r")
+        self.paths = np.memmap(os.path.join(cache_dir, "paths.bin"), dtype=np.int32, mode="r")
+        self.ids = {name.decode(): level_id for level_id, name in enumerate(self.index["name"])}
+
+    def __len__(self):
+        return len(self.index)
+
+    def names(self):
+        return list(self.ids)
+
+    def load(self, level, cell_size=20):
+        """(MazeGenerator, solution pixel path) for a level name or number"""
+        row = self.index[self.ids[level] if isinstance(level, str) else level]
+        width, height = int(row["width"]), int(row["height"])
+        cells = width * height
+        grid_offset = int(row["grid_offset"])
+        bits = self.grids[grid_offset:grid_offset + (cells + 7) // 8]
+        maze = np.unpackbits(bits, count=cells).astype(bool).reshape(height, width).tolist()
+
+        cell_offset = int(row["cell_offset"])
+        open_offset = int(row["open_offset"])
+        open_count = int(row["open_count"])
+        open_cells = OpenCellIndex.from_arrays(width, height, self.open[open_offset:open_offset + open_count],
+                                               self.open[open_offset + open_count:open_offset + 2 * open_count],
+                                               self.nearest[cell_offset:cell_offset + cells])
+        generator = MazeGenerator.from_grid(maze, (int(row["start_x"]), int(row["start_y"])),
+                                            (int(row["goal_x"]), int(row["goal_y"])), cell_size, open_cells)
+        path_offset = int(row["path_offset"]) * 2
+        path = self.paths[path_offset:path_offset + 2 * int(row["path_length"])].reshape(-1, 2) * cell_size + cell_size // 2
+        return generator, [tuple(point) for point in path.tolist()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a directory of text or image levels into a level cache")
+    parser.add_argument("source", help="directory of .txt/.maze/.png level files")
+    parser.add_argument("cache", help="cache directory to write")
+    parser.add_argument("--cell-pixels", type=int, default=1, help="image pixels per maze cell")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    paths = level_files(args.source)
+    started = time.perf_counter()
+    rejected = build_cache(paths, args.cache, args.cell_pixels, args.workers)
+    elapsed = time.perf_counter() - started
+    for level in rejected:
+        print(f"skipped {level['error']}")
+    print(f"{len(paths) - len(rejected)} of {len(paths)} levels cached in {args.cache} in {elapsed:.2f} s "
+          f"({len(paths) / max(elapsed, 1e-9):.0f} files/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from array import array
+from collections import OrderedDict
+
+class LineOfSight:
+    """Answers "can cell A see cell B" on a maze grid.
+
+    Horizontal and vertical runs of open cells are labelled once per maze,
+    so two cells in the same straight corridor see each other with a single
+    comparison. Any other pair is traced cell by cell and the answer is
+    kept in an LRU cache, since enemies and the player change cell far less
+    often than they are checked.
+    """
+    def __init__(self, maze, maze_width, maze_height, cache_size=8192):
+        self.maze = maze
+        self.maze_width = maze_width
+        self.maze_height = maze_height
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # Span labels per flat cell index; -1 for walls
+        self.row_span = array('i', [-1]) * (maze_width * maze_height)
+        self.column_span = array('i', [-1]) * (maze_width * maze_height)
+        span = 0
+        for y in range(maze_height):
+            row = maze[y]
+            for x in range(maze_width):
+                if row[x]:
+                    continue
+                if x == 0 or row[x - 1]:
+                    span += 1
+                self.row_span[y * maze_width + x] = span
+        for x in range(maze_width):
+            for y in range(maze_height):
+                if maze[y][x]:
+                    continue
+                if y == 0 or maze[y - 1][x]:
+                    span += 1
+                self.column_span[y * maze_width + x] = span
+
+    def can_see(self, a, b, max_distance=None):
+        """True if the straight line between the centers of cells a and b crosses no wall"""
+        ax, ay = a
+        bx, by = b
+        if not (0 <= ax < self.maze_width and 0 <= ay < self.maze_height and
+                0 <= bx < self.maze_width and 0 <= by < self.maze_height):
+            return False
+        if max_distance is not None and (ax - bx) ** 2 + (ay - by) ** 2 > max_distance * max_distance:
+            return False
+
+        index_a = ay * self.maze_width + ax
+        index_b = by * self.maze_width + bx
+        if ay == by:
+            return self.row_span[index_a] != -1 and self.row_span[index_a] == self.row_span[index_b]
+        if ax == bx:
+            return self.column_span[index_a] != -1 and self.column_span[index_a] == self.column_span[index_b]
+        if self.maze[ay][ax] or self.maze[by][bx]:
+            return False
+
+        key = (index_a, index_b) if index_a < index_b else (index_b, index_a)
+        visible = self.cache.get(key)
+        if visible is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return visible
+
+        self.misses += 1
+        # Trace in a fixed direction so the answer is symmetric
+        if index_a < index_b:
+            visible = self._trace(ax, ay, bx, by)
+        else:
+            visible = self._trace(bx, by, ax, ay)
+        self.cache[key] = visible
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return visible
+
+    def get_stats(self):
+        lookups = max(1, self.hits + self.misses)
+        return {"cached": len(self.cache), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups}
+
+    def _trace(self, x, y, target_x, target_y):
+        # Walk every cell the segment passes through (a supercover line)
+        dx = abs(target_x - x)
+        dy = abs(target_y - y)
+        step_x = 1 if target_x > x else -1
+        step_y = 1 if target_y > y else -1
+        error = dx - dy
+        dx *= 2
+        dy *= 2
+        maze = self.maze
+        while x != target_x or y != target_y:
+            if error > 0:
+                x += step_x
+                error -= dy
+            elif error < 0:
+                y += step_y
+                error += dx
+            else:
+                # Exactly through a corner: sight cannot squeeze past a wall on either side
+                if maze[y][x + step_x] or maze[y + step_y][x]:
+                    return False
+                x += step_x
+                y += step_y
+                error += dx - dy
+            if maze[y][x]:
+                return False
+        return True
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import multiprocessing
+import random
+import time
+import net_protocol as protocol
+from net_client import GameClient
+
+KEY_CHOICES = (protocol.KEY_LEFT, protocol.KEY_RIGHT, protocol.KEY_UP, protocol.KEY_DOWN, 0)
+
+async def drive_clients(host, port, rooms, players, level, seconds, input_period=0.25):
+    """Join players to each room and press random keys until time runs out"""
+    clients = []
+    for room in range(rooms):
+        for _ in range(players):
+            client = GameClient()
+            await client.connect(host, port, room=f"room-{room}", level=level)
+            clients.append(client)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    while loop.time() < deadline:
+        for client in clients:
+            client.send_keys(random.choice(KEY_CHOICES))
+        await asyncio.sleep(input_period)
+    for client in clients:
+        await client.close()
+
+def run_clients(host, port, rooms, players, level, seconds):
+    """Client side of the load test; runs in its own process so decoding does not count against the server"""
+    asyncio.run(drive_clients(host, port, rooms, players, level, seconds))
+
+async def run_load_test(rooms, players, level, seconds, warmup):
+    import server as game_server
+    import main
+    main.headless = True
+    server = game_server.GameServer()
+    port = await server.start("127.0.0.1", 0)
+    ticker = asyncio.create_task(server.run())
+    clients = multiprocessing.Process(target=run_clients,
+                                      args=("127.0.0.1", port, rooms, players, level, warmup + seconds + 1))
+    clients.start()
+    loop = asyncio.get_running_loop()
+    joined_by = loop.time() + 60
+    while sum(len(room.players) for room in server.rooms.values()) < rooms * players and loop.time() < joined_by:
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(warmup)
+
+    server.reset_stats()
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    cpu_share = (time.process_time() - cpu_started) / (time.perf_counter() - wall_started)
+    stats = server.get_stats()
+
+    server.running = False
+    await ticker
+    await asyncio.get_running_loop().run_in_executor(None, clients.join)
+    await server.stop()
+    stats["cpu_share"] = cpu_share
+    stats["rooms_per_core"] = (1000 / server.tick_rate) / stats["room_tick_ms"] if stats["room_tick_ms"] else 0.0
+    stats["kbit_per_client"] = (stats["bytes_per_snapshot"] * server.tick_rate / server.snapshot_every * 8 / 1000)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the multiplayer server with loopback clients")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--players", type=int, default=4, help="clients per room")
+    parser.add_argument("--difficulty", type=int, default=2, choices=[1, 2, 3])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=4, help="seconds before measuring, so enemies have spawned")
+    args = parser.parse_args()
+
+    print(f"{'rooms':>5} {'players':>7} {'tick ms':>8} {'p99 ms':>7} {'room ms':>8} {'jitter':>7} {'p99':>6} "
+          f"{'max':>6} {'skipped':>7} {'cpu':>5} {'kbit/s':>7} {'rooms/core':>10}")
+    for rooms in args.rooms:
+        stats = asyncio.run(run_load_test(rooms, args.players, args.difficulty, args.seconds, args.warmup))
+        print(f"{stats['rooms']:5d} {stats['players']:7d} {stats['tick_mean_ms']:8.2f} {stats['tick_p99_ms']:7.2f} "
+              f"{stats['room_tick_ms']:8.3f} {stats['jitter_mean_ms']:7.2f} {stats['jitter_p99_ms']:6.2f} "
+              f"{stats['jitter_max_ms']:6.2f} {stats['skipped_ticks']:7d} {stats['cpu_share']:5.0%} "
+              f"{stats['kbit_per_client']:7.1f} {stats['rooms_per_core']:10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,36 @@
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import pygame
 import random
 import math
 import asyncio
+import os
 import platform
-import time
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from maze_generator import MazeGenerator, Pathfinder
+from incremental_planner import IncrementalPlanner
+from pathfinding_service import PathfindingService
+from path_scheduler import PathScheduler
+from camera import Camera, ChunkedMazeRenderer, PathRevealLayer, StreamingMazeRenderer
+from allocation_profiler import AllocationProfiler
+from maze_analytics import analyze_generator, meets_target
+from line_of_sight import LineOfSight
+from quality_governor import QualityGovernor
+from telemetry import Telemetry, RESULT_WON, RESULT_LOST, RESULT_QUIT
+from shared_state import SharedStatePublisher, game_entities
+from rewind import SnapshotRing
+from level_loader import LevelCache
+from streaming_world import StreamingWorld
 
-# Khởi tạo Pygame
-pygame.init()
 WIDTH, HEIGHT = 800, 800  # Fixed square dimensions
 UI_HEIGHT = 80  # Height reserved for UI elements
 MAZE_START_Y = UI_HEIGHT
 MAZE_HEIGHT = HEIGHT - UI_HEIGHT
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Maze Runner - Escape Game")
+screen = None
+clock = None
 
 # Màu sắc
 WHITE = (255, 255, 255)
@@ -43,6 +60,7 @@ PLAYING = 2
 GAME_OVER = 3
 GAME_WON = 4
 DEATH_ANIMATION = 5
+ENDLESS = 6
 
 # Cell sizes based on difficulty
 CELL_SIZES = {
@@ -51,17 +69,56 @@ CELL_SIZES = {
     3: 10   # Hard
 }
 
+# Maze quality targets as {metric: (minimum, maximum)}; see maze_analytics.analyze_maze
+MAZE_QUALITY_TARGETS = {
+    1: {"solution_ratio": (None, 2.6)},  # Skip the most winding mazes on Easy
+    2: {"solution_ratio": (1.6, 2.8)},
+    3: {"solution_ratio": (1.9, None)}  # Hard mazes wind at least 1.9x the straight distance
+}
+MAZE_QUALITY_ATTEMPTS = 4  # Candidates tried when pre-warming before settling for the last one
+
 # Game parameters
 PLAYER_SPEED = 3
 TRAIL_MAX_LENGTH = 50
+PATH_LOOKAHEAD_CELLS = 16  # Cells of a corridor-graph path expanded per refresh
+PATH_EXPANSION_BUDGET = 400  # Search nodes expanded per frame across all enemies
+TRACKING_REFRESH_PERIOD = 4  # Ticks between staggered tracking replans
+GOAL_REFRESH_PERIOD = 45  # Ticks between staggered goal path refreshes
+TRACKING_MEMORY = 180  # Ticks an enemy keeps hunting after losing sight of the player
+HUNT_INTERVAL = 360  # Ticks between hunts an enemy starts without seeing the player
+HUNT_DURATION = 360  # Out-of-sight ticks such a hunt lasts
+MAZE_WORLD_SCALE = 1  # Maze size as a multiple of the view; above 1 the camera scrolls
+ALLOCATION_REPORT_FRAMES = 300  # Frames per report with --profile-alloc
+FRAME_BUDGET_MS = 14  # Work per frame (update + draw) the quality governor holds to at 60 FPS
+REWIND_SECONDS = 5  # How far back Backspace rewinds play
+REWIND_CHARGES = 1  # Rewinds per run; unlimited with --debug-rewind (F9)
+REWIND_BUFFER_TICKS = (REWIND_SECONDS + 1) * 60
+ENDLESS_CHUNK_CELLS = 16  # Cells per side of an endless-mode chunk
+ENDLESS_CHASER_SPEED = 0.75  # Endless chasers move at this fraction of an enemy's tracking speed
+ENDLESS_SPAWN_INTERVAL = 300  # Ticks between endless chasers joining the chase
+ENDLESS_REPLAN_PERIOD = 30  # Ticks between an endless chaser's path refreshes
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1))
 
 # Difficulty settings
+# Enemies within ai_near_distance pixels of the player and on screen decide every tick;
+# the rest decide every ai_far_decision_period ticks and only move in between.
+# Enemies spot the player within sight_range cells when no wall is in the way.
 DIFFICULTY_SETTINGS = {
-    1: {"enemies": 1, "name": "Easy", "enemy_speed_multiplier": 1.15},
-    2: {"enemies": 2, "name": "Medium", "enemy_speed_multiplier": 1.20},
-    3: {"enemies": 3, "name": "Hard", "enemy_speed_multiplier": 1.25}
+    1: {"enemies": 1, "name": "Easy", "enemy_speed_multiplier": 1.15, "ai_near_distance": 200, "ai_far_decision_period": 12, "sight_range": 8},
+    2: {"enemies": 2, "name": "Medium", "enemy_speed_multiplier": 1.20, "ai_near_distance": 250, "ai_far_decision_period": 8, "sight_range": 12},
+    3: {"enemies": 3, "name": "Hard", "enemy_speed_multiplier": 1.25, "ai_near_distance": 300, "ai_far_decision_period": 6, "sight_range": 16}
 }
 
+# Quality levels the governor steps through when frames run over budget, best first.
+# ai_period_scale stretches decision periods and shrinks the full-rate radius of enemy AI.
+QUALITY_LEVELS = (
+    {"name": "full", "trail_length": TRAIL_MAX_LENGTH, "alpha_trail": True, "death_animation": "full", "hud_period": 1, "ai_period_scale": 1},
+    {"name": "short trail", "trail_length": TRAIL_MAX_LENGTH // 2, "alpha_trail": True, "death_animation": "full", "hud_period": 1, "ai_period_scale": 1},
+    {"name": "flat trail", "trail_length": TRAIL_MAX_LENGTH // 2, "alpha_trail": False, "death_animation": "full", "hud_period": 6, "ai_period_scale": 1},
+    {"name": "simple effects", "trail_length": TRAIL_MAX_LENGTH // 4, "alpha_trail": False, "death_animation": "simple", "hud_period": 15, "ai_period_scale": 1},
+    {"name": "minimum", "trail_length": TRAIL_MAX_LENGTH // 8, "alpha_trail": False, "death_animation": "simple", "hud_period": 30, "ai_period_scale": 2}
+)
+
 # Game state
 game_state = MENU
 difficulty = 1
@@ -75,25 +132,198 @@ animation_wait_timer = 0
 start_time = 0
 end_time = 0
 distance_traveled = 0
+frame_tick = 0
+
+# Enemy AI decisions, counted for the per-second HUD rate
+ai_decisions = 0
+ai_decision_rate = 0
+
+# Maze objects are created by reset_game once a difficulty is chosen
+maze_generator = None
+maze_renderer = None
+camera = None
+pathfinder = None
+line_of_sight = None
+path_service = None
+path_scheduler = None
+solution_path = []
+
+# Next maze being built in the background while a menu is showing: (level, future)
+maze_prewarm = None
+prewarm_executor = None
+
+# Set by headless simulation runs: no background pre-warming and pathfinding solved inline,
+# so a seed always plays out the same way
+headless = False
+
+# Active quality level; see QUALITY_LEVELS
+quality = QUALITY_LEVELS[0]
+quality_governor = None
+
+# Run telemetry written by a background thread; off for headless runs and with --no-telemetry
+telemetry = None
 
-# Khởi tạo maze generator với cell_size mặc định
-maze_generator = MazeGenerator(WIDTH, MAZE_HEIGHT, cell_size=20)
-maze_generator.generate_maze()
-maze_surface = maze_generator.create_surface()
-pathfinder = Pathfinder(maze_generator)
-solution_path = pathfinder.get_solution_path()
+# Set by --share-state; publishes the maze and entity positions to other processes through shared memory
+state_publisher = None
 
-if not solution_path or len(solution_path) < 2:
-    print("Warning: No initial solution path found, creating fallback path")
-    start_x, start_y = maze_generator.get_start_position()
-    goal_x = maze_generator.goal_pos[0] * maze_generator.cell_size + maze_generator.cell_size // 2
-    goal_y = maze_generator.goal_pos[1] * maze_generator.cell_size + maze_generator.cell_size // 2
-    solution_path = [(start_x, start_y), (goal_x, goal_y)]
+# Set by --levels: games play levels from a level_loader cache instead of generated mazes,
+# the one named by --level or a random one per game
+level_cache = None
+level_name = None
+
+# Last REWIND_BUFFER_TICKS ticks of the run, every enemy it started with, and rewinds left
+snapshot_ring = None
+enemy_roster = []
+
+# Endless mode: the streaming world replaces the maze and chasers replace the enemies
+endless_world = None
+endless_renderer = None
+endless_mode = False  # The last run started was endless, so restarting starts another
+chasers = []
+rewind_charges = 0
+debug_rewind = False
+
+# Startup timings in milliseconds since the start of the import
+startup_timings = {}
+
+# Set by --profile-alloc; reports allocations and GC pauses of the PLAYING tick
+allocation_profiler = None
+
+# Objects reused every frame instead of being rebuilt
+overlay = None
+trail_colors = {}
+hud_labels = {}
+death_banner = None
+path_layer = None  # Solution path layer for the current maze; see get_path_layer
+
+def init_display():
+    """Create the window; the only work needed before the first menu frame"""
+    global screen, clock
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Maze Runner - Escape Game")
+    clock = pygame.time.Clock()
+    hud_labels.clear()
+    startup_timings["display"] = (time.perf_counter() - IMPORT_STARTED) * 1000
+    return screen
+
+def get_overlay():
+    """Clear and return the shared full-window alpha surface used for trails"""
+    global overlay
+    if overlay is None:
+        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 0))
+    return overlay
+
+class HudLabel:
+    """HUD text on a translucent background, re-rendered only when its value changes"""
+    def __init__(self, template, color, bg_color, x, y, font_size=24):
+        self.template = template
+        self.color = color
+        self.bg_color = bg_color
+        self.text_pos = (x, y)
+        self.bg_pos = (x - 4, y - 1)
+        self.font = pygame.font.Font(None, font_size)
+        self.value = self
+        self.text_surface = None
+        self.bg_surface = None
+
+    def draw(self, value=None, refresh=True):
+        # Without refresh the last rendered text stays up even if the value moved on
+        if value != self.value and (refresh or self.text_surface is None):
+            self.value = value
+            self.text_surface = self.font.render(self.template.format(value), True, self.color)
+            self.bg_surface = pygame.Surface((self.text_surface.get_width() + 8, self.text_surface.get_height() + 2))
+            self.bg_surface.fill(self.bg_color)
+            self.bg_surface.set_alpha(180)
+        screen.blit(self.bg_surface, self.bg_pos)
+        screen.blit(self.text_surface, self.text_pos)
+
+def get_path_layer():
+    """The current maze's solution path layer in the death animation's style, built on first use"""
+    global path_layer
+    style = "flat" if quality["death_animation"] == "simple" else "fade"
+    if path_layer is None or path_layer.path is not solution_path or path_layer.style != style:
+        revealed = path_layer.revealed if path_layer is not None and path_layer.path is solution_path else 0
+        if style == "flat":
+            path_layer = PathRevealLayer(solution_path, maze_generator.width, maze_generator.height, MODERN_GREEN,
+                                         style, width=4)
+        else:
+            path_layer = PathRevealLayer(solution_path, maze_generator.width, maze_generator.height, (0, 255, 0))
+        path_layer.reveal(revealed)
+    return path_layer
 
-solution_path = [(x, y + MAZE_START_Y) for x, y in solution_path]
+def draw_death_banner():
+    global death_banner
+    if death_banner is None:
+        text = pygame.font.Font(None, 48).render("Following the solution path...", True, BLACK)
+        background = pygame.Surface((text.get_width() + 20, text.get_height() + 10))
+        background.fill(WHITE)
+        background.set_alpha(200)
+        death_banner = (background, text)
+    background, text = death_banner
+    screen.blit(background, (WIDTH//2 - text.get_width()//2 - 10, 50))
+    screen.blit(text, (WIDTH//2 - text.get_width()//2, 55))
+
+def get_hud_labels():
+    if not hud_labels:
+        hud_labels["time"] = HudLabel("Time: {:.1f}s", YELLOW, BLACK, 10, 10)
+        hud_labels["distance"] = HudLabel("Distance: {:.0f}", CYAN, BLACK, 150, 10)
+        hud_labels["enemies"] = HudLabel("Enemies: {}", ORANGE, BLACK, 320, 10)
+        hud_labels["decisions"] = HudLabel("AI: {} decisions/s", LIGHT_GRAY, BLACK, 450, 10)
+        hud_labels["legend"] = HudLabel("Purple: Trail | Green: Solution | Orange: Hunting | Red: Goal-seeking",
+                                        WHITE, DARK_GRAY, 10, 35)
+        hud_labels["menu"] = HudLabel("ESC: Menu", LIGHT_GRAY, BLACK, 580, 35)
+    return hud_labels
+
+def build_maze(level, attempts=1, rng=random):
+    """Generate a maze for a difficulty level together with its solution path.
+
+    With several attempts, candidates are rejected until one meets the
+    level's quality target. Maze seeds are drawn from rng.
+    """
+    for attempt in range(attempts):
+        seed = rng.getrandbits(32)
+        generator = MazeGenerator(WIDTH * MAZE_WORLD_SCALE, MAZE_HEIGHT * MAZE_WORLD_SCALE, cell_size=CELL_SIZES[level],
+                                  rng=random.Random(seed))
+        generator.seed = seed
+        generator.generate_maze()
+        if attempts == 1 or meets_target(analyze_generator(generator), MAZE_QUALITY_TARGETS[level]):
+            break
+    # Compiled with the maze, off the frame loop when pre-warmed; long enemy goal paths refine it
+    generator.hierarchical
+    return generator, Pathfinder(generator).get_solution_path()
+
+def prewarm_maze(level):
+    """Start building the next maze off the frame loop so starting a game is instant"""
+    global maze_prewarm, prewarm_executor
+    if platform.system() == "Emscripten" or headless or level_cache is not None:
+        return
+    if maze_prewarm is not None:
+        if maze_prewarm[0] == level:
+            return
+        maze_prewarm[1].cancel()
+    if prewarm_executor is None:
+        prewarm_executor = ThreadPoolExecutor(max_workers=1)
+    maze_prewarm = (level, prewarm_executor.submit(build_maze, level, MAZE_QUALITY_ATTEMPTS))
+
+def take_maze(level):
+    """Use the pre-warmed maze if it matches the level, otherwise build one now"""
+    global maze_prewarm
+    if level_cache is not None:
+        return level_cache.load(level_name if level_name is not None else random.randrange(len(level_cache)),
+                                CELL_SIZES[level])
+    prewarmed, maze_prewarm = maze_prewarm, None
+    if prewarmed is not None:
+        if prewarmed[0] == level:
+            return prewarmed[1].result()
+        prewarmed[1].cancel()
+    return build_maze(level)
 
 # Hàm kiểm tra va chạm
 def check_collision(x, y):
+    if endless_world is not None:
+        return "wall" if endless_world.is_wall(int(x // endless_world.cell_size), int(y // endless_world.cell_size)) else None
     if x < 0 or y < 0:
         return "wall"
     
@@ -117,13 +347,20 @@ def check_goal_collision(player_rect):
 
 # Lớp người chơi
 class Player:
-    def __init__(self, cell_size):
+    def __init__(self, cell_size, start=None):
         self.size = int(cell_size * 0.8)
-        start_x, start_y = maze_generator.get_start_position()
+        start_x, start_y = start if start is not None else maze_generator.get_start_position()
         self.x = start_x
-        self.y = start_y + MAZE_START_Y
+        self.y = start_y
         self.rect = pygame.Rect(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
-        self.trail = []
+        if start is not None:
+            # An explicit start is an endless run, which has no goal to reach
+            self.goal_rect = pygame.Rect(0, 0, 0, 0)
+        else:
+            self.goal_rect = pygame.Rect(maze_generator.goal_pos[0] * maze_generator.cell_size,
+                                         maze_generator.goal_pos[1] * maze_generator.cell_size,
+                                         maze_generator.cell_size, maze_generator.cell_size)
+        self.trail = deque(maxlen=quality["trail_length"])
         self.last_position = (self.x, self.y)
 
     def move(self, keys):
@@ -134,57 +371,56 @@ class Player:
         
         if keys[pygame.K_a] or keys[pygame.K_LEFT]:
             new_x = self.x - PLAYER_SPEED
-            if not check_collision(new_x, self.y - MAZE_START_Y):
+            if not check_collision(new_x, self.y):
                 self.x = new_x
                 moved = True
             
         if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
             new_x = self.x + PLAYER_SPEED
-            if not check_collision(new_x, self.y - MAZE_START_Y):
+            if not check_collision(new_x, self.y):
                 self.x = new_x
                 moved = True
             
         if keys[pygame.K_w] or keys[pygame.K_UP]:
             new_y = self.y - PLAYER_SPEED
-            if not check_collision(self.x, new_y - MAZE_START_Y):
+            if not check_collision(self.x, new_y):
                 self.y = new_y
                 moved = True
             
         if keys[pygame.K_s] or keys[pygame.K_DOWN]:
             new_y = self.y + PLAYER_SPEED
-            if not check_collision(self.x, new_y - MAZE_START_Y):
+            if not check_collision(self.x, new_y):
                 self.y = new_y
                 moved = True
         
         if moved:
             self.trail.append((old_x, old_y))
-            if len(self.trail) > TRAIL_MAX_LENGTH:
-                self.trail.pop(0)
-            distance_traveled += math.sqrt((self.x - old_x)**2 + (self.y - old_y)**2)
+            distance_traveled += math.hypot(self.x - old_x, self.y - old_y)
             
-        self.rect = pygame.Rect(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
+        self.rect.update(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
         
-        if self.rect.colliderect(pygame.Rect(
-            maze_generator.goal_pos[0] * maze_generator.cell_size,
-            maze_generator.goal_pos[1] * maze_generator.cell_size + MAZE_START_Y,
-            maze_generator.cell_size,
-            maze_generator.cell_size
-        )):
+        if self.rect.colliderect(self.goal_rect):
             collision_result = "goal"
             
         return collision_result
 
     def draw(self):
         self.draw_trail()
-        pygame.draw.rect(screen, BLUE, self.rect)
+        screen_x, screen_y = camera.world_to_screen(self.rect.x, self.rect.y)
+        pygame.draw.rect(screen, BLUE, (screen_x, screen_y, self.rect.width, self.rect.height))
     
     def draw_trail(self):
-        if len(self.trail) > 1:
-            trail_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            for i, (x, y) in enumerate(self.trail):
-                alpha = int(100 * (i + 1) / len(self.trail))
-                color = (*PURPLE[:3], alpha)
-                pygame.draw.circle(trail_surface, color, (int(x), int(y)), 3)
+        if len(self.trail) > 1 and not quality["alpha_trail"]:
+            for x, y in self.trail:
+                pygame.draw.circle(screen, PURPLE[:3], camera.world_to_screen(x, y), 2)
+        elif len(self.trail) > 1:
+            trail_surface = get_overlay()
+            colors = trail_colors.get(len(self.trail))
+            if colors is None:
+                colors = trail_colors[len(self.trail)] = [
+                    (*PURPLE[:3], int(100 * (i + 1) / len(self.trail))) for i in range(len(self.trail))]
+            for color, (x, y) in zip(colors, self.trail):
+                pygame.draw.circle(trail_surface, color, camera.world_to_screen(x, y), 3)
             screen.blit(trail_surface, (0, 0))
 
 # Lớp kẻ thù
@@ -193,7 +429,7 @@ class Enemy:
         self.size = int(cell_size * 0.7)
         start_x, start_y = maze_generator.get_start_position()
         self.x = start_x
-        self.y = start_y + MAZE_START_Y
+        self.y = start_y
         self.rect = pygame.Rect(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
         self.direction_x = random.choice([-1, 1])
         self.direction_y = random.choice([-1, 1])
@@ -204,19 +440,28 @@ class Enemy:
         self.base_speed = PLAYER_SPEED * 0.15
         self.tracking_speed = PLAYER_SPEED * DIFFICULTY_SETTINGS[difficulty_level]["enemy_speed_multiplier"]
         
-        self.ai_timer = 0
+        self.near_distance_sq = DIFFICULTY_SETTINGS[difficulty_level]["ai_near_distance"] ** 2
+        self.far_decision_period = DIFFICULTY_SETTINGS[difficulty_level]["ai_far_decision_period"]
+        self.last_decision_tick = frame_tick
+        self.decision_due = True
+        self.full_rate = True
         self.tracking_timer = 0
         self.is_tracking = False
+        self.index = 0  # Position in the difficulty's enemy list, for telemetry
+        self.removed = False  # Clicked away; a rewind can bring it back
         self.tracking_chance_timer = 0
+        self.sight_range = DIFFICULTY_SETTINGS[difficulty_level]["sight_range"]
         self.spawn_timer = 0
         self.is_spawned = False
         
-        self.visited_positions = []
+        self.visited_positions = deque(maxlen=5)
         self.stuck_counter = 0
         self.last_position = (self.x, self.y)
         self.path_to_player = []
         self.path_to_goal = []
-        self.path_update_timer = 0
+        # D* Lite state survives between replans while tracking
+        self.planner = IncrementalPlanner(maze_generator, max_cells=PATH_LOOKAHEAD_CELLS)
+        self.planned_version = self.planner.path_version
     
     def get_current_speed(self):
         return self.tracking_speed if self.is_tracking else self.base_speed
@@ -228,81 +473,103 @@ class Enemy:
                 self.is_spawned = True
             return
         
-        self.tracking_chance_timer += 1
-        if self.tracking_chance_timer >= 360:
-            self.tracking_chance_timer = 0
-            self.is_tracking = True
-            self.tracking_timer = 360
-            self.path_to_player = []
-            self.path_to_goal = []
-        
-        if self.is_tracking:
+        # Perception runs every tick: seeing the player starts or extends a hunt at once,
+        # and a hunt only counts down while the player is out of sight
+        if self.can_see(player_x, player_y):
+            self.start_tracking(TRACKING_MEMORY)
+        elif self.is_tracking:
             self.tracking_timer -= 1
             if self.tracking_timer <= 0:
-                self.is_tracking = False
-                self.path_to_player = []
-                self.path_to_goal = []
+                self.stop_tracking()
                 self.tracking_chance_timer = 0
-            
-            self.path_update_timer += 1
-            if self.path_update_timer >= 30 or not self.path_to_player:
-                self.path_update_timer = 0
+        else:
+            self.tracking_chance_timer += 1
+            if self.tracking_chance_timer >= HUNT_INTERVAL:
+                self.start_tracking(HUNT_DURATION)
+        
+        if self.needs_decision(player_x, player_y):
+            self.decide(player_x, player_y)
+        else:
+            self.follow_path()
+        self.integrate()
+    
+    def start_tracking(self, duration):
+        self.tracking_timer = max(self.tracking_timer, duration) if self.is_tracking else duration
+        if self.is_tracking:
+            return
+        self.is_tracking = True
+        self.tracking_chance_timer = 0
+        self.path_to_player = []
+        self.path_to_goal = []
+        self.planner.reset()
+        self.planned_version = self.planner.path_version
+        self.decision_due = True
+        if telemetry is not None:
+            telemetry.tracking_changed(frame_tick, self.index, True, self.x, self.y)
+    
+    def stop_tracking(self):
+        self.is_tracking = False
+        self.path_to_player = []
+        self.path_to_goal = []
+        if telemetry is not None:
+            telemetry.tracking_changed(frame_tick, self.index, False, self.x, self.y)
+    
+    def can_see(self, player_x, player_y):
+        cell_size = maze_generator.cell_size
+        return line_of_sight.can_see((int(self.x // cell_size), int(self.y // cell_size)),
+                                     (int(player_x // cell_size), int(player_y // cell_size)), self.sight_range)
+    
+    def needs_decision(self, player_x, player_y):
+        """Level of detail: nearby on-screen enemies decide every tick, distant ones at a reduced rate"""
+        dx = player_x - self.x
+        dy = player_y - self.y
+        scale = quality["ai_period_scale"]
+        self.full_rate = (dx * dx + dy * dy) * scale * scale <= self.near_distance_sq and camera.is_visible(self.x, self.y, self.size)
+        return self.full_rate or self.decision_due or frame_tick - self.last_decision_tick >= self.far_decision_period * scale
+    
+    def decide(self, player_x, player_y):
+        """Choose a heading: replan, follow the current path or scan neighbouring directions"""
+        global ai_decisions
+        ai_decisions += 1
+        since = self.last_decision_tick
+        elapsed = min(frame_tick - since, self.far_decision_period * quality["ai_period_scale"])
+        self.last_decision_tick = frame_tick
+        self.decision_due = False
+        
+        if self.is_tracking:
+            # Staggered replans; the scheduler repairs the search within the frame budget
+            if path_scheduler.is_due(self, frame_tick, TRACKING_REFRESH_PERIOD, since) or not self.path_to_player:
                 current_grid_x = int(self.x // maze_generator.cell_size)
-                current_grid_y = int((self.y - MAZE_START_Y) // maze_generator.cell_size)
+                current_grid_y = int(self.y // maze_generator.cell_size)
                 player_grid_x = int(player_x // maze_generator.cell_size)
-                player_grid_y = int((player_y - MAZE_START_Y) // maze_generator.cell_size)
+                player_grid_y = int(player_y // maze_generator.cell_size)
                 
                 current_grid_x = max(0, min(maze_generator.maze_width - 1, current_grid_x))
                 current_grid_y = max(0, min(maze_generator.maze_height - 1, current_grid_y))
                 player_grid_x = max(0, min(maze_generator.maze_width - 1, player_grid_x))
                 player_grid_y = max(0, min(maze_generator.maze_height - 1, player_grid_y))
                 
-                path_result = pathfinder.find_path(
-                    current_grid_x * maze_generator.cell_size + maze_generator.cell_size // 2,
-                    current_grid_y * maze_generator.cell_size + maze_generator.cell_size // 2,
-                    player_grid_x * maze_generator.cell_size + maze_generator.cell_size // 2,
-                    player_grid_y * maze_generator.cell_size + maze_generator.cell_size // 2
-                )
-                if path_result and len(path_result) > 1:
-                    self.path_to_player = [
-                        (pos[0] * maze_generator.cell_size + maze_generator.cell_size // 2,
-                         pos[1] * maze_generator.cell_size + maze_generator.cell_size // 2 + MAZE_START_Y)
-                        for pos in path_result[1:]
-                    ]
-                else:
-                    self.path_to_player = []
+                if self.planner.set_endpoints((current_grid_x, current_grid_y), (player_grid_x, player_grid_y)):
+                    distance_to_player = math.sqrt((player_x - self.x)**2 + (player_y - self.y)**2)
+                    path_scheduler.request(self, frame_tick, distance_to_player, self.planner.compute)
+            
+            if self.planner.path_version != self.planned_version:
+                self.planned_version = self.planner.path_version
+                self.path_to_player = self._to_pixel_path(self.planner.path)
             
             if self.path_to_player:
-                target_x, target_y = self.path_to_player[0]
-                dx = target_x - self.x
-                dy = target_y - self.y
-                distance = math.sqrt(dx*dx + dy*dy)
-                
-                if distance < 15:
-                    self.path_to_player.pop(0)
-                    if self.path_to_player:
-                        target_x, target_y = self.path_to_player[0]
-                        dx = target_x - self.x
-                        dy = target_y - self.y
-                
-                if distance > 0:
-                    self.direction_x = dx / distance
-                    self.direction_y = dy / distance
-                else:
-                    self.direction_x = 0
-                    self.direction_y = 0
+                self.steer(self.path_to_player)
             else:
                 dx = player_x - self.x
                 dy = player_y - self.y
-                directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)]
                 best_direction = None
                 best_distance = float('inf')
                 
-                for dir_x, dir_y in directions:
+                for dir_x, dir_y in DIRECTIONS:
                     test_x = self.x + dir_x * self.get_current_speed() * 2
                     test_y = self.y + dir_y * self.get_current_speed() * 2
                     
-                    if not check_collision(test_x, test_y - MAZE_START_Y):
+                    if not check_collision(test_x, test_y):
                         dist = math.sqrt((test_x - player_x)**2 + (test_y - player_y)**2)
                         if dist < best_distance:
                             best_distance = dist
@@ -317,55 +584,23 @@ class Enemy:
             goal_x = maze_generator.goal_pos[0] * maze_generator.cell_size + maze_generator.cell_size // 2
             goal_y = maze_generator.goal_pos[1] * maze_generator.cell_size + maze_generator.cell_size // 2
             
-            self.path_update_timer += 1
-            if self.path_update_timer >= 45 or not self.path_to_goal:
-                self.path_update_timer = 0
+            due = path_scheduler.is_due(self, frame_tick, GOAL_REFRESH_PERIOD, since)
+            if (due or not self.path_to_goal) and not path_service.is_pending(self):
                 current_grid_x = int(self.x // maze_generator.cell_size)
-                current_grid_y = int((self.y - MAZE_START_Y) // maze_generator.cell_size)
-                goal_grid_x = maze_generator.goal_pos[0]
-                goal_grid_y = maze_generator.goal_pos[1]
+                current_grid_y = int(self.y // maze_generator.cell_size)
                 
                 current_grid_x = max(0, min(maze_generator.maze_width - 1, current_grid_x))
                 current_grid_y = max(0, min(maze_generator.maze_height - 1, current_grid_y))
                 
-                path_result = pathfinder.find_path(
-                    current_grid_x * maze_generator.cell_size + maze_generator.cell_size // 2,
-                    current_grid_y * maze_generator.cell_size + maze_generator.cell_size // 2,
-                    goal_x,
-                    goal_y
-                )
-                
-                if path_result and len(path_result) > 1:
-                    self.path_to_goal = [
-                        (pos[0] * maze_generator.cell_size + maze_generator.cell_size // 2,
-                         pos[1] * maze_generator.cell_size + maze_generator.cell_size // 2 + MAZE_START_Y)
-                        for pos in path_result[1:]
-                    ]
-                else:
-                    self.path_to_goal = []
+                # Solved off the frame loop; keep following the old path until the result arrives
+                path_service.submit(self, frame_tick, (current_grid_x, current_grid_y),
+                                    maze_generator.goal_pos, max_cells=PATH_LOOKAHEAD_CELLS)
             
             if self.path_to_goal:
-                target_x, target_y = self.path_to_goal[0]
-                dx = target_x - self.x
-                dy = target_y - self.y
-                distance = math.sqrt(dx*dx + dy*dy)
-                
-                if distance < 15:
-                    self.path_to_goal.pop(0)
-                    if self.path_to_goal:
-                        target_x, target_y = self.path_to_goal[0]
-                        dx = target_x - self.x
-                        dy = target_y - self.y
-                
-                if distance > 0:
-                    self.direction_x = dx / distance
-                    self.direction_y = dy / distance
-                else:
-                    self.direction_x = 0
-                    self.direction_y = 0
+                self.steer(self.path_to_goal)
             else:
                 dx = goal_x - self.x
-                dy = (goal_y + MAZE_START_Y) - self.y
+                dy = goal_y - self.y
                 distance = math.sqrt(dx*dx + dy*dy) if dx != 0 or dy != 0 else 1
                 
                 target_dir_x = dx / distance
@@ -374,20 +609,19 @@ class Enemy:
                 test_x = self.x + target_dir_x * self.get_current_speed()
                 test_y = self.y + target_dir_y * self.get_current_speed()
                 
-                if not check_collision(test_x, test_y - MAZE_START_Y):
+                if not check_collision(test_x, test_y):
                     self.direction_x = target_dir_x
                     self.direction_y = target_dir_y
                 else:
-                    directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)]
                     best_direction = None
                     best_distance = float('inf')
                     
-                    for dir_x, dir_y in directions:
+                    for dir_x, dir_y in DIRECTIONS:
                         test_x = self.x + dir_x * self.get_current_speed()
                         test_y = self.y + dir_y * self.get_current_speed()
                         
-                        if not check_collision(test_x, test_y - MAZE_START_Y):
-                            dist_to_goal = math.sqrt((test_x - goal_x)**2 + ((test_y - MAZE_START_Y) - goal_y)**2)
+                        if not check_collision(test_x, test_y):
+                            dist_to_goal = math.sqrt((test_x - goal_x)**2 + (test_y - goal_y)**2)
                             if dist_to_goal < best_distance:
                                 best_distance = dist_to_goal
                                 best_direction = (dir_x, dir_y)
@@ -398,26 +632,75 @@ class Enemy:
                         self.direction_x = random.choice([-0.5, 0, 0.5])
                         self.direction_y = random.choice([-0.5, 0, 0.5])
         
+        goal_x = maze_generator.goal_pos[0] * maze_generator.cell_size
+        goal_y = maze_generator.goal_pos[1] * maze_generator.cell_size
+        distance_to_goal = math.sqrt((self.x - goal_x)**2 + (self.y - goal_y)**2)
+        
+        if distance_to_goal < 60:
+            self.safe_zone_timer += elapsed
+            if self.safe_zone_timer > 120:
+                self.direction_x = 1 if self.x < goal_x else -1
+                self.direction_y = 1 if self.y < goal_y else -1
+                self.safe_zone_timer = 0
+                if self.is_tracking:
+                    self.stop_tracking()
+        else:
+            self.safe_zone_timer = 0
+    
+    def steer(self, path):
+        """Head for the first waypoint of a path, moving on to the next one within 15 pixels"""
+        target_x, target_y = path[0]
+        dx = target_x - self.x
+        dy = target_y - self.y
+        distance = math.sqrt(dx*dx + dy*dy)
+        
+        if distance < 15:
+            path.pop(0)
+            if path:
+                target_x, target_y = path[0]
+                dx = target_x - self.x
+                dy = target_y - self.y
+        
+        if distance > 0:
+            self.direction_x = dx / distance
+            self.direction_y = dy / distance
+        else:
+            self.direction_x = 0
+            self.direction_y = 0
+    
+    def follow_path(self):
+        """Between decisions: turn at waypoints of the current path; its end calls for a decision"""
+        path = self.path_to_player if self.is_tracking else self.path_to_goal
+        if not path:
+            return
+        waypoint_x, waypoint_y = path[0]
+        if (waypoint_x - self.x) ** 2 + (waypoint_y - self.y) ** 2 < 225:
+            self.steer(path)
+            if not path:
+                self.decision_due = True
+    
+    def integrate(self):
+        """Move along the current heading, resolving wall collisions"""
+        check_backtracking = self.last_decision_tick == frame_tick
         current_grid_pos = (int(self.x // maze_generator.cell_size), int(self.y // maze_generator.cell_size))
         if current_grid_pos != self.last_position:
             self.visited_positions.append(current_grid_pos)
-            if len(self.visited_positions) > 10:
-                self.visited_positions.pop(0)
             self.last_position = current_grid_pos
         
         current_speed = self.get_current_speed()
         new_x = self.x + self.direction_x * current_speed
         new_y = self.y + self.direction_y * current_speed
         
-        new_x = max(self.size, min(WIDTH - self.size, new_x))
-        new_y = max(MAZE_START_Y + self.size, min(HEIGHT - self.size, new_y))
+        new_x = max(self.size, min(maze_generator.width - self.size, new_x))
+        new_y = max(self.size, min(maze_generator.height - self.size, new_y))
         
-        can_move_x = not check_collision(new_x, self.y - MAZE_START_Y)
-        can_move_y = not check_collision(self.x, new_y - MAZE_START_Y)
-        can_move_both = not check_collision(new_x, new_y - MAZE_START_Y)
+        can_move_x = not check_collision(new_x, self.y)
+        can_move_y = not check_collision(self.x, new_y)
+        can_move_both = not check_collision(new_x, new_y)
         
         new_grid_pos = (int(new_x // maze_generator.cell_size), int(new_y // maze_generator.cell_size))
-        is_backtracking = new_grid_pos in self.visited_positions[-5:] if not self.is_tracking else False
+        # Backtracking avoidance is part of a decision; in-between ticks only slide along walls
+        is_backtracking = new_grid_pos in self.visited_positions if check_backtracking and not self.is_tracking else False
         
         moved = False
         
@@ -445,97 +728,202 @@ class Enemy:
         if not moved:
             self.stuck_counter += 1
             if self.stuck_counter > 20:
-                self.stuck_counter = 0
-                self.visited_positions = []
-                
-                escape_attempts = [
-                    [(1, 0), (-1, 0), (0, 1), (0, -1)],
-                    [(1, 1), (-1, -1), (1, -1), (-1, 1)],
-                    [(2, 0), (-2, 0), (0, 2), (0, -2)]
-                ]
-                
-                escaped = False
-                for attempt_set in escape_attempts:
-                    if escaped:
-                        break
-                    random.shuffle(attempt_set)
-                    
-                    for dir_x, dir_y in attempt_set:
-                        test_x = self.x + dir_x * self.get_current_speed()
-                        test_y = self.y + dir_y * self.get_current_speed()
-                        test_x = max(self.size, min(WIDTH - self.size, test_x))
-                        test_y = max(MAZE_START_Y + self.size, min(HEIGHT - self.size, test_y))
-                        
-                        if not check_collision(test_x, test_y - MAZE_START_Y):
-                            self.x = test_x
-                            self.y = test_y
-                            self.direction_x = dir_x / abs(dir_x) if dir_x != 0 else 0
-                            self.direction_y = dir_y / abs(dir_y) if dir_y != 0 else 0
-                            escaped = True
-                            break
-                
-                if not escaped:
-                    self._emergency_relocate()
+                self._emergency_relocate()
         else:
             self.stuck_counter = 0
         
-        goal_x = maze_generator.goal_pos[0] * maze_generator.cell_size
-        goal_y = maze_generator.goal_pos[1] * maze_generator.cell_size + MAZE_START_Y
-        distance_to_goal = math.sqrt((self.x - goal_x)**2 + (self.y - goal_y)**2)
+        # Decide early when blocked instead of waiting for the next decision tick
+        if not moved:
+            self.decision_due = True
         
-        if distance_to_goal < 60:
-            self.safe_zone_timer += 1
-            if self.safe_zone_timer > 120:
-                self.direction_x = 1 if self.x < goal_x else -1
-                self.direction_y = 1 if self.y < goal_y else -1
-                self.safe_zone_timer = 0
-                self.is_tracking = False
-                self.path_to_goal = []
-                self.path_to_player = []
-        else:
-            self.safe_zone_timer = 0
-            
-        self.x = max(self.size, min(WIDTH - self.size, self.x))
-        self.y = max(MAZE_START_Y + self.size, min(HEIGHT - self.size, self.y))
+        self.x = max(self.size, min(maze_generator.width - self.size, self.x))
+        self.y = max(self.size, min(maze_generator.height - self.size, self.y))
         
-        self.rect = pygame.Rect(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
+        self.rect.update(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
     
-    def _emergency_relocate(self):
-        for radius in range(40, 100, 20):
-            for _ in range(20):
-                angle = random.random() * 2 * math.pi
-                test_x = self.x + radius * math.cos(angle)
-                test_y = self.y + radius * math.sin(angle)
-                
-                test_x = max(self.size, min(WIDTH - self.size, test_x))
-                test_y = max(MAZE_START_Y + self.size, min(HEIGHT - self.size, test_y))
-                
-                if not check_collision(test_x, test_y - MAZE_START_Y):
-                    self.x = test_x
-                    self.y = test_y
-                    self.visited_positions = []
-                    self.stuck_counter = 0
-                    return
+    def receive_goal_path(self, path_result):
+        if not self.is_tracking:
+            self.path_to_goal = self._to_pixel_path(path_result)
+            self.decision_due = True
+    
+    def _to_pixel_path(self, path_result):
+        # The enemy may have moved since the path was planned, so skip cells already behind it
+        current_grid = (int(self.x // maze_generator.cell_size), int(self.y // maze_generator.cell_size))
+        if current_grid in path_result:
+            path_result = path_result[path_result.index(current_grid):]
         
-        start_x, start_y = maze_generator.get_start_position()
-        self.x = start_x
-        self.y = start_y + MAZE_START_Y
+        if path_result and len(path_result) > 1:
+            return [
+                (pos[0] * maze_generator.cell_size + maze_generator.cell_size // 2,
+                 pos[1] * maze_generator.cell_size + maze_generator.cell_size // 2)
+                for pos in path_result[1:]
+            ]
+        return []
+    
+    def _emergency_relocate(self):
+        # Snap to the center of the nearest open cell and let pathfinding pick a new heading
+        self.x, self.y = maze_generator.get_nearest_open_position(self.x, self.y)
+        self.direction_x = 0
+        self.direction_y = 0
+        self.decision_due = True
+        self.visited_positions.clear()
+        self.stuck_counter = 0
+        self.path_to_player = []
+        self.path_to_goal = []
 
     def draw(self):
-        if self.is_spawned:
+        if self.is_spawned and camera.is_visible(self.x, self.y, self.size):
             color = ORANGE if self.is_tracking else RED
-            pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.size // 2)
+            pygame.draw.circle(screen, color, camera.world_to_screen(self.x, self.y), self.size // 2)
+
+class Chaser:
+    """Endless-mode enemy: follows an A* path through the loaded chunks, refreshed every ENDLESS_REPLAN_PERIOD ticks"""
+    def __init__(self, x, y, cell_size, index):
+        self.size = int(cell_size * 0.7)
+        self.x = x
+        self.y = y
+        self.rect = pygame.Rect(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
+        self.speed = PLAYER_SPEED * DIFFICULTY_SETTINGS[difficulty]["enemy_speed_multiplier"] * ENDLESS_CHASER_SPEED
+        self.index = index
+        self.path = []
+        self.replan_tick = frame_tick + index * 7  # Staggered so chasers do not search on the same tick
+        self.is_spawned = True
+        self.is_tracking = True
+
+    def update(self, target_x, target_y):
+        if frame_tick >= self.replan_tick:
+            self.replan(target_x, target_y)
+        while self.path:
+            waypoint_x, waypoint_y = self.path[0]
+            dx = waypoint_x - self.x
+            dy = waypoint_y - self.y
+            distance = math.hypot(dx, dy)
+            if distance <= self.speed:
+                self.x, self.y = self.path.pop(0)
+                continue
+            self.x += dx / distance * self.speed
+            self.y += dy / distance * self.speed
+            break
+        self.rect.update(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
+
+    def replan(self, target_x, target_y):
+        """Path to the player's cell; a chaser left in an unloaded chunk is brought back to the edge of the loaded area"""
+        self.replan_tick = frame_tick + ENDLESS_REPLAN_PERIOD
+        cell_size = endless_world.cell_size
+        grid = (int(self.x // cell_size), int(self.y // cell_size))
+        target = (int(target_x // cell_size), int(target_y // cell_size))
+        chunk_x, chunk_y = endless_world.chunk_of(*grid)
+        if (chunk_x, chunk_y) not in endless_world.chunks:
+            center_x, center_y = endless_world.chunk_of(*target)
+            radius = endless_world.load_radius
+            chunk_x = center_x + max(-radius, min(radius, chunk_x - center_x))
+            chunk_y = center_y + max(-radius, min(radius, chunk_y - center_y))
+            endless_world.ensure_chunk(chunk_x, chunk_y)
+            # Local cell (1, 1) of every chunk is an open room
+            grid = (chunk_x * endless_world.chunk_cells + 1, chunk_y * endless_world.chunk_cells + 1)
+            self.x = grid[0] * cell_size + cell_size // 2
+            self.y = grid[1] * cell_size + cell_size // 2
+        self.path = [(x * cell_size + cell_size // 2, y * cell_size + cell_size // 2)
+                     for x, y in endless_world.find_path(grid, target)[1:]]
+
+    def draw(self):
+        if camera.is_visible(self.x, self.y, self.size):
+            pygame.draw.circle(screen, ORANGE, camera.world_to_screen(self.x, self.y), self.size // 2)
+
+def close_endless_world():
+    global endless_world, endless_renderer
+    if endless_world is not None:
+        endless_world.shutdown()
+    endless_world = None
+    endless_renderer = None
+
+def reset_endless():
+    """Start an endless run: a fresh streaming world with chasers joining every ENDLESS_SPAWN_INTERVAL ticks"""
+    global player, enemies, chasers, running, game_won, game_lost, camera, endless_world, endless_renderer, endless_mode, start_time, distance_traveled, end_time, frame_tick
+
+    cell_size = CELL_SIZES[difficulty]
+    close_endless_world()
+    chunk_pixels = ENDLESS_CHUNK_CELLS * cell_size
+    # Load far enough out that the view never reaches past the loaded chunks
+    load_radius = max(WIDTH, MAZE_HEIGHT) // 2 // chunk_pixels + 2
+    endless_world = StreamingWorld(random.getrandbits(32), ENDLESS_CHUNK_CELLS, cell_size, load_radius, load_radius + 1,
+                                   background=False if headless else None)
+    endless_renderer = StreamingMazeRenderer(endless_world, BLACK, WHITE, DARK_GRAY)
+    endless_mode = True
+    endless_world.update(1, 1)
+    camera = Camera(0, MAZE_START_Y, WIDTH, MAZE_HEIGHT, None, None)
+    player = Player(cell_size, start=(cell_size + cell_size // 2, cell_size + cell_size // 2))
+    camera.follow(player.x, player.y)
+
+    enemies = []
+    chasers = []
+    running = True
+    game_won = False
+    game_lost = False
+    start_time = time.time()
+    end_time = 0
+    distance_traveled = 0
+    frame_tick = 0
+    if telemetry is not None:
+        telemetry.run_started(difficulty, endless_world.seed)
+
+def update_endless(keys):
+    """Advance one ENDLESS tick: player, chunk streaming, then the chasers"""
+    global chasers, game_lost, game_state, end_time, frame_tick
+    player.move(keys)
+    frame_tick += 1
+    cell_size = endless_world.cell_size
+    endless_world.update(int(player.x // cell_size), int(player.y // cell_size))
+
+    if (frame_tick % ENDLESS_SPAWN_INTERVAL == 0 and
+            len(chasers) < DIFFICULTY_SETTINGS[difficulty]["enemies"]):
+        # Chasers enter where the run began and are brought closer once that part of the world unloads
+        chasers.append(Chaser(cell_size + cell_size // 2, cell_size + cell_size // 2, cell_size, len(chasers)))
+
+    for chaser in chasers:
+        chaser.update(player.x, player.y)
+        if chaser.rect.colliderect(player.rect):
+            game_lost = True
+            game_state = GAME_OVER
+            end_time = time.time()
+            record_run_end(RESULT_LOST, (player.x, player.y))
+            break
+
+def draw_endless():
+    screen.fill(WHITE)
+    camera.follow(player.x, player.y)
+    endless_renderer.draw(screen, camera)
+    screen.set_clip(camera.view_rect)
+    player.draw()
+    for chaser in chasers:
+        chaser.draw()
+    screen.set_clip(None)
+
+    labels = get_hud_labels()
+    refresh = frame_tick % quality["hud_period"] == 0
+    labels["time"].draw(round(time.time() - start_time, 1), refresh)
+    labels["distance"].draw(round(distance_traveled), refresh)
+    labels["enemies"].draw(len(chasers), refresh)
+    labels["menu"].draw()
 
 # Hàm reset game
 def reset_game():
-    global player, enemies, running, game_won, game_lost, maze_generator, maze_surface, pathfinder, solution_path, start_time, distance_traveled, end_time, animation_progress
+    global player, enemies, running, game_won, game_lost, maze_generator, maze_renderer, camera, pathfinder, line_of_sight, path_service, path_scheduler, solution_path, start_time, distance_traveled, end_time, animation_progress, animation_wait_timer, frame_tick, ai_decisions, ai_decision_rate, path_layer, snapshot_ring, enemy_roster, rewind_charges, endless_mode, chasers
     
     cell_size = CELL_SIZES[difficulty]
-    maze_generator = MazeGenerator(WIDTH, MAZE_HEIGHT, cell_size=cell_size)
-    maze_generator.generate_maze()
-    maze_surface = maze_generator.create_surface()
+    close_endless_world()
+    endless_mode = False
+    chasers = []
+    maze_generator, solution_path = take_maze(difficulty)
+    maze_renderer = ChunkedMazeRenderer(maze_generator)
+    path_layer = None
+    camera = Camera(0, MAZE_START_Y, WIDTH, MAZE_HEIGHT, maze_generator.width, maze_generator.height)
     pathfinder = Pathfinder(maze_generator)
-    solution_path = pathfinder.get_solution_path()
+    line_of_sight = LineOfSight(maze_generator.maze, maze_generator.maze_width, maze_generator.maze_height)
+    if path_service is not None:
+        path_service.shutdown()
+    path_service = PathfindingService(maze_generator, inline=True if headless else None)
+    path_scheduler = PathScheduler(PATH_EXPANSION_BUDGET)
     
     if not solution_path or len(solution_path) < 2:
         print("Warning: No solution path found, creating fallback path")
@@ -544,16 +932,19 @@ def reset_game():
         goal_y = maze_generator.goal_pos[1] * maze_generator.cell_size + maze_generator.cell_size // 2
         solution_path = [(start_x, start_y), (goal_x, goal_y)]
     
-    solution_path = [(x, y + MAZE_START_Y) for x, y in solution_path]
-    
     player = Player(cell_size)
+    camera.follow(player.x, player.y)
     
     enemies = []
     num_enemies = DIFFICULTY_SETTINGS[difficulty]["enemies"]
     for i in range(num_enemies):
         enemy = Enemy(difficulty, cell_size)
         enemy.spawn_timer = -(i * 180)
+        enemy.index = i
         enemies.append(enemy)
+    enemy_roster = list(enemies)
+    snapshot_ring = SnapshotRing(REWIND_BUFFER_TICKS, len(enemies))
+    rewind_charges = REWIND_CHARGES
     
     running = True
     game_won = False
@@ -561,16 +952,28 @@ def reset_game():
     start_time = time.time()
     end_time = 0
     distance_traveled = 0
+    frame_tick = 0
+    ai_decisions = 0
+    ai_decision_rate = 0
     animation_progress = 0
     animation_wait_timer = 0
+    if telemetry is not None:
+        telemetry.run_started(difficulty, maze_generator.seed)
+    if state_publisher is not None:
+        state_publisher.publish_maze(maze_generator)
+
+def record_run_end(result, death=None):
+    """Send the finished or abandoned run to telemetry"""
+    if telemetry is not None:
+        seconds = (end_time or time.time()) - start_time
+        telemetry.run_ended(frame_tick, result, seconds, distance_traveled, death)
 
 # Khởi tạo đối tượng
-player = Player(cell_size=20)
+player = None
 enemies = []
 running = True
 game_won = False
 game_lost = False
-clock = pygame.time.Clock()
 
 def draw_modern_button(text, x, y, width, height, color, text_color, selected=False):
     shadow_rect = pygame.Rect(x + 3, y + 3, width, height)
@@ -673,48 +1076,33 @@ def draw_difficulty_menu():
         screen.blit(enemies_text, (x + (card_width - enemies_text.get_width()) // 2, y + 90))
     
     font_inst = pygame.font.Font(None, 36)
-    inst_text = font_inst.render("Press 1, 2, or 3 to select", True, WHITE)
+    inst_text = font_inst.render("Press 1, 2, or 3 to select, E for an endless run", True, WHITE)
     screen.blit(inst_text, (WIDTH//2 - inst_text.get_width()//2, 500))
     
     draw_modern_button("PRESS ENTER TO START", WIDTH//2 - 150, 600, 300, 60, MODERN_GREEN, WHITE)
 
 def draw_solution_path():
-    if solution_path and len(solution_path) > 0:
-        path_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        for i, (x, y) in enumerate(solution_path):
-            pygame.draw.circle(path_surface, (0, 200, 0, 120), (int(x), int(y)), 4)
-        screen.blit(path_surface, (0, 0))
+    if solution_path and len(solution_path) > 1:
+        layer = get_path_layer()
+        layer.reveal(len(solution_path))
+        layer.draw(screen, camera)
 
 def draw_animated_solution_path(progress):
     if solution_path and len(solution_path) > 1:
-        total_points = len(solution_path)
-        points_to_show = int(progress * total_points)
-        
+        # Only the newly reached segments are drawn onto the cached layer; the rest is one blit
+        points_to_show = int(progress * len(solution_path))
         if points_to_show >= 2:
-            trail_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            
-            trail_points = solution_path[:points_to_show]
-            for i in range(len(trail_points) - 1):
-                start_pos = trail_points[i]
-                end_pos = trail_points[i + 1]
-                segment_alpha = int(255 * (i + 1) / len(trail_points))
-                segment_alpha = min(200, segment_alpha)
-                pygame.draw.line(trail_surface, (0, 255, 0, segment_alpha), start_pos, end_pos, 6)
-            
-            for i, point in enumerate(trail_points):
-                point_alpha = int(255 * (i + 1) / len(trail_points))
-                point_alpha = min(255, point_alpha)
-                pygame.draw.circle(trail_surface, (0, 255, 0, point_alpha), (int(point[0]), int(point[1])), 3)
-            
-            screen.blit(trail_surface, (0, 0))
+            layer = get_path_layer()
+            layer.reveal(points_to_show)
+            layer.draw(screen, camera)
     else:
         start_x, start_y = maze_generator.get_start_position()
         goal_x = maze_generator.goal_pos[0] * maze_generator.cell_size + maze_generator.cell_size // 2
         goal_y = maze_generator.goal_pos[1] * maze_generator.cell_size + maze_generator.cell_size // 2
-        start_y += MAZE_START_Y
-        goal_y += MAZE_START_Y
+        start_x, start_y = camera.world_to_screen(start_x, start_y)
+        goal_x, goal_y = camera.world_to_screen(goal_x, goal_y)
         
-        trail_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        trail_surface = get_overlay()
         end_x = start_x + (goal_x - start_x) * progress
         end_y = start_y + (goal_y - start_y) * progress
         pygame.draw.line(trail_surface, (0, 255, 0, 200), (start_x, start_y), (int(end_x), int(end_y)), 6)
@@ -744,7 +1132,7 @@ def draw_game_over():
     stats = [
         f"Time: {elapsed_time:.1f} seconds",
         f"Distance: {distance_traveled:.0f} pixels",
-        f"Difficulty: {DIFFICULTY_SETTINGS[difficulty]['name']}"
+        f"Difficulty: {DIFFICULTY_SETTINGS[difficulty]['name']}" + (" (endless)" if endless_mode else "")
     ]
     
     for i, stat in enumerate(stats):
@@ -798,59 +1186,180 @@ def setup():
     game_won = False
     game_lost = False
 
+def update_playing(keys):
+    """Advance one PLAYING tick: player, path results, enemies, then the search budget"""
+    global game_won, game_lost, game_state, end_time, frame_tick, animation_progress, animation_wait_timer
+    collision_result = player.move(keys)
+    
+    if collision_result == "goal":
+        game_won = True
+        game_state = GAME_WON
+        end_time = time.time()
+        record_run_end(RESULT_WON)
+        prewarm_maze(difficulty)
+
+    frame_tick += 1
+    for enemy, (path_result, request_tick) in path_service.poll(frame_tick).items():
+        enemy.receive_goal_path(path_result)
+
+    for enemy in enemies:
+        enemy.move(player.x, player.y)
+        # A run ends once: reaching the goal this tick wins even if an enemy touches the player too
+        if enemy.is_spawned and not game_won and not game_lost and enemy.rect.colliderect(player.rect):
+            game_lost = True
+            game_state = DEATH_ANIMATION
+            end_time = time.time()
+            record_run_end(RESULT_LOST, (player.x, player.y))
+            animation_progress = 0
+            animation_wait_timer = 0
+    
+    path_scheduler.run(frame_tick)
+    snapshot_ring.capture(frame_tick, time.time() - start_time, distance_traveled, player, enemy_roster)
+    
+    if frame_tick % 60 == 0:
+        update_decision_rate()
+
+def rewind(seconds=REWIND_SECONDS):
+    """Put the run back about seconds of play from the snapshot ring; False if nothing was recorded"""
+    global enemies, frame_tick, distance_traveled, start_time
+    header = snapshot_ring.restore(int(seconds * 60), player, enemy_roster)
+    if header is None:
+        return False
+    frame_tick, _, elapsed, distance_traveled = header[:4]
+    start_time = time.time() - elapsed
+    enemies = [enemy for enemy in enemy_roster if not enemy.removed]
+    player.trail.clear()
+    player.rect.update(player.x - player.size // 2, player.y - player.size // 2, player.size, player.size)
+    # Paths, planner state and recent cells are rebuilt from the restored positions; searches still in
+    # flight were planned from positions that no longer exist, and their request ticks lie in the future
+    cell_size = maze_generator.cell_size
+    for enemy in enemy_roster:
+        enemy.path_to_player = []
+        enemy.path_to_goal = []
+        enemy.visited_positions.clear()
+        enemy.last_position = (int(enemy.x // cell_size), int(enemy.y // cell_size))
+        enemy.planner.reset()
+        enemy.planned_version = enemy.planner.path_version
+        enemy.decision_due = True
+        enemy.rect.update(enemy.x - enemy.size // 2, enemy.y - enemy.size // 2, enemy.size, enemy.size)
+        path_scheduler.cancel(enemy)
+        path_service.cancel(enemy)
+    return True
+
+def apply_quality(settings):
+    """Switch to a quality level; the live trail is trimmed to the new length"""
+    global quality
+    quality = settings
+    if player is not None and player.trail.maxlen != settings["trail_length"]:
+        player.trail = deque(player.trail, maxlen=settings["trail_length"])
+
+def govern_quality(frame_ms):
+    """Feed one frame's work time to the governor and apply any level change"""
+    settings = quality_governor.record(frame_ms)
+    if settings is not None:
+        apply_quality(settings)
+        if platform.system() != "Emscripten":
+            change = quality_governor.history[-1]
+            print(f"Quality: {settings['name']} (level {change['to']}, {change['frame_ms']:.1f} ms/frame)")
+
+def update_decision_rate():
+    """Turn the decision count of the last 60 ticks into decisions per second"""
+    global ai_decisions, ai_decision_rate
+    ai_decision_rate = ai_decisions
+    ai_decisions = 0
+
+def draw_playing():
+    screen.fill(WHITE)
+    camera.follow(player.x, player.y)
+    maze_renderer.draw(screen, camera)
+    screen.set_clip(camera.view_rect)
+    player.draw()
+    
+    spawned = 0
+    for enemy in enemies:
+        enemy.draw()
+        if enemy.is_spawned:
+            spawned += 1
+    screen.set_clip(None)
+    
+    labels = get_hud_labels()
+    refresh = frame_tick % quality["hud_period"] == 0
+    labels["time"].draw(round(time.time() - start_time, 1), refresh)
+    labels["distance"].draw(round(distance_traveled), refresh)
+    labels["enemies"].draw(spawned, refresh)
+    labels["decisions"].draw(ai_decision_rate, refresh)
+    labels["legend"].draw()
+    labels["menu"].draw()
+
 async def update_loop():
-    global running, game_won, game_lost, game_state, difficulty, end_time
+    global running, game_won, game_lost, game_state, difficulty, end_time, frame_tick, animation_progress, animation_wait_timer, rewind_charges
     
     while running:
+        frame_started = time.perf_counter()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+                if game_state in (PLAYING, ENDLESS):
+                    record_run_end(RESULT_QUIT)
             elif event.type == pygame.KEYDOWN:
                 if game_state == MENU:
                     if event.key == pygame.K_SPACE:
                         game_state = DIFFICULTY
+                        prewarm_maze(difficulty)
                 elif game_state == DIFFICULTY:
                     if event.key == pygame.K_1:
                         difficulty = 1
+                        prewarm_maze(difficulty)
                     elif event.key == pygame.K_2:
                         difficulty = 2
+                        prewarm_maze(difficulty)
                     elif event.key == pygame.K_3:
                         difficulty = 3
+                        prewarm_maze(difficulty)
                     elif event.key == pygame.K_RETURN:
                         game_state = PLAYING
                         reset_game()
+                    elif event.key == pygame.K_e:
+                        game_state = ENDLESS
+                        reset_endless()
                 elif game_state == PLAYING:
                     if event.key == pygame.K_ESCAPE:
                         game_state = MENU
+                        record_run_end(RESULT_QUIT)
+                    elif event.key == pygame.K_BACKSPACE and rewind_charges > 0 and rewind():
+                        rewind_charges -= 1
+                    elif event.key == pygame.K_F9 and debug_rewind:
+                        rewind()
+                elif game_state == ENDLESS:
+                    if event.key == pygame.K_ESCAPE:
+                        game_state = MENU
+                        record_run_end(RESULT_QUIT)
                 elif game_state in [GAME_OVER, GAME_WON]:
-                    if event.key == pygame.K_r:
+                    if event.key == pygame.K_r and endless_mode:
+                        game_state = ENDLESS
+                        reset_endless()
+                    elif event.key == pygame.K_r:
                         game_state = PLAYING
                         reset_game()
                     elif event.key == pygame.K_ESCAPE:
                         game_state = MENU
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and game_state == PLAYING:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = camera.screen_to_world(*pygame.mouse.get_pos())
                 for enemy in enemies[:]:
                     if enemy.is_spawned and enemy.rect.collidepoint(mouse_pos):
                         enemies.remove(enemy)
+                        enemy.removed = True
+                        path_scheduler.unregister(enemy)
 
+        profiling = allocation_profiler is not None and game_state == PLAYING
+        if profiling:
+            allocation_profiler.begin_frame()
+        
         if game_state == PLAYING and not game_won and not game_lost:
-            keys = pygame.key.get_pressed()
-            collision_result = player.move(keys)
-            
-            if collision_result == "goal":
-                game_won = True
-                game_state = GAME_WON
-                end_time = time.time()
-
-            for enemy in enemies[:]:
-                enemy.move(player.x, player.y)
-                if enemy.is_spawned and enemy.rect.colliderect(player.rect):
-                    game_lost = True
-                    game_state = DEATH_ANIMATION
-                    end_time = time.time()
-                    animation_progress = 0
-                    animation_wait_timer = 0
+            update_playing(pygame.key.get_pressed())
+        
+        elif game_state == ENDLESS and not game_lost:
+            update_endless(pygame.key.get_pressed())
         
         elif game_state == DEATH_ANIMATION:
             animation_progress += animation_speed / 100.0
@@ -858,68 +1367,107 @@ async def update_loop():
                 animation_wait_timer += 1
                 if animation_wait_timer >= 60:
                     game_state = GAME_OVER
+                    prewarm_maze(difficulty)
 
         if game_state == MENU:
             draw_menu()
         elif game_state == DIFFICULTY:
             draw_difficulty_menu()
         elif game_state == PLAYING:
-            screen.fill(WHITE)
-            screen.blit(maze_surface, (0, MAZE_START_Y))
-            player.draw()
-            
-            for enemy in enemies:
-                enemy.draw()
-                
-            font = pygame.font.Font(None, 24)
-            elapsed_time = time.time() - start_time
-            
-            def draw_text_with_bg(text, color, bg_color, x, y):
-                text_surface = font.render(text, True, color)
-                bg_surface = pygame.Surface((text_surface.get_width() + 8, text_surface.get_height() + 2))
-                bg_surface.fill(bg_color)
-                bg_surface.set_alpha(180)
-                screen.blit(bg_surface, (x - 4, y - 1))
-                screen.blit(text_surface, (x, y))
-            
-            draw_text_with_bg(f"Time: {elapsed_time:.1f}s", YELLOW, BLACK, 10, 10)
-            draw_text_with_bg(f"Distance: {distance_traveled:.0f}", CYAN, BLACK, 150, 10)
-            draw_text_with_bg(f"Enemies: {len([e for e in enemies if e.is_spawned])}", ORANGE, BLACK, 320, 10)
-            draw_text_with_bg("Purple: Trail | Green: Solution | Orange: Hunting | Red: Goal-seeking", WHITE, DARK_GRAY, 10, 35)
-            draw_text_with_bg("ESC: Menu", LIGHT_GRAY, BLACK, 580, 35)
+            draw_playing()
+            if profiling:
+                report = allocation_profiler.end_frame()
+                if report:
+                    print(allocation_profiler.format_report(report))
         
         elif game_state == DEATH_ANIMATION:
             screen.fill(WHITE)
-            screen.blit(maze_surface, (0, MAZE_START_Y))
+            maze_renderer.draw(screen, camera)
+            screen.set_clip(camera.view_rect)
             draw_animated_solution_path(animation_progress)
             player.draw()
             
             for enemy in enemies:
                 enemy.draw()
+            screen.set_clip(None)
             
-            font_death = pygame.font.Font(None, 48)
-            death_text = font_death.render("Following the solution path...", True, BLACK)
-            death_bg = pygame.Surface((death_text.get_width() + 20, death_text.get_height() + 10))
-            death_bg.fill(WHITE)
-            death_bg.set_alpha(200)
-            screen.blit(death_bg, (WIDTH//2 - death_text.get_width()//2 - 10, 50))
-            screen.blit(death_text, (WIDTH//2 - death_text.get_width()//2, 55))
+            draw_death_banner()
             
+        elif game_state == ENDLESS:
+            draw_endless()
         elif game_state == GAME_OVER:
             draw_game_over()
         elif game_state == GAME_WON:
             draw_game_won()
         
         pygame.display.flip()
+        frame_ms = (time.perf_counter() - frame_started) * 1000
+        if quality_governor is not None and game_state in (PLAYING, DEATH_ANIMATION, ENDLESS):
+            govern_quality(frame_ms)
+        if telemetry is not None and game_state in (PLAYING, DEATH_ANIMATION, ENDLESS):
+            telemetry.frame(frame_tick, frame_ms)
+        if state_publisher is not None and player is not None:
+            state_publisher.publish(frame_tick, game_state, game_entities(player, chasers if endless_mode else enemies, game_won, game_lost))
+        if "first_frame" not in startup_timings:
+            startup_timings["first_frame"] = (time.perf_counter() - IMPORT_STARTED) * 1000
+            if platform.system() != "Emscripten":
+                print("Startup: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in startup_timings.items()))
         clock.tick(60)
         await asyncio.sleep(1.0 / 60)
+    
+    if path_service is not None:
+        path_service.shutdown()
+    close_endless_world()
+    if prewarm_executor is not None:
+        prewarm_executor.shutdown(wait=False, cancel_futures=True)
+    if allocation_profiler is not None:
+        allocation_profiler.stop()
+    if telemetry is not None:
+        telemetry.stop()
+    if state_publisher is not None:
+        state_publisher.close()
+
+startup_timings["import"] = (time.perf_counter() - IMPORT_STARTED) * 1000
+
+quality_governor = QualityGovernor(QUALITY_LEVELS, FRAME_BUDGET_MS)
 
 if platform.system() == "Emscripten":
+    init_display()
     asyncio.ensure_future(update_loop())
 else:
     if __name__ == "__main__":
+        if "--quality" in sys.argv:
+            # Checked before the window opens, so bad input is just a usage error
+            index = sys.argv.index("--quality") + 1
+            try:
+                quality_governor.pin(int(sys.argv[index] if index < len(sys.argv) else ""))
+            except ValueError as error:
+                sys.exit(f"usage: python main.py --quality LEVEL, LEVEL from 0 (best) to {len(QUALITY_LEVELS) - 1}: {error}")
+            apply_quality(quality_governor.settings)
+        init_display()
+        if "--profile-alloc" in sys.argv:
+            allocation_profiler = AllocationProfiler(window=ALLOCATION_REPORT_FRAMES)
+            allocation_profiler.start()
+        if "--no-telemetry" not in sys.argv:
+            telemetry = Telemetry(os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry")).start()
+        debug_rewind = "--debug-rewind" in sys.argv
+        if "--levels" in sys.argv:
+            level_cache = LevelCache(sys.argv[sys.argv.index("--levels") + 1])
+            if "--level" in sys.argv:
+                level_name = sys.argv[sys.argv.index("--level") + 1]
+            print(f"Playing {len(level_cache)} cached levels")
+        if "--share-state" in sys.argv:
+            index = sys.argv.index("--share-state") + 1
+            name = sys.argv[index] if index < len(sys.argv) and not sys.argv[index].startswith("--") else None
+            smallest_cell = min(CELL_SIZES.values())
+            max_maze_cells = (WIDTH * MAZE_WORLD_SCALE // smallest_cell) * (MAZE_HEIGHT * MAZE_WORLD_SCALE // smallest_cell)
+            if level_cache is not None and len(level_cache):
+                max_maze_cells = max(max_maze_cells, int((level_cache.index["width"] * level_cache.index["height"]).max()))
+            state_publisher = SharedStatePublisher(name, max_maze_cells=max_maze_cells)
+            print(f"Sharing game state as '{state_publisher.name}'")
         print("Starting Maze Runner Game...")
         print("Controls: WASD or Arrow Keys to move")
+        print(f"Backspace: rewind {REWIND_SECONDS} seconds ({REWIND_CHARGES} per run)")
         print("Goal: Reach the RED FLAG to win!")
         print("Avoid the red enemies!")
         asyncio.run(update_loop())
\ No newline at end of file
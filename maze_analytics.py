@@ -0,0 +1,150 @@
+import argparse
+import os
+import platform
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+CORRIDOR_HISTOGRAM_BINS = (1, 2, 4, 8, 16, 32, 64)
+
+def maze_to_array(maze_generator):
+    """Boolean wall array (True = wall) for a MazeGenerator or anything with a maze grid"""
+    return np.array(maze_generator.maze, dtype=bool)
+
+def _shift_stack(mask):
+    """The four orthogonal neighbours of every cell, with out-of-bounds counted as False"""
+    padded = np.pad(mask, 1, constant_values=False)
+    return np.stack([padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:]])
+
+def bfs_distances(open_cells, source):
+    """Distance in steps from source to every open cell, -1 where unreachable.
+
+    Runs as a frontier dilation, so each ring is one set of whole-array operations.
+    """
+    distances = np.full(open_cells.shape, -1, dtype=np.int32)
+    if not open_cells[source[1], source[0]]:
+        return distances
+    frontier = np.zeros_like(open_cells)
+    frontier[source[1], source[0]] = True
+    visited = frontier.copy()
+    step = 0
+    while frontier.any():
+        distances[frontier] = step
+        frontier = _shift_stack(frontier).any(axis=0) & open_cells & ~visited
+        visited |= frontier
+        step += 1
+    return distances
+
+def corridor_lengths(corridor_cells):
+    """Sizes of the connected runs of corridor cells, found by min-label propagation"""
+    height, width = corridor_cells.shape
+    unlabelled = height * width
+    labels = np.where(corridor_cells, np.arange(height * width).reshape(height, width), unlabelled)
+    while True:
+        padded = np.pad(labels, 1, constant_values=unlabelled)
+        neighbour_min = np.minimum.reduce([padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:]])
+        updated = np.where(corridor_cells, np.minimum(labels, neighbour_min), unlabelled)
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    counts = np.bincount(labels[corridor_cells])
+    return counts[counts > 0]
+
+def analyze_maze(walls, start, goal):
+    """Quality metrics for one maze given as a wall array and (x, y) start and goal cells"""
+    open_cells = ~np.asarray(walls, dtype=bool)
+    degree = _shift_stack(open_cells).sum(axis=0) * open_cells
+    open_count = int(open_cells.sum())
+
+    dead_ends = open_cells & (degree == 1)
+    junctions = open_cells & (degree >= 3)
+    corridors = corridor_lengths(open_cells & (degree == 2))
+
+    from_start = bfs_distances(open_cells, start)
+    from_goal = bfs_distances(open_cells, goal)
+    solution_length = int(from_start[goal[1], goal[0]])
+    if solution_length >= 0:
+        # A cell lies on some shortest path exactly when its two distances add up to the solution length
+        on_solution = (from_start >= 0) & (from_goal >= 0) & (from_start + from_goal == solution_length)
+        off_solution_share = 1.0 - on_solution.sum() / max(1, open_count)
+    else:
+        off_solution_share = 1.0
+
+    manhattan = abs(goal[0] - start[0]) + abs(goal[1] - start[1])
+    histogram, _ = np.histogram(corridors, bins=CORRIDOR_HISTOGRAM_BINS + (np.inf,))
+    return {
+        "open_cells": open_count,
+        "solution_length": solution_length,
+        "solution_ratio": solution_length / manhattan if manhattan and solution_length >= 0 else 0.0,
+        "dead_ends": int(dead_ends.sum()),
+        "junctions": int(junctions.sum()),
+        "branching_factor": float(degree[junctions].mean() - 1) if junctions.any() else 0.0,
+        "corridor_count": int(len(corridors)),
+        "corridor_mean": float(corridors.mean()) if len(corridors) else 0.0,
+        "corridor_max": int(corridors.max()) if len(corridors) else 0,
+        "corridor_histogram": dict(zip(CORRIDOR_HISTOGRAM_BINS, histogram.tolist())),
+        "off_solution_share": float(off_solution_share),
+        "reachable_share": float((from_start >= 0).sum() / max(1, open_count)),
+    }
+
+def analyze_generator(maze_generator):
+    return analyze_maze(maze_to_array(maze_generator), maze_generator.start_pos, maze_generator.goal_pos)
+
+def generate_and_analyze(seed, width, height, cell_size):
+    """Generate the maze for a seed and analyse it; the unit of work for batch runs"""
+    from maze_generator import MazeGenerator
+    maze_generator = MazeGenerator(width, height, cell_size=cell_size, rng=random.Random(seed))
+    maze_generator.generate_maze()
+    stats = analyze_generator(maze_generator)
+    stats["seed"] = seed
+    return stats
+
+def _generate_and_analyze_job(job):
+    return generate_and_analyze(*job)
+
+def analyze_batch(seeds, width, height, cell_size, workers=None, chunksize=16):
+    """Generate and analyse one maze per seed across worker processes; results follow seed order"""
+    jobs = [(seed, width, height, cell_size) for seed in seeds]
+    if platform.system() == "Emscripten" or workers == 1 or len(jobs) < 2:
+        return [_generate_and_analyze_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        return list(executor.map(_generate_and_analyze_job, jobs, chunksize=chunksize))
+
+def meets_target(stats, target):
+    """Check stats against a target of {metric: (minimum, maximum)}; None leaves a side open"""
+    for metric, (minimum, maximum) in target.items():
+        value = stats[metric]
+        if minimum is not None and value < minimum:
+            return False
+        if maximum is not None and value > maximum:
+            return False
+    return True
+
+def summarize(results, metrics=("solution_length", "solution_ratio", "dead_ends", "junctions",
+                                "branching_factor", "corridor_mean", "off_solution_share")):
+    """Mean, 10th and 90th percentile of each metric over a batch"""
+    summary = {}
+    for metric in metrics:
+        values = np.array([stats[metric] for stats in results], dtype=float)
+        summary[metric] = {
+            "mean": float(values.mean()),
+            "p10": float(np.percentile(values, 10)),
+            "p90": float(np.percentile(values, 90)),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a batch of mazes and summarise their quality metrics")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--cell-size", type=int, default=10)
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    results = analyze_batch(range(args.count), args.width, args.height, args.cell_size, workers=args.workers)
+    for metric, values in summarize(results).items():
+        print(f"{metric:<20} mean {values['mean']:8.2f}  p10 {values['p10']:8.2f}  p90 {values['p90']:8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
-import pygame
 import random
-from collections import deque
+import heapq
+from array import array
 import math
+from junction_graph import JunctionGraph
+from hierarchical_pathfinder import HierarchicalPathfinder
 
 class MazeGenerator:
-    def __init__(self, width, height, cell_size=20):
+    def __init__(self, width, height, cell_size=20, rng=random):
         self.width = width
         self.height = height
         self.cell_size = cell_size
@@ -28,10 +30,36 @@ class MazeGenerator:
         self.start_pos = (1, 1)
         self.goal_pos = (self.maze_width - 2, self.maze_height - 2)
         
+        # Generation draws only from rng, so a maze built from random.Random(seed) can be rebuilt from the seed
+        self.rng = rng
+        self.seed = None
+        self._hierarchical = None
+        
+    @classmethod
+    def from_grid(cls, maze, start_pos, goal_pos, cell_size=20, open_cells=None):
+        """A generator holding a ready-made maze (rows of booleans, True = wall) instead of a generated one.
+
+        open_cells may be a prebuilt OpenCellIndex for the same grid.
+        """
+        generator = cls(0, 0, cell_size)
+        generator.maze = maze
+        generator.maze_width = len(maze[0])
+        generator.maze_height = len(maze)
+        generator.width = generator.maze_width * cell_size
+        generator.height = generator.maze_height * cell_size
+        generator.start_pos = tuple(start_pos)
+        generator.goal_pos = tuple(goal_pos)
+        if open_cells is None:
+            generator.build_open_cell_index()
+        else:
+            generator.open_cells = open_cells
+        return generator
+    
     def generate_maze(self):
         """Generate maze using Recursive Backtracking algorithm and add dead ends"""
         # Initialize all cells as walls
         self.maze = [[True for _ in range(self.maze_width)] for _ in range(self.maze_height)]
+        self._hierarchical = None
         
         # Start recursive backtracking from (1,1)
         self._recursive_backtrack(1, 1)
@@ -48,6 +76,9 @@ class MazeGenerator:
         
         # Ensure connectivity
         self._ensure_connectivity()
+        
+        # Index open cells for constant-time spawning and relocation
+        self.build_open_cell_index()
     
     def _recursive_backtrack(self, start_x, start_y):
         """Recursive backtracking maze generation algorithm"""
@@ -76,7 +107,7 @@ class MazeGenerator:
             
             if neighbors:
                 # Choose random neighbor
-                next_x, next_y, dx, dy = random.choice(neighbors)
+                next_x, next_y, dx, dy = self.rng.choice(neighbors)
                 
                 # Remove wall between current and next cell
                 wall_x = current_x + dx // 2
@@ -97,21 +128,22 @@ class MazeGenerator:
         for y in range(1, self.maze_height - 1):
             for x in range(1, self.maze_width - 1):
                 if not self.maze[y][x]:  # Path cell
-                    if random.random() < 0.03:  # Lower probability for fewer dead ends
+                    if self.rng.random() < 0.03:  # Lower probability for fewer dead ends
                         directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-                        random.shuffle(directions)
+                        self.rng.shuffle(directions)
                         for dx, dy in directions:
                             i = 1
                             while True:
                                 check_x = x + i * dx
                                 check_y = y + i * dy
-                                if not (0 <= check_x < self.maze_width and 0 <= check_y < self.maze_height):
+                                # Never carve into the outer wall
+                                if not (1 <= check_x < self.maze_width - 1 and 1 <= check_y < self.maze_height - 1):
                                     break
                                 if not self.maze[check_y][check_x]:  # Hit a path
                                     break
                                 i += 1
                             if i - 1 >= 1:
-                                corridor_length = random.randint(1, min(i - 1, max_corridor_length))
+                                corridor_length = self.rng.randint(1, min(i - 1, max_corridor_length))
                                 for j in range(1, corridor_length + 1):
                                     carve_x = x + j * dx
                                     carve_y = y + j * dy
@@ -133,29 +165,45 @@ class MazeGenerator:
     
     def _get_path_length(self):
         """Get the length of the shortest path from start to goal"""
-        queue = deque([(self.start_pos[0], self.start_pos[1], 0)])
-        visited = set()
-        visited.add(self.start_pos)
-        
-        while queue:
-            x, y, dist = queue.popleft()
-            
-            if (x, y) == self.goal_pos:
-                return dist
-            
-            # Check 4 directions
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                next_x, next_y = x + dx, y + dy
-                
-                if (0 <= next_x < self.maze_width and 
-                    0 <= next_y < self.maze_height and
-                    not self.maze[next_y][next_x] and
-                    (next_x, next_y) not in visited):
-                    
-                    visited.add((next_x, next_y))
-                    queue.append((next_x, next_y, dist + 1))
-        
-        return 0  # No path found
+        return self._search_from_start()
+    
+    def _search_from_start(self, parents=None):
+        """Breadth-first search over flat cell indices; returns the start-to-goal distance, 0 if unreachable.
+
+        With a parents array each reached cell records the cell it was
+        reached from, which is enough to rebuild the path without copying it.
+        """
+        width = self.maze_width
+        height = self.maze_height
+        maze = self.maze
+        start = self.start_pos[1] * width + self.start_pos[0]
+        goal = self.goal_pos[1] * width + self.goal_pos[0]
+        if start == goal:
+            return 0
+        visited = bytearray(width * height)
+        visited[start] = 1
+        frontier = [start]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for flat in frontier:
+                y, x = divmod(flat, width)
+                # Same neighbour order as always: down, right, up, left
+                for neighbour, blocked in ((flat + width, y + 1 >= height or maze[y + 1][x]),
+                                           (flat + 1, x + 1 >= width or maze[y][x + 1]),
+                                           (flat - width, y == 0 or maze[y - 1][x]),
+                                           (flat - 1, x == 0 or maze[y][x - 1])):
+                    if blocked or visited[neighbour]:
+                        continue
+                    visited[neighbour] = 1
+                    if parents is not None:
+                        parents[neighbour] = flat
+                    if neighbour == goal:
+                        return distance
+                    next_frontier.append(neighbour)
+            frontier = next_frontier
+        return 0
     
     def _add_strategic_blocks(self):
         """Add walls to create a more complex path"""
@@ -191,32 +239,43 @@ class MazeGenerator:
                         break
                     else:
                         self.maze[block_y][block_x] = False
+        
+        if blocks_added:
+            self._seal_unreachable_cells()
+    
+    def _seal_unreachable_cells(self):
+        """Wall up open cells a block cut off from the start, so every open cell stays reachable"""
+        width = self.maze_width
+        maze = self.maze
+        reached = bytearray(width * self.maze_height)
+        start = self.start_pos[1] * width + self.start_pos[0]
+        reached[start] = 1
+        stack = [start]
+        while stack:
+            y, x = divmod(stack.pop(), width)
+            for next_x, next_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if (0 <= next_x < width and 0 <= next_y < self.maze_height and
+                        not maze[next_y][next_x] and not reached[next_y * width + next_x]):
+                    reached[next_y * width + next_x] = 1
+                    stack.append(next_y * width + next_x)
+        for y in range(self.maze_height):
+            row = maze[y]
+            for x in range(width):
+                if not row[x] and not reached[y * width + x]:
+                    row[x] = True
     
     def _get_current_path(self):
         """Get the current shortest path from start to goal"""
-        queue = deque([(self.start_pos[0], self.start_pos[1], [(self.start_pos[0], self.start_pos[1])])])
-        visited = set()
-        visited.add(self.start_pos)
-        
-        while queue:
-            x, y, path = queue.popleft()
-            
-            if (x, y) == self.goal_pos:
-                return path
-            
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                next_x, next_y = x + dx, y + dy
-                
-                if (0 <= next_x < self.maze_width and 
-                    0 <= next_y < self.maze_height and
-                    not self.maze[next_y][next_x] and
-                    (next_x, next_y) not in visited):
-                    
-                    visited.add((next_x, next_y))
-                    new_path = path + [(next_x, next_y)]
-                    queue.append((next_x, next_y, new_path))
-        
-        return []
+        parents = array('i', [-1]) * (self.maze_width * self.maze_height)
+        if not self._search_from_start(parents):
+            return []
+        flat = self.goal_pos[1] * self.maze_width + self.goal_pos[0]
+        path = []
+        while flat != -1:
+            path.append((flat % self.maze_width, flat // self.maze_width))
+            flat = parents[flat]
+        path.reverse()
+        return path
     
     def _ensure_connectivity(self):
         """Ensure start and goal are connected"""
@@ -246,28 +305,46 @@ class MazeGenerator:
     
     def create_surface(self):
         """Create a pygame surface with the maze"""
-        surface = pygame.Surface((self.width, self.height))
-        surface.fill(self.WHITE)
-        
-        for y in range(self.maze_height):
-            for x in range(self.maze_width):
-                if self.maze[y][x]:
-                    pygame.draw.rect(surface, self.BLACK, 
-                                   (x * self.cell_size, y * self.cell_size, 
-                                    self.cell_size, self.cell_size))
-        
-        goal_x = self.goal_pos[0] * self.cell_size
-        goal_y = self.goal_pos[1] * self.cell_size
-        pygame.draw.rect(surface, self.RED, 
-                        (goal_x, goal_y, self.cell_size, self.cell_size))
-        
-        return surface
+        # Rendering lives with the camera so generation and pathfinding import without pygame
+        from camera import render_maze_surface
+        return render_maze_surface(self)
     
     def get_start_position(self):
         """Get starting position in pixel coordinates"""
         return (self.start_pos[0] * self.cell_size + self.cell_size // 2,
                 self.start_pos[1] * self.cell_size + self.cell_size // 2)
     
+    def build_open_cell_index(self):
+        """Rebuild the open-cell index; call again after mutating the maze"""
+        self.open_cells = OpenCellIndex(self.maze, self.maze_width, self.maze_height)
+        return self.open_cells
+    
+    @property
+    def hierarchical(self):
+        """HPA* entrances and intra-cluster distances for long-range paths, built once per maze on first use"""
+        if self._hierarchical is None:
+            self._hierarchical = HierarchicalPathfinder(self)
+        return self._hierarchical
+    
+    def set_wall(self, grid_x, grid_y, wall):
+        """Edit one cell of a finished maze, keeping the open-cell index and the HPA* clusters current"""
+        self.maze[grid_y][grid_x] = wall
+        self.build_open_cell_index()
+        if self._hierarchical is not None:
+            self._hierarchical.update_cell(grid_x, grid_y)
+    
+    def get_random_open_position(self, rng=random):
+        """Get the pixel center of a uniformly chosen open cell"""
+        grid_x, grid_y = self.open_cells.random_cell(rng)
+        return (grid_x * self.cell_size + self.cell_size // 2,
+                grid_y * self.cell_size + self.cell_size // 2)
+    
+    def get_nearest_open_position(self, x, y):
+        """Get the pixel center of the open cell nearest to a pixel position"""
+        grid_x, grid_y = self.open_cells.nearest_cell(int(x // self.cell_size), int(y // self.cell_size))
+        return (grid_x * self.cell_size + self.cell_size // 2,
+                grid_y * self.cell_size + self.cell_size // 2)
+    
     def is_wall(self, x, y):
         """Check if position is a wall"""
         grid_x = int(x // self.cell_size)
@@ -282,26 +359,105 @@ class MazeGenerator:
         grid_y = int(y // self.cell_size)
         return (grid_x, grid_y) == self.goal_pos
 
+class OpenCellIndex:
+    """Flat array of open cells plus a nearest-open-cell table for every grid cell"""
+    def __init__(self, maze, maze_width, maze_height):
+        self.maze_width = maze_width
+        self.maze_height = maze_height
+        self.cells_x = array('i')
+        self.cells_y = array('i')
+        # nearest[y * maze_width + x] is the index of the closest open cell
+        self.nearest = array('i', [-1]) * (maze_width * maze_height)
+        
+        # A flat int array as the FIFO keeps very large grids from holding millions of int objects
+        queue = array('i')
+        for y in range(maze_height):
+            row = maze[y]
+            for x in range(maze_width):
+                if not row[x]:
+                    flat = y * maze_width + x
+                    self.nearest[flat] = len(self.cells_x)
+                    self.cells_x.append(x)
+                    self.cells_y.append(y)
+                    queue.append(flat)
+        
+        # Multi-source BFS from every open cell fills in the walls deterministically
+        nearest = self.nearest
+        head = 0
+        while head < len(queue):
+            flat = queue[head]
+            head += 1
+            x = flat % maze_width
+            owner = nearest[flat]
+            if x > 0 and nearest[flat - 1] < 0:
+                nearest[flat - 1] = owner
+                queue.append(flat - 1)
+            if x < maze_width - 1 and nearest[flat + 1] < 0:
+                nearest[flat + 1] = owner
+                queue.append(flat + 1)
+            if flat >= maze_width and nearest[flat - maze_width] < 0:
+                nearest[flat - maze_width] = owner
+                queue.append(flat - maze_width)
+            if flat + maze_width < len(nearest) and nearest[flat + maze_width] < 0:
+                nearest[flat + maze_width] = owner
+                queue.append(flat + maze_width)
+    
+    @classmethod
+    def from_arrays(cls, maze_width, maze_height, cells_x, cells_y, nearest):
+        """An index restored from its three int32 arrays (anything with tobytes(), e.g. NumPy or array)"""
+        index = cls.__new__(cls)
+        index.maze_width = maze_width
+        index.maze_height = maze_height
+        index.cells_x = array('i')
+        index.cells_x.frombytes(cells_x.tobytes())
+        index.cells_y = array('i')
+        index.cells_y.frombytes(cells_y.tobytes())
+        index.nearest = array('i')
+        index.nearest.frombytes(nearest.tobytes())
+        return index
+    
+    def __len__(self):
+        return len(self.cells_x)
+    
+    def cell(self, index):
+        """Get the grid coordinates of the open cell at a flat index"""
+        return self.cells_x[index], self.cells_y[index]
+    
+    def random_cell(self, rng=random):
+        """Pick a uniformly random open cell"""
+        return self.cell(rng.randrange(len(self.cells_x)))
+    
+    def nearest_cell(self, grid_x, grid_y):
+        """Get the open cell closest to a grid position, clamping to the maze bounds"""
+        grid_x = max(0, min(self.maze_width - 1, grid_x))
+        grid_y = max(0, min(self.maze_height - 1, grid_y))
+        return self.cell(self.nearest[grid_y * self.maze_width + grid_x])
+
 class Pathfinder:
     def __init__(self, maze_generator):
         self.maze = maze_generator
-        
-        
+        self._junction_graph = None
     
+    @property
+    def junction_graph(self):
+        """Corridor-compressed graph, compiled once per maze on first use"""
+        if self._junction_graph is None:
+            self._junction_graph = JunctionGraph(self.maze.maze, self.maze.maze_width, self.maze.maze_height)
+        return self._junction_graph
     
     def find_path(self, start_x, start_y, target_x, target_y):
         """Find path using A* algorithm"""
         start_grid = (int(start_x // self.maze.cell_size), int(start_y // self.maze.cell_size))
         target_grid = (int(target_x // self.maze.cell_size), int(target_y // self.maze.cell_size))
         
-        open_set = [(0, start_grid)]
+        open_set = [(self.heuristic(start_grid, target_grid), 0, start_grid)]
         came_from = {}
         g_score = {start_grid: 0}
-        f_score = {start_grid: self.heuristic(start_grid, target_grid)}
         
         while open_set:
-            current = min(open_set, key=lambda x: x[0])[1]
-            open_set = [item for item in open_set if item[1] != current]
+            _, current_g, current = heapq.heappop(open_set)
+            if current_g > g_score[current]:
+                continue
             
             if current == target_grid:
                 path = [current]
@@ -319,18 +475,22 @@ class Pathfinder:
                     self.maze.maze[neighbor[1]][neighbor[0]]):
                     continue
                 
-                tentative_g_score = g_score[current] + 1
+                tentative_g_score = current_g + 1
                 
                 if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + self.heuristic(neighbor, target_grid)
-                    
-                    if (f_score[neighbor], neighbor) not in open_set:
-                        open_set.append((f_score[neighbor], neighbor))
+                    heapq.heappush(open_set, (tentative_g_score + self.heuristic(neighbor, target_grid),
+                                              tentative_g_score, neighbor))
         
         return []
     
+    def find_corridor_path(self, start_x, start_y, target_x, target_y, max_cells=None):
+        """Find path on the junction graph, mapping only the first max_cells moves back to cells"""
+        start_grid = (int(start_x // self.maze.cell_size), int(start_y // self.maze.cell_size))
+        target_grid = (int(target_x // self.maze.cell_size), int(target_y // self.maze.cell_size))
+        return self.junction_graph.find_path(start_grid, target_grid, max_cells)
+    
     def heuristic(self, a, b):
         """Manhattan distance heuristic"""
         return abs(a[0] - b[0]) + abs(a[1] - b[1])
@@ -0,0 +1,165 @@
+import argparse
+import os
+import platform
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# MazeGenerator._prevent_trivial_solutions aims for this much winding but gives up after a few blocks,
+# so it is reported rather than checked; a trivial solution is one no longer than the Manhattan distance
+TARGET_SOLUTION_RATIO = 1.5
+
+CHECKS = ("border", "start_goal_open", "reachable", "connected", "non_trivial")
+
+def label_components(open_cells):
+    """Connected-component label per cell (-1 for walls) by vectorised union-find.
+
+    Every edge hooks the larger of its two roots onto the smaller, then
+    pointer jumping flattens the forest; rounds repeat only over edges
+    whose ends still disagree, so the work does not grow with the maze's
+    diameter the way a frontier flood does.
+    """
+    height, width = open_cells.shape
+    index = np.arange(height * width, dtype=np.int32).reshape(height, width)
+    horizontal = open_cells[:, :-1] & open_cells[:, 1:]
+    vertical = open_cells[:-1, :] & open_cells[1:, :]
+    a = np.concatenate([index[:, :-1][horizontal], index[:-1, :][vertical]])
+    b = np.concatenate([index[:, 1:][horizontal], index[1:, :][vertical]])
+    parent = index.ravel().copy()
+    while len(a):
+        root_a = parent[a]
+        root_b = parent[b]
+        pending = root_a != root_b
+        a, b, root_a, root_b = a[pending], b[pending], root_a[pending], root_b[pending]
+        if not len(a):
+            break
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    return np.where(open_cells.ravel(), parent, -1).reshape(height, width)
+
+def shortest_path_length(open_cells, start, goal):
+    """Steps from start to goal by an iterative breadth-first search, or -1 if unreachable"""
+    height, width = open_cells.shape
+    passable = bytearray(open_cells.astype(np.uint8).tobytes())
+    start_flat = start[1] * width + start[0]
+    goal_flat = goal[1] * width + goal[0]
+    if not passable[start_flat] or not passable[goal_flat]:
+        return -1
+    passable[start_flat] = 0
+    frontier = [start_flat]
+    distance = 0
+    while frontier:
+        if goal_flat in frontier:
+            return distance
+        distance += 1
+        next_frontier = []
+        for flat in frontier:
+            x = flat % width
+            if x > 0 and passable[flat - 1]:
+                passable[flat - 1] = 0
+                next_frontier.append(flat - 1)
+            if x < width - 1 and passable[flat + 1]:
+                passable[flat + 1] = 0
+                next_frontier.append(flat + 1)
+            if flat >= width and passable[flat - width]:
+                passable[flat - width] = 0
+                next_frontier.append(flat - width)
+            if flat + width < len(passable) and passable[flat + width]:
+                passable[flat + width] = 0
+                next_frontier.append(flat + width)
+        frontier = next_frontier
+    return -1
+
+def validate_maze(walls, start, goal):
+    """Check one maze given as a wall array and (x, y) start and goal cells.
+
+    Returns the result of every check in CHECKS plus the numbers behind them.
+    """
+    walls = np.asarray(walls, dtype=bool)
+    open_cells = ~walls
+    start_goal_open = bool(open_cells[start[1], start[0]] and open_cells[goal[1], goal[0]])
+    labels = label_components(open_cells)
+    component_count = len(np.unique(labels[open_cells]))
+    reachable = start_goal_open and labels[start[1], start[0]] == labels[goal[1], goal[0]]
+    solution_length = shortest_path_length(open_cells, start, goal) if reachable else -1
+    manhattan = abs(goal[0] - start[0]) + abs(goal[1] - start[1])
+    solution_ratio = solution_length / manhattan if manhattan and solution_length >= 0 else 0.0
+    return {
+        "border": bool(walls[0, :].all() and walls[-1, :].all() and walls[:, 0].all() and walls[:, -1].all()),
+        "start_goal_open": start_goal_open,
+        "reachable": bool(reachable),
+        "connected": component_count == 1,
+        "non_trivial": solution_length > manhattan,
+        "components": int(component_count),
+        "unreachable_cells": int((labels[open_cells] != labels[start[1], start[0]]).sum()),
+        "solution_length": int(solution_length),
+        "solution_ratio": solution_ratio,
+        "meets_ratio_target": solution_ratio >= TARGET_SOLUTION_RATIO,
+    }
+
+def failed_checks(result):
+    return [check for check in CHECKS if not result[check]]
+
+def generate_and_validate(seed, size):
+    """Generate a size x size cell maze for a seed and validate it, timing both steps"""
+    from maze_generator import MazeGenerator
+    started = time.perf_counter()
+    maze_generator = MazeGenerator(size, size, cell_size=1, rng=random.Random(seed))
+    maze_generator.generate_maze()
+    generated = time.perf_counter()
+    result = validate_maze(maze_generator.maze, maze_generator.start_pos, maze_generator.goal_pos)
+    result["seed"] = seed
+    result["size"] = size
+    result["generate_seconds"] = generated - started
+    result["validate_seconds"] = time.perf_counter() - generated
+    return result
+
+def _generate_and_validate_job(job):
+    return generate_and_validate(*job)
+
+def validate_batch(seeds, sizes, workers=None):
+    """Generate and validate one maze per seed and size across worker processes"""
+    jobs = [(seed, size) for size in sizes for seed in seeds]
+    if platform.system() == "Emscripten" or workers == 1 or len(jobs) < 2:
+        return [_generate_and_validate_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # Big mazes are whole jobs on their own; small ones are batched to save round trips
+        chunksize = max(1, min(16, 4_000_000 // max(1, max(sizes) ** 2)))
+        return list(executor.map(_generate_and_validate_job, jobs, chunksize=chunksize))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate mazes over many seeds and sizes and validate each one")
+    parser.add_argument("--seeds", type=int, default=1000, help="seeds per size")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[21, 81, 201], help="maze side lengths in cells")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = validate_batch(range(args.first_seed, args.first_seed + args.seeds), args.sizes, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print("Failures per check, mean solution ratio, share under the generator's target ratio and mean times:")
+    print(f"{'size':>6} {'mazes':>6} " + " ".join(f"{check:>15}" for check in CHECKS) +
+          f" {'ratio':>6} {'under':>6} {'generate':>10} {'validate':>10}")
+    for size in args.sizes:
+        sized = [result for result in results if result["size"] == size]
+        failures = [sum(not result[check] for result in sized) for check in CHECKS]
+        generate_ms = sum(result["generate_seconds"] for result in sized) / len(sized) * 1000
+        validate_ms = sum(result["validate_seconds"] for result in sized) / len(sized) * 1000
+        ratio = sum(result["solution_ratio"] for result in sized) / len(sized)
+        under = sum(not result["meets_ratio_target"] for result in sized) / len(sized)
+        print(f"{size:6d} {len(sized):6d} " + " ".join(f"{count:15d}" for count in failures) +
+              f" {ratio:6.2f} {under:6.1%} {generate_ms:8.1f}ms {validate_ms:8.1f}ms")
+    failing = [result for result in results if failed_checks(result)]
+    for result in failing[:10]:
+        print(f"  seed {result['seed']} size {result['size']}: failed {', '.join(failed_checks(result))}")
+    print(f"{len(results)} mazes in {elapsed:.1f} s ({len(results) / elapsed:.1f} mazes/s), {len(failing)} failing")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+import net_protocol as protocol
+
+class GameClient:
+    """A minimal network client: joins a room, sends held keys and mirrors the server's entities"""
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.welcome = None
+        self.entities = {}
+        self.server_tick = 0
+        self.snapshots = 0
+        self.bytes_received = 0
+        self.keys = 0
+        self._receiver = None
+
+    async def connect(self, host, port, room="lobby", level=1):
+        """Join a room and wait for the maze; snapshots are applied in the background afterwards"""
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(protocol.frame(protocol.JOIN, bytes([level]) + room.encode("utf-8")))
+        message_type, payload = await protocol.read_message(self.reader)
+        if message_type == protocol.ROOM_FULL:
+            self.writer.close()
+            raise ConnectionError(f"room {room!r} is full")
+        self.welcome = protocol.decode_welcome(payload)
+        self.bytes_received += protocol.HEADER.size + len(payload)
+        self._receiver = asyncio.create_task(self._receive())
+        return self.welcome
+
+    def send_keys(self, mask):
+        """Send the held keys (a KEY_* bitmask); unchanged keys are not resent"""
+        if mask != self.keys:
+            self.keys = mask
+            self.writer.write(protocol.frame(protocol.INPUT, bytes([mask])))
+
+    @property
+    def player(self):
+        return self.entities.get(self.welcome["player_id"]) if self.welcome else None
+
+    async def wait_for_tick(self, tick, timeout=5):
+        """Wait until a snapshot at or after a server tick has arrived"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.server_tick < tick:
+            if loop.time() > deadline or self._receiver.done():
+                raise TimeoutError(f"no snapshot for tick {tick}")
+            await asyncio.sleep(0.005)
+
+    async def _receive(self):
+        try:
+            while True:
+                message_type, payload = await protocol.read_message(self.reader)
+                self.bytes_received += protocol.HEADER.size + len(payload)
+                if message_type == protocol.SNAPSHOT:
+                    self.server_tick = protocol.apply_snapshot(payload, self.entities)
+                    self.snapshots += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def close(self):
+        if self._receiver is not None:
+            self._receiver.cancel()
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
@@ -0,0 +1,150 @@
+import struct
+import zlib
+
+# Every message is a 1-byte type and a 2-byte payload length followed by the payload
+HEADER = struct.Struct("!BH")
+
+# Client to server
+JOIN = 1  # level:uint8, room name:utf-8
+INPUT = 2  # held keys:uint8 bitmask
+
+# Server to client
+WELCOME = 16  # see encode_welcome; sent once per client, carries the maze
+SNAPSHOT = 17  # see encode_snapshot; a delta against the previous snapshot sent to that client
+ROOM_FULL = 18
+
+KEY_LEFT = 1
+KEY_RIGHT = 2
+KEY_UP = 4
+KEY_DOWN = 8
+
+# Entity flags
+FLAG_ENEMY = 1
+FLAG_SPAWNED = 2
+FLAG_TRACKING = 4
+FLAG_FINISHED = 8
+FLAG_CAUGHT = 16
+
+# Per-entity change mask in a snapshot
+CHANGE_FLAGS = 1
+CHANGE_STEP = 2  # position as signed 8-bit deltas
+CHANGE_POSITION = 4  # position as absolute unsigned 16-bit values
+CHANGE_REMOVED = 8
+
+WELCOME_FIXED = struct.Struct("!BBHHBHHHH")
+SNAPSHOT_FIXED = struct.Struct("!IB")
+
+def frame(message_type, payload=b""):
+    return HEADER.pack(message_type, len(payload)) + payload
+
+async def read_message(reader):
+    """Read one framed message from an asyncio stream; returns (type, payload)"""
+    header = await reader.readexactly(HEADER.size)
+    message_type, length = HEADER.unpack(header)
+    payload = await reader.readexactly(length) if length else b""
+    return message_type, payload
+
+def pack_grid(maze, width, height):
+    """Walls as one bit per cell, zlib-compressed"""
+    bits = bytearray((width * height + 7) // 8)
+    index = 0
+    for y in range(height):
+        row = maze[y]
+        for x in range(width):
+            if row[x]:
+                bits[index >> 3] |= 1 << (index & 7)
+            index += 1
+    return zlib.compress(bytes(bits), 9)
+
+def unpack_grid(data, width, height):
+    bits = zlib.decompress(data)
+    return [[bool(bits[(y * width + x) >> 3] & (1 << ((y * width + x) & 7))) for x in range(width)]
+            for y in range(height)]
+
+def encode_welcome(player_id, level, maze_generator, grid=None):
+    """The join reply; grid is the pack_grid result, which a room can compute once for all its players"""
+    if grid is None:
+        grid = pack_grid(maze_generator.maze, maze_generator.maze_width, maze_generator.maze_height)
+    start_x, start_y = maze_generator.start_pos
+    goal_x, goal_y = maze_generator.goal_pos
+    return frame(WELCOME, WELCOME_FIXED.pack(player_id, level, maze_generator.maze_width, maze_generator.maze_height,
+                                             maze_generator.cell_size, start_x, start_y, goal_x, goal_y) + grid)
+
+def decode_welcome(payload):
+    player_id, level, width, height, cell_size, start_x, start_y, goal_x, goal_y = WELCOME_FIXED.unpack_from(payload)
+    return {
+        "player_id": player_id,
+        "level": level,
+        "maze_width": width,
+        "maze_height": height,
+        "cell_size": cell_size,
+        "start_pos": (start_x, start_y),
+        "goal_pos": (goal_x, goal_y),
+        "maze": unpack_grid(payload[WELCOME_FIXED.size:], width, height),
+    }
+
+def encode_snapshot(tick, entities, baseline):
+    """Encode the entities that differ from baseline, then bring baseline up to date.
+
+    entities and baseline map entity id -> (flags, x, y). Over an ordered
+    stream every snapshot is decoded against the previous one, so only
+    changes are sent: small moves as 8-bit steps, larger ones as absolute
+    positions, and removals as a bare id.
+    """
+    body = bytearray()
+    count = 0
+    for entity_id, (flags, x, y) in entities.items():
+        previous = baseline.get(entity_id)
+        if previous == (flags, x, y):
+            continue
+        change = 0
+        fields = bytearray()
+        if previous is None or previous[0] != flags:
+            change |= CHANGE_FLAGS
+            fields.append(flags)
+        if previous is None or (x, y) != previous[1:]:
+            dx = x - previous[1] if previous is not None else 256
+            dy = y - previous[2] if previous is not None else 256
+            if -128 <= dx < 128 and -128 <= dy < 128:
+                change |= CHANGE_STEP
+                fields += struct.pack("!bb", dx, dy)
+            else:
+                change |= CHANGE_POSITION
+                fields += struct.pack("!HH", x, y)
+        body.append(entity_id)
+        body.append(change)
+        body += fields
+        baseline[entity_id] = (flags, x, y)
+        count += 1
+    for entity_id in [entity_id for entity_id in baseline if entity_id not in entities]:
+        body.append(entity_id)
+        body.append(CHANGE_REMOVED)
+        del baseline[entity_id]
+        count += 1
+    return frame(SNAPSHOT, SNAPSHOT_FIXED.pack(tick, count) + bytes(body))
+
+def apply_snapshot(payload, entities):
+    """Apply a snapshot delta to a client's entity dict in place; returns the server tick"""
+    tick, count = SNAPSHOT_FIXED.unpack_from(payload)
+    offset = SNAPSHOT_FIXED.size
+    for _ in range(count):
+        entity_id = payload[offset]
+        change = payload[offset + 1]
+        offset += 2
+        if change & CHANGE_REMOVED:
+            entities.pop(entity_id, None)
+            continue
+        flags, x, y = entities.get(entity_id, (0, 0, 0))
+        if change & CHANGE_FLAGS:
+            flags = payload[offset]
+            offset += 1
+        if change & CHANGE_STEP:
+            dx, dy = struct.unpack_from("!bb", payload, offset)
+            x += dx
+            y += dy
+            offset += 2
+        elif change & CHANGE_POSITION:
+            x, y = struct.unpack_from("!HH", payload, offset)
+            offset += 4
+        entities[entity_id] = (flags, x, y)
+    return tick
@@ -0,0 +1,89 @@
+GOLDEN_RATIO_FRACTION = 0.6180339887
+
+class PathScheduler:
+    """Spreads path refreshes over ticks and shares a per-frame node-expansion budget.
+
+    Requesters get a fixed slot on registration, which staggers their
+    refresh ticks deterministically. Queued searches are resumable: each
+    job is called with the budget left this frame and reports how many
+    expansions it used and whether it finished. Unfinished jobs keep their
+    place and continue next frame, nearest-to-player first.
+    """
+    def __init__(self, expansion_budget=400, aging=8.0):
+        self.expansion_budget = expansion_budget
+        self.aging = aging
+        self.slots = {}
+        self.jobs = {}  # requester -> [priority, queued tick, job]
+
+        self.expansions_this_tick = 0
+        self.max_expansions_per_tick = 0
+        self.jobs_finished = 0
+        self.jobs_carried_over = 0
+
+    def register(self, requester):
+        if requester not in self.slots:
+            self.slots[requester] = len(self.slots)
+
+    def unregister(self, requester):
+        self.slots.pop(requester, None)
+        self.jobs.pop(requester, None)
+
+    def cancel(self, requester):
+        """Drop a queued job but keep the requester's slot"""
+        self.jobs.pop(requester, None)
+
+    def is_due(self, requester, tick, period, since=None):
+        """True if one of this requester's staggered refresh ticks falls in (since, tick].
+
+        since defaults to the previous tick, so callers that check every tick
+        see exactly their own refresh ticks.
+        """
+        self.register(requester)
+        if since is None:
+            since = tick - 1
+        # Golden-ratio offsets stay evenly spread however many requesters register
+        offset = int((self.slots[requester] * GOLDEN_RATIO_FRACTION) % 1.0 * period)
+        return (tick + offset) // period > (since + offset) // period
+
+    def request(self, requester, tick, priority, job):
+        """Queue or re-prioritise a resumable job; job(budget) returns (finished, expansions used)"""
+        self.register(requester)
+        if requester in self.jobs:
+            self.jobs[requester][0] = priority
+            self.jobs[requester][2] = job
+        else:
+            self.jobs[requester] = [priority, tick, job]
+
+    def is_queued(self, requester):
+        return requester in self.jobs
+
+    def run(self, tick):
+        """Run queued jobs within this frame's budget, lowest priority value first"""
+        self.expansions_this_tick = 0
+        if not self.jobs:
+            return
+        budget = self.expansion_budget
+        # Waiting jobs slowly gain priority so distant requesters are never starved
+        order = sorted(self.jobs.items(),
+                       key=lambda item: (item[1][0] - (tick - item[1][1]) * self.aging, self.slots[item[0]]))
+        for requester, (priority, queued_tick, job) in order:
+            if budget <= 0:
+                break
+            finished, used = job(budget)
+            budget -= used
+            self.expansions_this_tick += used
+            if finished:
+                del self.jobs[requester]
+                self.jobs_finished += 1
+
+        self.jobs_carried_over += len(self.jobs)
+        self.max_expansions_per_tick = max(self.max_expansions_per_tick, self.expansions_this_tick)
+
+    def get_stats(self):
+        return {
+            "queued": len(self.jobs),
+            "expansions_this_tick": self.expansions_this_tick,
+            "max_expansions_per_tick": self.max_expansions_per_tick,
+            "jobs_finished": self.jobs_finished,
+            "jobs_carried_over": self.jobs_carried_over,
+        }
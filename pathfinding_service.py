@@ -0,0 +1,162 @@
+import platform
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from hierarchical_pathfinder import HierarchicalPathfinder
+from maze_generator import Pathfinder
+
+HIERARCHICAL_RANGE = 32  # Requests further apart than this many cells (Manhattan) follow an HPA* route
+
+class MazeSnapshot:
+    """Read-only copy of the maze grid that worker threads can search safely"""
+    def __init__(self, maze_generator):
+        self.maze = tuple(tuple(row) for row in maze_generator.maze)
+        self.maze_width = maze_generator.maze_width
+        self.maze_height = maze_generator.maze_height
+        self.cell_size = maze_generator.cell_size
+        self.start_pos = maze_generator.start_pos
+        self.goal_pos = maze_generator.goal_pos
+        # The game builds HPA* with the maze, and the snapshot shares it; otherwise a worker builds its own
+        self._hierarchical = maze_generator._hierarchical
+
+    @property
+    def hierarchical(self):
+        if self._hierarchical is None:
+            self._hierarchical = HierarchicalPathfinder(self)
+        return self._hierarchical
+
+class PathfindingService:
+    """Solves path requests off the frame loop and hands results back by tick number.
+
+    Each requester has at most one live request; submitting again supersedes
+    the older one. Results older than max_age ticks are discarded as stale.
+    Without thread support (the Emscripten build) requests are solved inline,
+    as they are when inline=True is passed for reproducible headless runs.
+    """
+    def __init__(self, maze_generator, workers=1, max_queue=64, max_age=90, inline=None):
+        self.snapshot = MazeSnapshot(maze_generator)
+        self.max_queue = max_queue
+        self.max_age = max_age
+        self.inline = platform.system() == "Emscripten" if inline is None else inline
+        self.executor = None if self.inline else ThreadPoolExecutor(max_workers=workers)
+
+        self._pathfinder = None
+        self._pathfinder_lock = threading.Lock()
+        self._completed = deque()
+        self._results = {}
+        self._latest_request = {}
+        self._next_request_id = 0
+        self.pending = 0
+
+        self.submitted = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.stale = 0
+        self.failed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency_ticks = 0
+
+    def submit(self, requester, tick, start_grid, target_grid, max_cells=None):
+        """Queue a path request; returns False if it was dropped because the queue is full"""
+        if self.pending >= self.max_queue:
+            self.dropped += 1
+            return False
+
+        if requester in self._latest_request:
+            # The older request is still in flight; its result will be ignored
+            self.dropped += 1
+
+        request_id = self._next_request_id
+        self._next_request_id += 1
+        self._latest_request[requester] = request_id
+        self.submitted += 1
+        self.pending += 1
+
+        request = (requester, request_id, tick, start_grid, target_grid, max_cells, time.perf_counter())
+        if self.inline:
+            try:
+                self._completed.append(self._solve(request))
+            except Exception:
+                self._completed.append(self._failed(request))
+        else:
+            self.executor.submit(self._solve, request).add_done_callback(
+                lambda future: self._on_done(future, request))
+        return True
+
+    def poll(self, tick):
+        """Collect finished results as {requester: (path, request_tick)}; the dict is reused by the next poll"""
+        results = self._results
+        results.clear()
+        while self._completed:
+            requester, request_id, request_tick, path, latency = self._completed.popleft()
+            self.pending -= 1
+            if self._latest_request.get(requester) != request_id:
+                continue
+            del self._latest_request[requester]
+            if tick - request_tick > self.max_age:
+                self.stale += 1
+                continue
+
+            self.delivered += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.total_latency_ticks += tick - request_tick
+            results[requester] = (path, request_tick)
+        return results
+
+    def cancel(self, requester):
+        """Forget a requester's request in flight; its result is ignored when it arrives"""
+        if self._latest_request.pop(requester, None) is not None:
+            self.dropped += 1
+
+    def is_pending(self, requester):
+        return requester in self._latest_request
+
+    def get_stats(self):
+        delivered = max(1, self.delivered)
+        return {
+            "queue_depth": self.pending,
+            "submitted": self.submitted,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "stale": self.stale,
+            "failed": self.failed,
+            "mean_latency_ms": self.total_latency / delivered * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+            "mean_latency_ticks": self.total_latency_ticks / delivered,
+        }
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, future, request):
+        if future.cancelled():
+            return
+        try:
+            self._completed.append(future.result())
+        except Exception:
+            # Still hand back an (empty) result so the request is cleared and the requester can ask again
+            self._completed.append(self._failed(request))
+
+    def _failed(self, request):
+        requester, request_id, tick, _, _, _, submitted_at = request
+        self.failed += 1
+        return requester, request_id, tick, [], time.perf_counter() - submitted_at
+
+    def _solve(self, request):
+        requester, request_id, tick, start_grid, target_grid, max_cells, submitted_at = request
+        long_range = abs(start_grid[0] - target_grid[0]) + abs(start_grid[1] - target_grid[1]) > HIERARCHICAL_RANGE
+        with self._pathfinder_lock:
+            # The junction graph and HPA* are compiled lazily on the worker, not on the frame loop
+            if self._pathfinder is None:
+                self._pathfinder = Pathfinder(self.snapshot)
+            hierarchical = self.snapshot.hierarchical if long_range else None
+        if hierarchical is not None:
+            # Refine only the first max_cells steps of the route across the clusters
+            path = hierarchical.get_next_steps(start_grid, target_grid, max_cells)
+        else:
+            path = self._pathfinder.junction_graph.find_path(start_grid, target_grid, max_cells)
+        return requester, request_id, tick, path, time.perf_counter() - submitted_at
@@ -0,0 +1,68 @@
+from collections import deque
+
+class QualityGovernor:
+    """Steps optional work down when frames run over budget and back up when there is headroom.
+
+    levels is a sequence of settings dicts, best quality first. A step down
+    needs a window of frames averaging over the budget; a step up needs a
+    longer stretch averaging under budget * headroom. Both windows restart
+    after every change, so the level settles instead of oscillating around
+    the limit.
+    """
+    def __init__(self, levels, budget_ms, window=30, upgrade_window=240, headroom=0.6, history_size=64):
+        self.levels = levels
+        self.budget_ms = budget_ms
+        self.window = window
+        self.upgrade_window = upgrade_window
+        self.headroom = headroom
+        self.level = 0
+        self.pinned = False
+        self.frames = 0
+        self.recent = deque(maxlen=window)
+        self.sustained = deque(maxlen=upgrade_window)
+        self.history = deque(maxlen=history_size)
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def pin(self, level):
+        """Hold a fixed level (for tuning); record() then only measures"""
+        if not 0 <= level < len(self.levels):
+            raise ValueError(f"quality level {level} is out of range 0-{len(self.levels) - 1}")
+        self._change(level, None)
+        self.pinned = True
+
+    def record(self, frame_ms):
+        """Add one frame's work time; returns the new settings when the level changes, otherwise None"""
+        self.frames += 1
+        self.recent.append(frame_ms)
+        self.sustained.append(frame_ms)
+        if self.pinned or len(self.recent) < self.window:
+            return None
+        recent_ms = sum(self.recent) / self.window
+        if recent_ms > self.budget_ms and self.level < len(self.levels) - 1:
+            return self._change(self.level + 1, recent_ms)
+        if len(self.sustained) == self.upgrade_window and self.level > 0:
+            sustained_ms = sum(self.sustained) / self.upgrade_window
+            if sustained_ms < self.budget_ms * self.headroom:
+                return self._change(self.level - 1, sustained_ms)
+        return None
+
+    def _change(self, level, frame_ms):
+        self.history.append({"frame": self.frames, "from": self.level, "to": level,
+                             "name": self.levels[level]["name"], "frame_ms": frame_ms})
+        self.level = level
+        self.recent.clear()
+        self.sustained.clear()
+        return self.settings
+
+    def get_stats(self):
+        return {
+            "level": self.level,
+            "name": self.settings["name"],
+            "frames": self.frames,
+            "recent_ms": sum(self.recent) / len(self.recent) if self.recent else 0.0,
+            "budget_ms": self.budget_ms,
+            "changes": len(self.history),
+        }
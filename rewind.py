@@ -0,0 +1,107 @@
+import random
+import struct
+import numpy as np
+
+# One record per tick: a header, then one fixed slot per enemy the run started with
+HEADER = struct.Struct("<iHxx4d")  # tick, enemy slots, elapsed seconds, distance travelled, player x, y
+ENEMY = struct.Struct("<4d7iB7x")  # x, y, direction x, y, ENEMY_TIMERS, flags
+ENEMY_TIMERS = ("spawn_timer", "tracking_timer", "tracking_chance_timer", "safe_zone_timer",
+                "direction_change_timer", "stuck_counter", "last_decision_tick")
+FLAG_ALIVE = 1
+FLAG_SPAWNED = 2
+FLAG_TRACKING = 4
+
+HEADER_DTYPE = np.dtype([("tick", "<i4"), ("enemy_slots", "<u2"), ("pad", "V2"), ("elapsed", "<f8"),
+                         ("distance", "<f8"), ("player_x", "<f8"), ("player_y", "<f8")])
+ENEMY_DTYPE = np.dtype([("x", "<f8"), ("y", "<f8"), ("direction_x", "<f8"), ("direction_y", "<f8")] +
+                       [(name, "<i4") for name in ENEMY_TIMERS] + [("flags", "u1"), ("pad", "V7")])
+
+def frame_dtype(max_enemies):
+    return np.dtype([("header", HEADER_DTYPE), ("enemies", ENEMY_DTYPE, (max_enemies,))])
+
+class SnapshotRing:
+    """The last capacity ticks of a run as fixed-size records in one preallocated buffer.
+
+    capture() packs the player, every enemy's position, heading, timers and
+    flags, and the run's clock into the next record with precompiled
+    structs, so a tick costs a few attribute reads per enemy and keeps no
+    per-tick objects. The module RNG's state is large to copy, so it is kept only
+    every rng_every ticks and restores land on those keyframes. frames is
+    a NumPy view of the same buffer for inspection.
+    """
+    def __init__(self, capacity, max_enemies, rng_every=15, rng=random):
+        self.capacity = capacity
+        self.max_enemies = max_enemies
+        self.rng_every = rng_every
+        self.rng = rng
+        self.record_size = HEADER.size + max_enemies * ENEMY.size
+        self.buffer = bytearray(capacity * self.record_size)
+        self.frames = np.frombuffer(self.buffer, dtype=frame_dtype(max_enemies))
+        self.rng_states = [None] * capacity
+        self.count = 0  # Records captured; the newest is at (count - 1) % capacity
+        self.first = 0  # Oldest record still held
+        self.restores = 0
+
+    def capture(self, tick, elapsed, distance, player, roster):
+        """Record one tick; roster holds every enemy the run started with, removed ones included"""
+        slot = self.count % self.capacity
+        offset = slot * self.record_size
+        HEADER.pack_into(self.buffer, offset, tick, len(roster), elapsed, distance, player.x, player.y)
+        offset += HEADER.size
+        pack = ENEMY.pack_into
+        buffer = self.buffer
+        for enemy in roster:
+            pack(buffer, offset, enemy.x, enemy.y, enemy.direction_x, enemy.direction_y,
+                 enemy.spawn_timer, enemy.tracking_timer, enemy.tracking_chance_timer, enemy.safe_zone_timer,
+                 enemy.direction_change_timer, enemy.stuck_counter, enemy.last_decision_tick,
+                 (0 if enemy.removed else FLAG_ALIVE) | (FLAG_SPAWNED if enemy.is_spawned else 0) |
+                 (FLAG_TRACKING if enemy.is_tracking else 0))
+            offset += ENEMY.size
+        self.rng_states[slot] = self.rng.getstate() if self.count % self.rng_every == 0 else None
+        self.count += 1
+        self.first = max(self.first, self.count - self.capacity)
+
+    def __len__(self):
+        return self.count - self.first
+
+    def find(self, ticks_back):
+        """Index of the newest RNG keyframe at least ticks_back records old, or the oldest keyframe held"""
+        index = max(self.first, self.count - 1 - ticks_back)
+        while index >= self.first:
+            if self.rng_states[index % self.capacity] is not None:
+                return index
+            index -= 1
+        for index in range(max(self.first, self.count - 1 - ticks_back), self.count):
+            if self.rng_states[index % self.capacity] is not None:
+                return index
+        return None
+
+    def restore(self, ticks_back, player, roster):
+        """Put the player, the roster's enemies and the RNG back as they were ticks_back ticks ago.
+
+        Enemies removed since then come back. Records newer than the
+        restored one are dropped. Returns the restored header (tick, enemy
+        slots, elapsed, distance, player x, y), or None if nothing is held.
+        """
+        index = self.find(ticks_back)
+        if index is None:
+            return None
+        slot = index % self.capacity
+        offset = slot * self.record_size
+        header = HEADER.unpack_from(self.buffer, offset)
+        player.x, player.y = header[4], header[5]
+        offset += HEADER.size
+        for enemy in roster[:header[1]]:
+            values = ENEMY.unpack_from(self.buffer, offset)
+            offset += ENEMY.size
+            enemy.x, enemy.y, enemy.direction_x, enemy.direction_y = values[:4]
+            for name, value in zip(ENEMY_TIMERS, values[4:11]):
+                setattr(enemy, name, value)
+            flags = values[11]
+            enemy.removed = not flags & FLAG_ALIVE
+            enemy.is_spawned = bool(flags & FLAG_SPAWNED)
+            enemy.is_tracking = bool(flags & FLAG_TRACKING)
+        self.rng.setstate(self.rng_states[slot])
+        self.count = index + 1
+        self.restores += 1
+        return header
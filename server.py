@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+from contextlib import contextmanager
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+import main
+import net_protocol as protocol
+from camera import Camera
+from distance_oracle import DistanceOracle
+from line_of_sight import LineOfSight
+from maze_generator import Pathfinder
+from path_scheduler import PathScheduler
+from pathfinding_service import PathfindingService
+
+TICK_RATE = 60
+SNAPSHOT_EVERY = 2  # Ticks between snapshots (30 per second)
+MAX_PLAYERS_PER_ROOM = 8
+MAX_CATCH_UP_TICKS = 5  # A loop further behind than this skips ticks instead of bursting
+MAX_CLIENT_BACKLOG = 64 * 1024  # Bytes queued for a client before its snapshots are held back
+ENEMY_ID_BASE = 128
+
+# The game keeps one match in module globals of main; each room owns its own copy of every one
+# the player and enemy code reads or writes, and Room.__init__ sets all of them
+ROOM_GLOBALS = ("maze_generator", "camera", "pathfinder", "line_of_sight", "path_service", "path_scheduler",
+                "solution_path", "frame_tick", "distance_traveled", "ai_decisions", "quality", "telemetry",
+                "enemy_roster", "snapshot_ring", "endless_world")
+
+class InputKeys:
+    """Stands in for pygame.key.get_pressed() with a client's key bitmask"""
+    KEYS = {pygame.K_LEFT: protocol.KEY_LEFT, pygame.K_RIGHT: protocol.KEY_RIGHT,
+            pygame.K_UP: protocol.KEY_UP, pygame.K_DOWN: protocol.KEY_DOWN}
+
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        return bool(self.mask & self.KEYS.get(key, 0))
+
+class RemotePlayer:
+    def __init__(self, player_id, writer, player):
+        self.player_id = player_id
+        self.writer = writer
+        self.player = player
+        self.keys = InputKeys()
+        self.finished_tick = None
+        self.caught_tick = None
+        self.baseline = {}
+
+    @property
+    def active(self):
+        return self.finished_tick is None and self.caught_tick is None
+
+def build_room_maze(level, seed=None):
+    """The maze, its solution and its distance oracle; touches no game state, so it can run off the tick loop"""
+    maze_generator, solution_path = main.build_maze(level, rng=random.Random(seed))
+    oracle = DistanceOracle(maze_generator.maze, maze_generator.maze_width, maze_generator.maze_height)
+    return maze_generator, solution_path, oracle
+
+class Room:
+    """One shared maze: its players race to the goal while the same enemies chase all of them.
+
+    The single-player game logic in main runs unchanged; a room swaps its
+    own maze, planners and tick counter into main while it steps, which is
+    safe because a step never awaits.
+    """
+    def __init__(self, name, level, built=None):
+        self.name = name
+        self.level = level
+        self.players = {}
+        self.state = {}
+        self.tick = 0
+        maze_generator, solution_path, self.oracle = built or build_room_maze(level)
+        with self.active():
+            main.maze_generator = maze_generator
+            main.solution_path = solution_path
+            # The whole maze counts as on screen, so AI level of detail goes by distance alone
+            main.camera = Camera(0, 0, maze_generator.width, maze_generator.height,
+                                 maze_generator.width, maze_generator.height)
+            main.pathfinder = Pathfinder(maze_generator)
+            main.line_of_sight = LineOfSight(maze_generator.maze, maze_generator.maze_width,
+                                             maze_generator.maze_height)
+            main.path_service = PathfindingService(maze_generator, inline=True)
+            main.path_scheduler = PathScheduler(main.PATH_EXPANSION_BUDGET)
+            main.frame_tick = 0
+            main.distance_traveled = 0
+            main.ai_decisions = 0
+            # Rooms run at full quality, record no telemetry and cannot rewind
+            main.quality = main.QUALITY_LEVELS[0]
+            main.telemetry = None
+            main.snapshot_ring = None
+            main.endless_world = None
+            self.enemies = []
+            for i in range(main.DIFFICULTY_SETTINGS[level]["enemies"]):
+                enemy = main.Enemy(level, main.CELL_SIZES[level])
+                enemy.spawn_timer = -(i * 180)
+                self.enemies.append(enemy)
+            main.enemy_roster = list(self.enemies)
+        self.welcome_grid = protocol.pack_grid(maze_generator.maze, maze_generator.maze_width,
+                                               maze_generator.maze_height)
+
+    @contextmanager
+    def active(self):
+        saved = {name: getattr(main, name) for name in ROOM_GLOBALS}
+        for name, value in self.state.items():
+            setattr(main, name, value)
+        try:
+            yield
+        finally:
+            for name in ROOM_GLOBALS:
+                self.state[name] = getattr(main, name)
+                setattr(main, name, saved[name])
+
+    def add_player(self, writer):
+        """Seat a new player at the start; returns None when the room is full"""
+        if len(self.players) >= MAX_PLAYERS_PER_ROOM:
+            return None
+        player_id = next(i for i in range(MAX_PLAYERS_PER_ROOM) if i not in self.players)
+        with self.active():
+            remote = RemotePlayer(player_id, writer, main.Player(main.CELL_SIZES[self.level]))
+        self.players[player_id] = remote
+        return remote
+
+    def remove_player(self, player_id):
+        self.players.pop(player_id, None)
+
+    def step(self):
+        """Advance one tick: players, path results, enemies chasing their nearest player, then the search budget"""
+        with self.active():
+            for remote in self.players.values():
+                if remote.active and remote.player.move(remote.keys) == "goal":
+                    remote.finished_tick = self.tick
+
+            main.frame_tick += 1
+            self.tick = main.frame_tick
+            for enemy, (path_result, request_tick) in main.path_service.poll(main.frame_tick).items():
+                enemy.receive_goal_path(path_result)
+
+            chased = [remote for remote in self.players.values() if remote.active]
+            if chased:
+                cell_size = main.maze_generator.cell_size
+                cells = [(int(remote.player.x // cell_size), int(remote.player.y // cell_size)) for remote in chased]
+                for enemy in self.enemies:
+                    # Chase whoever is closest through the maze, not through the walls
+                    index, _ = self.oracle.nearest((int(enemy.x // cell_size), int(enemy.y // cell_size)), cells)
+                    target = chased[index or 0].player
+                    enemy.move(target.x, target.y)
+                    if enemy.is_spawned:
+                        for remote in chased:
+                            if remote.caught_tick is None and enemy.rect.colliderect(remote.player.rect):
+                                remote.caught_tick = self.tick
+
+            main.path_scheduler.run(main.frame_tick)
+
+    def entities(self):
+        """Entity id -> (flags, x, y) for every player and enemy in the room"""
+        entities = {}
+        for player_id, remote in self.players.items():
+            flags = 0
+            if remote.finished_tick is not None:
+                flags |= protocol.FLAG_FINISHED
+            if remote.caught_tick is not None:
+                flags |= protocol.FLAG_CAUGHT
+            entities[player_id] = (flags, int(remote.player.x), int(remote.player.y))
+        for index, enemy in enumerate(self.enemies):
+            flags = protocol.FLAG_ENEMY
+            if enemy.is_spawned:
+                flags |= protocol.FLAG_SPAWNED
+            if enemy.is_tracking:
+                flags |= protocol.FLAG_TRACKING
+            entities[ENEMY_ID_BASE + index] = (flags, int(enemy.x), int(enemy.y))
+        return entities
+
+    def welcome(self, remote):
+        return protocol.encode_welcome(remote.player_id, self.level, self.state["maze_generator"], self.welcome_grid)
+
+    def close(self):
+        self.state["path_service"].shutdown()
+
+class GameServer:
+    """Hosts many rooms in one process and steps all of them from a single tick loop"""
+    def __init__(self, tick_rate=TICK_RATE, snapshot_every=SNAPSHOT_EVERY):
+        self.tick_rate = tick_rate
+        self.snapshot_every = snapshot_every
+        self.rooms = {}
+        self.pending_rooms = {}
+        self.server = None
+        self.tick = 0
+        self.running = False
+        self.tick_times = []
+        self.jitters = []
+        self.skipped_ticks = 0
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+        self.snapshots_held = 0
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.running = True
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.running = False
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for room in self.rooms.values():
+            room.close()
+        self.rooms.clear()
+
+    async def get_room(self, name, level):
+        """Find or open a room; a new maze is built on a worker thread so other rooms keep ticking"""
+        room = self.rooms.get(name)
+        if room is not None:
+            return room
+        pending = self.pending_rooms.get(name)
+        if pending is None:
+            pending = self.pending_rooms[name] = asyncio.get_running_loop().run_in_executor(None, build_room_maze, level)
+        built = await pending
+        self.pending_rooms.pop(name, None)
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.rooms[name] = Room(name, level, built)
+        return room
+
+    async def handle_client(self, reader, writer):
+        room = remote = None
+        try:
+            message_type, payload = await protocol.read_message(reader)
+            if message_type != protocol.JOIN:
+                return
+            level = payload[0] if payload and payload[0] in main.DIFFICULTY_SETTINGS else 1
+            room = await self.get_room(payload[1:].decode("utf-8", "replace"), level)
+            remote = room.add_player(writer)
+            if remote is None:
+                writer.write(protocol.frame(protocol.ROOM_FULL))
+                return
+            # The maze goes out exactly once; afterwards only snapshot deltas follow
+            writer.write(room.welcome(remote))
+            while True:
+                message_type, payload = await protocol.read_message(reader)
+                if message_type == protocol.INPUT and payload:
+                    remote.keys.mask = payload[0]
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if remote is not None:
+                room.remove_player(remote.player_id)
+                if not room.players and self.rooms.get(room.name) is room:
+                    del self.rooms[room.name]
+                    room.close()
+            writer.close()
+
+    def step(self):
+        """Step every room once, then send snapshots on snapshot ticks"""
+        self.tick += 1
+        send = self.tick % self.snapshot_every == 0
+        for room in list(self.rooms.values()):
+            room.step()
+            if send:
+                self.broadcast(room)
+
+    def broadcast(self, room):
+        entities = room.entities()
+        for remote in room.players.values():
+            transport = remote.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG:
+                # A slow client skips snapshots; the next one is a delta against what it last received
+                self.snapshots_held += 1
+                continue
+            message = protocol.encode_snapshot(room.tick, entities, remote.baseline)
+            remote.writer.write(message)
+            self.bytes_sent += len(message)
+            self.snapshots_sent += 1
+
+    async def run(self):
+        """The shared tick loop; deadlines are absolute so lateness does not accumulate as drift"""
+        loop = asyncio.get_running_loop()
+        period = 1 / self.tick_rate
+        deadline = loop.time()
+        while self.running:
+            deadline += period
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            started = loop.time()
+            lateness = started - deadline
+            if lateness > period * MAX_CATCH_UP_TICKS:
+                skipped = int(lateness / period)
+                self.skipped_ticks += skipped
+                deadline += skipped * period
+            self.jitters.append(max(0.0, started - deadline))
+            self.step()
+            self.tick_times.append(loop.time() - started)
+
+    def reset_stats(self):
+        self.tick_times = []
+        self.jitters = []
+        self.skipped_ticks = 0
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+        self.snapshots_held = 0
+
+    def get_stats(self):
+        tick_ms = sorted(value * 1000 for value in self.tick_times) or [0.0]
+        jitter_ms = sorted(value * 1000 for value in self.jitters) or [0.0]
+        rooms = len(self.rooms)
+        return {
+            "rooms": rooms,
+            "players": sum(len(room.players) for room in self.rooms.values()),
+            "ticks": len(self.tick_times),
+            "tick_mean_ms": statistics.mean(tick_ms),
+            "tick_p99_ms": tick_ms[int(len(tick_ms) * 0.99)],
+            "room_tick_ms": statistics.mean(tick_ms) / max(1, rooms),
+            "jitter_mean_ms": statistics.mean(jitter_ms),
+            "jitter_p99_ms": jitter_ms[int(len(jitter_ms) * 0.99)],
+            "jitter_max_ms": jitter_ms[-1],
+            "skipped_ticks": self.skipped_ticks,
+            "snapshots_sent": self.snapshots_sent,
+            "snapshots_held": self.snapshots_held,
+            "bytes_per_snapshot": self.bytes_sent / max(1, self.snapshots_sent),
+        }
+
+async def serve(host, port):
+    server = GameServer()
+    port = await server.start(host, port)
+    print(f"Serving on {host}:{port}")
+    try:
+        await server.run()
+    finally:
+        await server.stop()
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Run the authoritative multiplayer server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    main.headless = True
+    asyncio.run(serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,228 @@
+import argparse
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from net_protocol import FLAG_ENEMY, FLAG_SPAWNED, FLAG_TRACKING, FLAG_FINISHED, FLAG_CAUGHT
+
+# Block layout: HEADER_DTYPE, then the maze grid (one byte per cell, row-major, 1 = wall), then the entity table.
+# LAYOUT_VERSION changes whenever either dtype does, so readers refuse a block they would misread.
+MAGIC = b"MZST"
+LAYOUT_VERSION = 1
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"), ("layout", "<u4"),
+    ("sequence", "<u8"),  # Seqlock: odd while the publisher is writing
+    ("maze_version", "<u4"), ("maze_width", "<u4"), ("maze_height", "<u4"), ("cell_size", "<u4"),
+    ("start_x", "<i4"), ("start_y", "<i4"), ("goal_x", "<i4"), ("goal_y", "<i4"),
+    ("tick", "<u4"), ("game_state", "<u4"), ("entity_count", "<u4"),
+    ("max_entities", "<u4"), ("max_maze_cells", "<u4"), ("pad", "V4"),
+])
+ENTITY_DTYPE = np.dtype([("id", "<u2"), ("flags", "<u2"), ("x", "<f4"), ("y", "<f4")])
+
+PLAYER_ID = 0
+ENEMY_ID_BASE = 128  # Matches server.ENEMY_ID_BASE
+
+# Blocks created by publishers in this process
+_published = set()
+
+def block_size(max_maze_cells, max_entities):
+    return HEADER_DTYPE.itemsize + max_maze_cells + max_entities * ENTITY_DTYPE.itemsize
+
+def _views(buffer, max_maze_cells, max_entities):
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+    grid = np.ndarray((max_maze_cells,), dtype=np.uint8, buffer=buffer, offset=HEADER_DTYPE.itemsize)
+    entities = np.ndarray((max_entities,), dtype=ENTITY_DTYPE, buffer=buffer,
+                          offset=HEADER_DTYPE.itemsize + max_maze_cells)
+    return header, grid, entities
+
+class SharedStatePublisher:
+    """Writes the live maze and entity positions into a named shared-memory block.
+
+    The maze is copied in once per maze; entities are rewritten every tick.
+    Both happen between two increments of a sequence counter (a seqlock):
+    a reader that sees the same even value before and after copying got a
+    consistent tick, and the game never waits for a reader.
+    """
+    def __init__(self, name=None, max_maze_cells=80 * 80, max_entities=64):
+        self.memory = shared_memory.SharedMemory(name=name, create=True, size=block_size(max_maze_cells, max_entities))
+        self.name = self.memory.name
+        _published.add(self.name)
+        self.header, self.grid, self.entities = _views(self.memory.buf, max_maze_cells, max_entities)
+        self.header["magic"] = MAGIC
+        self.header["layout"] = LAYOUT_VERSION
+        self.header["max_entities"] = max_entities
+        self.header["max_maze_cells"] = max_maze_cells
+        self.max_entities = max_entities
+        self.max_maze_cells = max_maze_cells
+        self.ticks_published = 0
+
+    def _begin(self):
+        self.header["sequence"] += 1
+
+    def _end(self):
+        self.header["sequence"] += 1
+
+    def publish_maze(self, maze_generator):
+        """Copy a new maze into the block; readers see maze_version change"""
+        width, height = maze_generator.maze_width, maze_generator.maze_height
+        if width * height > self.max_maze_cells:
+            raise ValueError(f"maze of {width}x{height} cells does not fit in {self.max_maze_cells} cells")
+        grid = np.asarray(maze_generator.maze, dtype=np.uint8).ravel()
+        self._begin()
+        self.grid[:width * height] = grid
+        self.header["maze_width"] = width
+        self.header["maze_height"] = height
+        self.header["cell_size"] = maze_generator.cell_size
+        self.header["start_x"], self.header["start_y"] = maze_generator.start_pos
+        self.header["goal_x"], self.header["goal_y"] = maze_generator.goal_pos
+        self.header["maze_version"] += 1
+        self.header["entity_count"] = 0
+        self._end()
+
+    def publish(self, tick, game_state, entities):
+        """Write one tick; entities is an iterable of (id, flags, x, y) in world pixels"""
+        self._begin()
+        count = 0
+        table = self.entities
+        for entity in entities:
+            if count == self.max_entities:
+                break
+            table[count] = entity
+            count += 1
+        self.header["entity_count"] = count
+        self.header["tick"] = tick
+        self.header["game_state"] = game_state
+        self._end()
+        self.ticks_published += 1
+
+    def close(self):
+        """Detach and remove the block; attached readers keep their mapping until they close"""
+        del self.header, self.grid, self.entities
+        self.memory.close()
+        self.memory.unlink()
+        _published.discard(self.name)
+
+def game_entities(player, enemies, finished=False, caught=False):
+    """(id, flags, x, y) for a single-player game's player and enemies, numbered as the server numbers them"""
+    entities = []
+    if player is not None:
+        flags = (FLAG_FINISHED if finished else 0) | (FLAG_CAUGHT if caught else 0)
+        entities.append((PLAYER_ID, flags, player.x, player.y))
+    for index, enemy in enumerate(enemies):
+        flags = FLAG_ENEMY
+        if enemy.is_spawned:
+            flags |= FLAG_SPAWNED
+        if enemy.is_tracking:
+            flags |= FLAG_TRACKING
+        entities.append((ENEMY_ID_BASE + index, flags, enemy.x, enemy.y))
+    return entities
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block with this process's resource tracker,
+        # which would unlink it under the game when the reader exits
+        memory = shared_memory.SharedMemory(name=name)
+        if memory.name in _published:
+            return memory
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, "shared_memory")
+        except (ImportError, AttributeError):
+            pass
+        return memory
+
+class SharedStateReader:
+    """Maps a publisher's block from another process as NumPy arrays"""
+    def __init__(self, name):
+        self.memory = _attach(name)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.memory.buf)
+        if bytes(header["magic"]) != MAGIC or int(header["layout"]) != LAYOUT_VERSION:
+            del header
+            self.memory.close()
+            raise ValueError(f"shared block {name!r} is not a layout {LAYOUT_VERSION} game state")
+        self.header, self.grid, self.entities = _views(self.memory.buf, int(header["max_maze_cells"]),
+                                                       int(header["max_entities"]))
+        self.retries = 0
+
+    def _stable(self, read):
+        """Run read() until no publish overlapped it"""
+        while True:
+            before = int(self.header["sequence"])
+            if before & 1:
+                self.retries += 1
+                continue
+            result = read()
+            if int(self.header["sequence"]) == before:
+                return result
+            self.retries += 1
+
+    @property
+    def maze_version(self):
+        return int(self.header["maze_version"])
+
+    def maze(self):
+        """(version, walls) where walls is a (height, width) view of the block; valid while maze_version holds"""
+        def read():
+            width, height = int(self.header["maze_width"]), int(self.header["maze_height"])
+            return int(self.header["maze_version"]), self.grid[:width * height].reshape(height, width)
+        return self._stable(read)
+
+    def maze_info(self):
+        """Cell size, start and goal cells of the current maze"""
+        def read():
+            header = self.header
+            return {"cell_size": int(header["cell_size"]), "start": (int(header["start_x"]), int(header["start_y"])),
+                    "goal": (int(header["goal_x"]), int(header["goal_y"]))}
+        return self._stable(read)
+
+    def snapshot(self):
+        """(tick, game_state, entities) from one consistent tick; entities is a small copied ENTITY_DTYPE array"""
+        def read():
+            count = int(self.header["entity_count"])
+            return int(self.header["tick"]), int(self.header["game_state"]), self.entities[:count].copy()
+        return self._stable(read)
+
+    def wait_for_tick(self, after, timeout=1.0, poll=0.001):
+        """Snapshot of the first tick past after, or None if none arrives within timeout"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if int(self.header["tick"]) != after:
+                snapshot = self.snapshot()
+                if snapshot[0] != after:
+                    return snapshot
+            time.sleep(poll)
+        return None
+
+    def close(self):
+        """Detach; views returned by maze() must be dropped first"""
+        del self.header, self.grid, self.entities
+        self.memory.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow a game started with --share-state")
+    parser.add_argument("name", help="shared block name the game printed")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    reader = SharedStateReader(args.name)
+    version, walls = reader.maze()
+    print(f"Maze {version}: {walls.shape[1]}x{walls.shape[0]} cells, {reader.maze_info()}")
+    del walls
+    tick, _, _ = reader.snapshot()
+    ticks = 0
+    started = time.monotonic()
+    while time.monotonic() - started < args.seconds:
+        snapshot = reader.wait_for_tick(tick)
+        if snapshot is None:
+            continue
+        tick, game_state, entities = snapshot
+        ticks += 1
+        if ticks % 60 == 0:
+            positions = ", ".join(f"{entity['id']}@({entity['x']:.0f},{entity['y']:.0f})" for entity in entities)
+            print(f"tick {tick} state {game_state}: {positions}")
+    print(f"{ticks} ticks followed in {args.seconds:.0f} s, {reader.retries} torn reads retried")
+    reader.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import math
+import random
+import pygame
+import main
+from distance_oracle import DistanceOracle
+
+WON = "won"
+LOST = "lost"
+TIMEOUT = "timeout"
+
+class BotKeys:
+    """Stands in for pygame.key.get_pressed() with a fixed set of held keys"""
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+class ScriptedBot:
+    """Walks the solution path; with evasion > 0 it backs away from hunting enemies.
+
+    evasion is a radius in maze steps. While a hunting enemy is inside it the bot
+    steps in whichever direction opens the most distance, then replans from
+    wherever it ended up.
+    """
+    MOVES = ((pygame.K_LEFT, -1, 0), (pygame.K_RIGHT, 1, 0), (pygame.K_UP, 0, -1), (pygame.K_DOWN, 0, 1))
+
+    def __init__(self, evasion=0):
+        self.evasion = evasion
+        self.route = list(main.solution_path)
+        self.waypoint = 1
+        self.off_route = False
+        self.evasions = 0
+        self.oracle = None
+        if evasion > 0:
+            self.oracle = DistanceOracle(main.maze_generator.maze, main.maze_generator.maze_width,
+                                         main.maze_generator.maze_height)
+
+    def keys(self, player, enemies):
+        threat = self._nearest_threat(player, enemies)
+        if threat is not None:
+            self.off_route = True
+            self.evasions += 1
+            return self._evade(player, threat)
+        if self.off_route:
+            self._replan(player)
+
+        while self.waypoint < len(self.route):
+            target_x, target_y = self.route[self.waypoint]
+            dx = target_x - player.x
+            dy = target_y - player.y
+            if abs(dx) < main.PLAYER_SPEED and abs(dy) < main.PLAYER_SPEED:
+                self.waypoint += 1
+                continue
+            if abs(dx) >= abs(dy):
+                return BotKeys([pygame.K_RIGHT if dx > 0 else pygame.K_LEFT])
+            return BotKeys([pygame.K_DOWN if dy > 0 else pygame.K_UP])
+        return BotKeys()
+
+    def _nearest_threat(self, player, enemies):
+        if self.evasion <= 0:
+            return None
+        # Distance through the maze, so an enemy on the other side of a wall is no threat
+        cell_size = main.maze_generator.cell_size
+        hunting = [enemy for enemy in enemies if enemy.is_spawned and enemy.is_tracking]
+        index, distance = self.oracle.nearest(
+            (int(player.x // cell_size), int(player.y // cell_size)),
+            [(int(enemy.x // cell_size), int(enemy.y // cell_size)) for enemy in hunting])
+        if index is None or distance >= self.evasion:
+            return None
+        return hunting[index]
+
+    def _evade(self, player, enemy):
+        best_key = None
+        best_distance = math.hypot(enemy.x - player.x, enemy.y - player.y)
+        for key, step_x, step_y in self.MOVES:
+            new_x = player.x + step_x * main.PLAYER_SPEED
+            new_y = player.y + step_y * main.PLAYER_SPEED
+            if main.check_collision(new_x, new_y) == "wall":
+                continue
+            distance = math.hypot(enemy.x - new_x, enemy.y - new_y)
+            if distance > best_distance:
+                best_key, best_distance = key, distance
+        return BotKeys([best_key] if best_key is not None else [])
+
+    def _replan(self, player):
+        cell_size = main.maze_generator.cell_size
+        goal_x = main.maze_generator.goal_pos[0] * cell_size + cell_size // 2
+        goal_y = main.maze_generator.goal_pos[1] * cell_size + cell_size // 2
+        cells = main.pathfinder.find_path(player.x, player.y, goal_x, goal_y)
+        self.route = [(x * cell_size + cell_size // 2, y * cell_size + cell_size // 2) for x, y in cells]
+        self.waypoint = 1
+        self.off_route = False
+
+def run_game(level, seed, evasion=0, max_ticks=60 * 120, settings=None, constants=None):
+    """Play one headless game with the scripted bot and return its outcome.
+
+    settings overrides keys of DIFFICULTY_SETTINGS[level] and constants
+    overrides module-level names in main (for example HUNT_DURATION); both
+    are restored afterwards.
+    """
+    saved_settings = main.DIFFICULTY_SETTINGS[level]
+    saved_constants = {name: getattr(main, name) for name in (constants or {})}
+    main.DIFFICULTY_SETTINGS[level] = dict(saved_settings, **(settings or {}))
+    for name, value in (constants or {}).items():
+        setattr(main, name, value)
+    main.headless = True
+    try:
+        random.seed(seed)
+        main.difficulty = level
+        main.game_state = main.PLAYING
+        main.reset_game()
+        bot = ScriptedBot(evasion)
+        result = TIMEOUT
+        while main.frame_tick < max_ticks:
+            main.update_playing(bot.keys(main.player, main.enemies))
+            if main.game_won:
+                result = WON
+                break
+            if main.game_lost:
+                result = LOST
+                break
+        return {
+            "result": result,
+            "ticks": main.frame_tick,
+            "distance": main.distance_traveled,
+            "evasions": bot.evasions,
+            "seed": seed,
+        }
+    finally:
+        main.path_service.shutdown()
+        main.DIFFICULTY_SETTINGS[level] = saved_settings
+        for name, value in saved_constants.items():
+            setattr(main, name, value)
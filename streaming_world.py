@@ -0,0 +1,206 @@
+import platform
+import queue
+import random
+import threading
+from collections import deque
+from maze_generator import Pathfinder
+
+class StreamingWorld:
+    """Endless maze generated chunk by chunk from (world seed, chunk coordinates).
+
+    Each chunk is a square of chunk_cells cells with rooms on odd local
+    coordinates. A chunk owns the wall column/row on its west and north
+    edges and always opens at least one door in each, so every chunk joins
+    its west and north neighbours and the whole world stays connected no
+    matter which chunks happen to be loaded.
+    """
+    def __init__(self, seed, chunk_cells=32, cell_size=20, load_radius=2, unload_radius=3,
+                 doors_per_border=2, background=None):
+        if chunk_cells % 2:
+            raise ValueError("chunk_cells must be even")
+        self.seed = seed
+        self.chunk_cells = chunk_cells
+        self.cell_size = cell_size
+        self.load_radius = load_radius
+        self.unload_radius = max(unload_radius, load_radius)
+        self.doors_per_border = doors_per_border
+
+        self.chunks = {}  # (chunk_x, chunk_y) -> list of bytearray rows, 1 = wall
+        self.requested = set()
+        self.chunks_generated = 0
+        self.chunks_unloaded = 0
+
+        if background is None:
+            background = platform.system() != "Emscripten"
+        self._requests = queue.Queue()
+        self._ready = deque()
+        self._worker = None
+        if background:
+            self._worker = threading.Thread(target=self._work, daemon=True)
+            self._worker.start()
+
+    def generate_chunk(self, chunk_x, chunk_y):
+        """Build one chunk; the result depends only on the seed and chunk coordinates"""
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        size = self.chunk_cells
+        rooms = size // 2
+        rows = [bytearray(b'\x01') * size for _ in range(size)]
+
+        # Recursive backtracking over the rooms at odd local coordinates
+        start = (rng.randrange(rooms), rng.randrange(rooms))
+        rows[start[1] * 2 + 1][start[0] * 2 + 1] = 0
+        stack = [start]
+        while stack:
+            room_x, room_y = stack[-1]
+            neighbours = []
+            for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+                next_x, next_y = room_x + dx, room_y + dy
+                if 0 <= next_x < rooms and 0 <= next_y < rooms and rows[next_y * 2 + 1][next_x * 2 + 1]:
+                    neighbours.append((next_x, next_y, dx, dy))
+            if neighbours:
+                next_x, next_y, dx, dy = rng.choice(neighbours)
+                rows[room_y * 2 + 1 + dy][room_x * 2 + 1 + dx] = 0
+                rows[next_y * 2 + 1][next_x * 2 + 1] = 0
+                stack.append((next_x, next_y))
+            else:
+                stack.pop()
+
+        # Doors on the owned west and north edges lead into the neighbours' edge rooms
+        doors = max(1, min(self.doors_per_border, rooms))
+        for room_y in rng.sample(range(rooms), doors):
+            rows[room_y * 2 + 1][0] = 0
+        for room_x in rng.sample(range(rooms), doors):
+            rows[0][room_x * 2 + 1] = 0
+        return rows
+
+    def chunk_of(self, grid_x, grid_y):
+        return grid_x // self.chunk_cells, grid_y // self.chunk_cells
+
+    def update(self, grid_x, grid_y):
+        """Stream chunks around a grid position: queue nearby ones, accept finished ones, drop far ones"""
+        center_x, center_y = self.chunk_of(grid_x, grid_y)
+
+        while self._ready:
+            key, rows = self._ready.popleft()
+            self.requested.discard(key)
+            if self._chunk_distance(key, center_x, center_y) <= self.unload_radius and key not in self.chunks:
+                self.chunks[key] = rows
+
+        # Nearest chunks first so the one the player is heading into arrives soonest
+        wanted = []
+        for chunk_y in range(center_y - self.load_radius, center_y + self.load_radius + 1):
+            for chunk_x in range(center_x - self.load_radius, center_x + self.load_radius + 1):
+                key = (chunk_x, chunk_y)
+                if key not in self.chunks and key not in self.requested:
+                    wanted.append((self._chunk_distance(key, center_x, center_y), key))
+        for _, key in sorted(wanted):
+            if self._worker is not None:
+                self.requested.add(key)
+                self._requests.put(key)
+            else:
+                self.chunks[key] = self._generate(key)
+
+        for key in list(self.chunks):
+            if self._chunk_distance(key, center_x, center_y) > self.unload_radius:
+                del self.chunks[key]
+                self.chunks_unloaded += 1
+
+        # The chunk under the player must never be missing
+        self.ensure_chunk(center_x, center_y)
+
+    def ensure_chunk(self, chunk_x, chunk_y):
+        """Generate a chunk synchronously if the worker has not delivered it yet"""
+        key = (chunk_x, chunk_y)
+        if key not in self.chunks:
+            self.chunks[key] = self._generate(key)
+        return self.chunks[key]
+
+    def is_wall(self, grid_x, grid_y):
+        """Check a global cell; cells in unloaded chunks count as walls"""
+        rows = self.chunks.get((grid_x // self.chunk_cells, grid_y // self.chunk_cells))
+        if rows is None:
+            return True
+        return bool(rows[grid_y % self.chunk_cells][grid_x % self.chunk_cells])
+
+    def view(self, min_chunk_x, min_chunk_y, max_chunk_x, max_chunk_y):
+        """Snapshot a rectangle of chunks as a grid Pathfinder can search"""
+        return WorldView(self, min_chunk_x, min_chunk_y, max_chunk_x, max_chunk_y)
+
+    def find_path(self, start_grid, target_grid):
+        """A* between two global cells across the loaded chunks; returns global cells.
+
+        The search starts in the box around both endpoints' chunks plus one
+        chunk of margin and grows by a chunk on every side while no path is
+        found, so a detour through any loaded chunk is found without
+        searching every loaded chunk each time.
+        """
+        if not self.chunks:
+            return []
+        loaded_min_x = min(key[0] for key in self.chunks)
+        loaded_min_y = min(key[1] for key in self.chunks)
+        loaded_max_x = max(key[0] for key in self.chunks)
+        loaded_max_y = max(key[1] for key in self.chunks)
+        start_chunk = self.chunk_of(*start_grid)
+        target_chunk = self.chunk_of(*target_grid)
+        margin = 1
+        while True:
+            min_x = min(start_chunk[0], target_chunk[0]) - margin
+            min_y = min(start_chunk[1], target_chunk[1]) - margin
+            max_x = max(start_chunk[0], target_chunk[0]) + margin
+            max_y = max(start_chunk[1], target_chunk[1]) + margin
+            view = self.view(min_x, min_y, max_x, max_y)
+            start_x, start_y = view.to_local(*start_grid)
+            target_x, target_y = view.to_local(*target_grid)
+            path = Pathfinder(view).find_path(start_x * self.cell_size, start_y * self.cell_size,
+                                              target_x * self.cell_size, target_y * self.cell_size)
+            if path:
+                return [view.to_global(x, y) for x, y in path]
+            if (min_x <= loaded_min_x and min_y <= loaded_min_y and
+                    max_x >= loaded_max_x and max_y >= loaded_max_y):
+                return []
+            margin += 1
+
+    def shutdown(self):
+        if self._worker is not None:
+            self._requests.put(None)
+            self._worker = None
+
+    def _chunk_distance(self, key, center_x, center_y):
+        return max(abs(key[0] - center_x), abs(key[1] - center_y))
+
+    def _generate(self, key):
+        self.chunks_generated += 1
+        return self.generate_chunk(*key)
+
+    def _work(self):
+        while True:
+            key = self._requests.get()
+            if key is None:
+                return
+            self._ready.append((key, self._generate(key)))
+
+class WorldView:
+    """Rectangular window of loaded chunks with the maze/maze_width/maze_height shape Pathfinder expects"""
+    def __init__(self, world, min_chunk_x, min_chunk_y, max_chunk_x, max_chunk_y):
+        size = world.chunk_cells
+        self.cell_size = world.cell_size
+        self.origin_x = min_chunk_x * size
+        self.origin_y = min_chunk_y * size
+        self.maze_width = (max_chunk_x - min_chunk_x + 1) * size
+        self.maze_height = (max_chunk_y - min_chunk_y + 1) * size
+
+        wall_row = [True] * size
+        self.maze = []
+        for chunk_y in range(min_chunk_y, max_chunk_y + 1):
+            chunk_rows = [world.chunks.get((chunk_x, chunk_y)) for chunk_x in range(min_chunk_x, max_chunk_x + 1)]
+            for local_y in range(size):
+                row = []
+                for rows in chunk_rows:
+                    row.extend(wall_row if rows is None else [bool(cell) for cell in rows[local_y]])
+                self.maze.append(row)
+
+    def to_local(self, grid_x, grid_y):
+        return grid_x - self.origin_x, grid_y - self.origin_y
+
+    def to_global(self, x, y):
+        return x + self.origin_x, y + self.origin_y
@@ -0,0 +1,270 @@
+import argparse
+import bisect
+import glob
+import gzip
+import os
+import platform
+import struct
+import threading
+import time
+import numpy as np
+
+# Every record is 32 bytes: type, difficulty, enemy, run id, tick, then a 20-byte payload
+RUN_START = 1
+RUN_END = 2
+TRACKING = 3
+FRAME_TIMES = 4
+
+RECORD_SIZE = 32
+RECORD_FORMATS = {
+    RUN_START: struct.Struct("<BBHII I16x"),  # maze seed
+    RUN_END: struct.Struct("<BBHII B3x ffff"),  # result, seconds, distance, death x, death y (-1 if none)
+    TRACKING: struct.Struct("<BBHII B3x ff 8x"),  # 1 = started hunting, 0 = stopped; enemy x, y
+    FRAME_TIMES: struct.Struct("<BBHII 10H"),  # frame counts per FRAME_BUCKETS_MS bucket over one second
+}
+FRAME_BUCKETS_MS = (4, 8, 12, 16, 20, 25, 33, 50, 100)  # upper edges; the last bucket is everything slower
+
+RESULT_WON = 1
+RESULT_LOST = 2
+RESULT_QUIT = 3
+
+HEADER_DTYPE = np.dtype([("type", "u1"), ("difficulty", "u1"), ("enemy", "<u2"), ("run", "<u4"), ("tick", "<u4"),
+                         ("payload", "V20")])
+PAYLOAD_DTYPES = {
+    RUN_START: np.dtype([("seed", "<u4"), ("pad", "V16")]),
+    RUN_END: np.dtype([("result", "u1"), ("pad", "V3"), ("seconds", "<f4"), ("distance", "<f4"),
+                       ("death_x", "<f4"), ("death_y", "<f4")]),
+    TRACKING: np.dtype([("started", "u1"), ("pad", "V3"), ("x", "<f4"), ("y", "<f4"), ("pad2", "V8")]),
+    FRAME_TIMES: np.dtype([("counts", "<u2", (10,))]),
+}
+
+class RecordRing:
+    """Single-producer, single-consumer ring of fixed-size records in one preallocated buffer.
+
+    The frame loop only writes a slot and then advances head; the writer
+    thread only reads up to head and then advances tail. Each index has a
+    single writer, so no lock is needed. A full ring drops the new record
+    and counts it rather than making the frame wait.
+    """
+    def __init__(self, capacity=8192):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * RECORD_SIZE)
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+    def push(self, record_type, *values):
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        RECORD_FORMATS[record_type].pack_into(self.buffer, (head % self.capacity) * RECORD_SIZE, record_type, *values)
+        self.head = head + 1
+        return True
+
+    def drain(self):
+        """Copy out every record pushed so far and free their slots"""
+        tail = self.tail
+        head = self.head
+        if head == tail:
+            return b""
+        first = tail % self.capacity
+        last = head % self.capacity
+        if first < last:
+            data = bytes(self.buffer[first * RECORD_SIZE:last * RECORD_SIZE])
+        else:
+            data = bytes(self.buffer[first * RECORD_SIZE:]) + bytes(self.buffer[:last * RECORD_SIZE])
+        self.tail = head
+        return data
+
+class TelemetryWriter:
+    """Appends batches of records to rotating gzip files from a background thread.
+
+    Each flush is one gzip member appended to the current file, so a file
+    is always readable up to the last completed flush. Once a file passes
+    max_file_bytes a new one is started and the oldest beyond max_files is
+    deleted. Without thread support (the browser build) flush() is called
+    from the frame loop instead.
+    """
+    def __init__(self, ring, directory, flush_interval=2.0, max_file_bytes=4 * 1024 * 1024, max_files=16):
+        self.ring = ring
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.records_written = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+        existing = log_files(directory)
+        self.file_number = int(os.path.basename(existing[-1]).split("-")[1].split(".")[0]) if existing else 1
+        self.path = self._file_path()
+
+    def start(self):
+        if platform.system() != "Emscripten":
+            self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and write whatever is still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def poll(self):
+        """Frame-loop flush for builds without a writer thread"""
+        if self._thread is None and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        data = self.ring.drain()
+        if not data:
+            return 0
+        compressed = gzip.compress(data, compresslevel=6)
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_file_bytes:
+            self._rotate()
+        with open(self.path, "ab") as log:
+            log.write(compressed)
+        self.records_written += len(data) // RECORD_SIZE
+        self.bytes_written += len(compressed)
+        self.flushes += 1
+        return len(data) // RECORD_SIZE
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _file_path(self):
+        return os.path.join(self.directory, f"telemetry-{self.file_number:06d}.bin.gz")
+
+    def _rotate(self):
+        """Start the next file and delete the oldest ones so that max_files remain with it"""
+        self.file_number += 1
+        self.path = self._file_path()
+        older = log_files(self.directory)
+        for old in older[:max(0, len(older) - self.max_files + 1)]:
+            os.remove(old)
+
+class Telemetry:
+    """What the game records: run starts and ends, hunting transitions and per-second frame-time histograms"""
+    def __init__(self, directory, capacity=8192, flush_interval=2.0, max_file_bytes=4 * 1024 * 1024, max_files=16):
+        self.ring = RecordRing(capacity)
+        self.writer = TelemetryWriter(self.ring, directory, flush_interval, max_file_bytes, max_files)
+        self.run = int(time.time()) & 0xFFFFFFFF
+        self.difficulty = 0
+        self.frame_counts = [0] * (len(FRAME_BUCKETS_MS) + 1)
+        self.frames = 0
+        self.run_active = False
+
+    def start(self):
+        self.writer.start()
+        return self
+
+    def stop(self):
+        self.writer.stop()
+
+    def run_started(self, difficulty, seed):
+        self.run = (self.run + 1) & 0xFFFFFFFF
+        self.difficulty = difficulty
+        self.run_active = True
+        self.ring.push(RUN_START, difficulty, 0, self.run, 0, seed or 0)
+
+    def run_ended(self, tick, result, seconds, distance, death=None):
+        if not self.run_active:
+            return
+        self.run_active = False
+        death_x, death_y = death if death is not None else (-1.0, -1.0)
+        self.ring.push(RUN_END, self.difficulty, 0, self.run, tick, result, seconds, distance, death_x, death_y)
+
+    def tracking_changed(self, tick, enemy, started, x, y):
+        self.ring.push(TRACKING, self.difficulty, enemy, self.run, tick, 1 if started else 0, x, y)
+
+    def frame(self, tick, frame_ms):
+        """Count one frame; every 60 frames the histogram becomes a record"""
+        self.frame_counts[bisect.bisect_right(FRAME_BUCKETS_MS, frame_ms)] += 1
+        self.frames += 1
+        if self.frames == 60:
+            self.ring.push(FRAME_TIMES, self.difficulty, 0, self.run, tick, *self.frame_counts)
+            self.frame_counts = [0] * len(self.frame_counts)
+            self.frames = 0
+        self.writer.poll()
+
+    def get_stats(self):
+        return {"pushed": self.ring.head, "dropped": self.ring.dropped, "written": self.writer.records_written,
+                "bytes": self.writer.bytes_written, "flushes": self.writer.flushes}
+
+def log_files(directory):
+    return sorted(glob.glob(os.path.join(directory, "telemetry-*.bin.gz")))
+
+def read_records(paths):
+    """All records in the given log files as one numpy array of HEADER_DTYPE"""
+    chunks = []
+    for path in paths:
+        with gzip.open(path, "rb") as log:
+            try:
+                chunks.append(log.read())
+            except EOFError:
+                pass  # A flush cut short by a crash; the members before it are intact
+    data = b"".join(chunks)
+    return np.frombuffer(data[:len(data) - len(data) % RECORD_SIZE], dtype=HEADER_DTYPE)
+
+def payloads(records, record_type):
+    """Header fields and decoded payload of every record of one type"""
+    selected = records[records["type"] == record_type]
+    return selected, np.frombuffer(selected["payload"].tobytes(), dtype=PAYLOAD_DTYPES[record_type])
+
+def summarize(records):
+    """Aggregate a log: outcomes per difficulty, hunting transitions and the frame-time distribution"""
+    summary = {"records": len(records), "difficulties": {}}
+    starts, start_payload = payloads(records, RUN_START)
+    ends, end_payload = payloads(records, RUN_END)
+    for difficulty in np.unique(starts["difficulty"]):
+        mask = ends["difficulty"] == difficulty
+        results = end_payload["result"][mask]
+        won = results == RESULT_WON
+        lost = results == RESULT_LOST
+        deaths = end_payload[mask][lost]
+        summary["difficulties"][int(difficulty)] = {
+            "runs": int((starts["difficulty"] == difficulty).sum()),
+            "won": int(won.sum()),
+            "lost": int(lost.sum()),
+            "quit": int((results == RESULT_QUIT).sum()),
+            "mean_win_seconds": float(end_payload["seconds"][mask][won].mean()) if won.any() else None,
+            "mean_distance": float(end_payload["distance"][mask].mean()) if mask.any() else None,
+            "death_positions": np.stack([deaths["death_x"], deaths["death_y"]], axis=1),
+        }
+    tracking, tracking_payload = payloads(records, TRACKING)
+    summary["hunts_started"] = int(tracking_payload["started"].sum())
+    summary["hunts_ended"] = int(len(tracking) - tracking_payload["started"].sum())
+    frames, frame_payload = payloads(records, FRAME_TIMES)
+    counts = frame_payload["counts"].sum(axis=0) if len(frames) else np.zeros(len(FRAME_BUCKETS_MS) + 1, dtype=int)
+    summary["frame_histogram"] = dict(zip([f"<{edge}ms" for edge in FRAME_BUCKETS_MS] + [f">={FRAME_BUCKETS_MS[-1]}ms"],
+                                          counts.tolist()))
+    summary["slow_frame_share"] = float(counts[4:].sum() / max(1, counts.sum()))  # 16 ms or slower
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise recorded game telemetry")
+    parser.add_argument("directory", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry"))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    records = read_records(log_files(args.directory))
+    summary = summarize(records)
+    elapsed = time.perf_counter() - started
+    for difficulty, stats in sorted(summary["difficulties"].items()):
+        win_time = f"{stats['mean_win_seconds']:.1f}s" if stats["mean_win_seconds"] is not None else "-"
+        print(f"difficulty {difficulty}: {stats['runs']} runs, {stats['won']} won, {stats['lost']} lost, "
+              f"{stats['quit']} quit, mean win time {win_time}, {len(stats['death_positions'])} death positions")
+    print(f"hunts started {summary['hunts_started']}, ended {summary['hunts_ended']}")
+    print("frame times: " + ", ".join(f"{bucket} {count}" for bucket, count in summary["frame_histogram"].items()))
+    print(f"{summary['records']} records read and aggregated in {elapsed * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
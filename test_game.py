@@ -1,6 +1,34 @@
-from maze_generator import MazeGenerator
+from maze_generator import MazeGenerator, Pathfinder
+from hierarchical_pathfinder import HierarchicalPathfinder
+from incremental_planner import IncrementalPlanner
+from pathfinding_service import PathfindingService
+from path_scheduler import PathScheduler
+from streaming_world import StreamingWorld
+from allocation_profiler import AllocationProfiler
+from maze_analytics import analyze_generator, analyze_batch, meets_target
+from line_of_sight import LineOfSight
+from quality_governor import QualityGovernor
+from distance_oracle import DistanceOracle
+from maze_validation import validate_maze, validate_batch, failed_checks, label_components
+import telemetry
+from shared_state import SharedStatePublisher, SharedStateReader
+from camera import Camera, PathRevealLayer
+import level_loader
+import batch_solver
+import random
+import tempfile
+import os
+import shutil
+import simulation
+import asyncio
+import net_protocol
+import server as game_server
+from net_client import GameClient
+import time
+import subprocess
+import sys
+import numpy as np
 import pygame
-pygame.init()
 
 # Test the new maze generation
 maze = MazeGenerator(800, 720)
@@ -9,17 +37,594 @@ print('Maze generated successfully!')
 print(f'Start position: {maze.start_pos}')
 print(f'Goal position: {maze.goal_pos}')
 
-# Quick connectivity test
-visited = [[False for _ in range(maze.maze_width)] for _ in range(maze.maze_height)]
-def flood_fill(x, y):
-    if (x < 0 or x >= maze.maze_width or y < 0 or y >= maze.maze_height or visited[y][x] or maze.maze[y][x]):
-        return 0
-    visited[y][x] = True
-    count = 1
-    for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-        count += flood_fill(x + dx, y + dy)
-    return count
-
-reachable_cells = flood_fill(maze.start_pos[0], maze.start_pos[1])
-print(f'Reachable cells from start: {reachable_cells}')
-print(f'Goal reachable: {visited[maze.goal_pos[1]][maze.goal_pos[0]]}')
\ No newline at end of file
+# Connectivity test
+validation = validate_maze(maze.maze, maze.start_pos, maze.goal_pos)
+assert not failed_checks(validation), failed_checks(validation)
+print(f"Reachable cells from start: {len(maze.open_cells) - validation['unreachable_cells']}")
+print(f"Goal reachable: {validation['reachable']}")
+
+# Open-cell index test
+open_cells = maze.open_cells
+print(f'Indexed open cells: {len(open_cells)}')
+assert all(not maze.maze[y][x] for x, y in (open_cells.cell(i) for i in range(len(open_cells))))
+for y in range(maze.maze_height):
+    for x in range(maze.maze_width):
+        nx, ny = open_cells.nearest_cell(x, y)
+        assert not maze.maze[ny][nx]
+        if not maze.maze[y][x]:
+            assert (nx, ny) == (x, y)
+print('Nearest-open-cell table valid!')
+
+
+# Hierarchical pathfinding test
+hierarchical = HierarchicalPathfinder(maze, cluster_size=8)
+hpa_path = hierarchical.get_full_path(maze.start_pos, maze.goal_pos)
+astar_path = Pathfinder(maze).find_path(*maze.get_start_position(),
+                                        maze.goal_pos[0] * maze.cell_size, maze.goal_pos[1] * maze.cell_size)
+print(f'HPA* path length: {len(hpa_path)} (A*: {len(astar_path)})')
+assert hpa_path[0] == maze.start_pos and hpa_path[-1] == maze.goal_pos
+assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and not maze.maze[b[1]][b[0]]
+           for a, b in zip(hpa_path, hpa_path[1:]))
+assert hierarchical.get_next_steps(maze.start_pos, maze.goal_pos, 5) == hpa_path[:6]
+
+# Updating mutated cells must leave the same graph a full rebuild would
+toggled_maze = MazeGenerator(800, 720)
+toggled_maze.generate_maze()
+toggled = HierarchicalPathfinder(toggled_maze, cluster_size=8)
+assert toggled_maze.hierarchical is toggled_maze.hierarchical
+toggle_rng = random.Random(5)
+for _ in range(40):
+    x = toggle_rng.randrange(1, toggled_maze.maze_width - 1)
+    y = toggle_rng.randrange(1, toggled_maze.maze_height - 1)
+    toggled_maze.set_wall(x, y, not toggled_maze.maze[y][x])
+    toggled.update_cell(x, y)
+for updated, rebuilt in ((toggled, HierarchicalPathfinder(toggled_maze, cluster_size=8)),
+                         (toggled_maze.hierarchical, HierarchicalPathfinder(toggled_maze))):
+    assert updated.border_transitions == rebuilt.border_transitions
+    assert updated.inter_edges == rebuilt.inter_edges
+    assert updated.intra_edges == rebuilt.intra_edges
+assert len(toggled_maze.open_cells) == sum(not wall for row in toggled_maze.maze for wall in row)
+
+
+# Junction graph test
+junction_graph = Pathfinder(maze).junction_graph
+corridor_path = junction_graph.find_path(maze.start_pos, maze.goal_pos)
+print(f'Junction graph: {len(junction_graph.nodes)} nodes for {len(open_cells)} open cells')
+assert len(corridor_path) == len(astar_path)
+assert junction_graph.find_path(maze.start_pos, maze.goal_pos, max_cells=10) == corridor_path[:11]
+
+
+# Incremental replanning test
+planner = IncrementalPlanner(maze)
+assert len(planner.plan(maze.start_pos, maze.goal_pos)) == len(astar_path)
+moved_goal = corridor_path[-2]
+expansions_before = planner.expansions
+replanned = planner.plan(maze.start_pos, moved_goal)
+fresh_planner = IncrementalPlanner(maze)
+fresh_planner.plan(maze.start_pos, moved_goal)
+assert planner.expansions - expansions_before <= fresh_planner.expansions
+assert len(replanned) == len(astar_path) - 1 and replanned[-1] == moved_goal
+assert planner.plan(maze.start_pos, moved_goal) is replanned
+# Chasing: the enemy (start) steps along its path every tick and the player (goal) every fourth tick;
+# repairing must cost fewer expansions than searching afresh each tick
+chase_path = planner.plan(maze.start_pos, maze.goal_pos)[:]
+chase_planner = IncrementalPlanner(maze)
+chase_planner.plan(chase_path[0], chase_path[-1])
+repair_before = chase_planner.expansions
+fresh_expansions = 0
+chase_goal = chase_path[-1]
+for step in range(1, len(chase_path) // 2):
+    if step % 4 == 0:
+        chase_goal = chase_path[-1 - step // 4]
+    repaired = chase_planner.plan(chase_path[step], chase_goal)
+    fresh_planner = IncrementalPlanner(maze)
+    assert len(fresh_planner.plan(chase_path[step], chase_goal)) == len(repaired)
+    fresh_expansions += fresh_planner.expansions
+repair_expansions = chase_planner.expansions - repair_before
+assert repair_expansions < fresh_expansions
+print(f'Incremental planner chase: {repair_expansions} expansions repaired vs {fresh_expansions} fresh')
+print('Incremental planner replanned path after goal move!')
+
+
+# Asynchronous pathfinding service test
+# Long-range requests follow the maze's own HPA* route; short ones stay on the junction graph
+maze_hierarchical = maze.hierarchical
+service = PathfindingService(maze)
+assert service.snapshot.hierarchical is maze_hierarchical
+service.submit('test', 0, maze.start_pos, maze.goal_pos, max_cells=10)
+service.submit('near', 0, maze.start_pos, corridor_path[12], max_cells=10)
+results = {}
+for tick in range(1, 200):
+    results.update(service.poll(tick))
+    if len(results) == 2:
+        break
+    time.sleep(0.005)
+service.shutdown()
+assert results['test'][0] == maze_hierarchical.get_next_steps(maze.start_pos, maze.goal_pos, 10)
+assert results['near'][0] == junction_graph.find_path(maze.start_pos, corridor_path[12], 10)
+print(f'Pathfinding service stats: {service.get_stats()}')
+
+# A request whose search raises still comes back (empty), so the requester is not stuck as pending
+for inline in (True, False):
+    failing_service = PathfindingService(maze, inline=inline)
+    failing_service._pathfinder = object()  # Has no junction graph, so the search raises
+    failing_service.snapshot._hierarchical = object()  # Nor does a long-range search have HPA* to refine
+    failing_service.submit('broken', 0, maze.start_pos, maze.goal_pos)
+    failing_results = {}
+    for tick in range(1, 200):
+        failing_results = failing_service.poll(tick)
+        if failing_results:
+            break
+        time.sleep(0.005)
+    failing_service.shutdown()
+    assert failing_results['broken'][0] == [] and not failing_service.is_pending('broken')
+    assert failing_service.pending == 0 and failing_service.get_stats()['failed'] == 1
+
+# A cancelled request's result is dropped when it arrives, even with a request tick in the future
+cancel_service = PathfindingService(maze, inline=True)
+cancel_service.submit('rewound', 50, maze.start_pos, maze.goal_pos)
+cancel_service.cancel('rewound')
+assert not cancel_service.is_pending('rewound') and cancel_service.poll(10) == {} and cancel_service.pending == 0
+cancel_service.submit('rewound', 10, maze.start_pos, maze.goal_pos)
+assert 'rewound' in cancel_service.poll(11)
+
+
+# Frame-budgeted scheduler test
+scheduler = PathScheduler(expansion_budget=25)
+budgeted_planner = IncrementalPlanner(maze)
+budgeted_planner.set_endpoints(maze.start_pos, maze.goal_pos)
+frames = 0
+while budgeted_planner.dirty:
+    scheduler.request('test', frames, 0, budgeted_planner.compute)
+    scheduler.run(frames)
+    assert scheduler.expansions_this_tick <= 25
+    frames += 1
+assert len(budgeted_planner.path) == len(astar_path)
+due_ticks = [[tick for tick in range(30) if scheduler.is_due(name, tick, 10)] for name in ('a', 'b', 'c')]
+assert len({ticks[0] for ticks in due_ticks}) == 3
+# An enemy deciding only every 7 ticks still notices each 4-tick refresh it skipped over
+assert all(scheduler.is_due('a', tick, 4, since=tick - 7) for tick in range(7, 40))
+assert sum(scheduler.is_due('a', tick, 10, since=tick - 7) for tick in range(7, 77, 7)) == 7
+print(f'Budgeted search finished over {frames} frames')
+
+
+# Streaming world test
+world = StreamingWorld(seed=7, chunk_cells=16, background=False)
+assert world.generate_chunk(3, -2) == StreamingWorld(seed=7, chunk_cells=16).generate_chunk(3, -2)
+world.update(40, 40)
+world_start = next((x, 17) for x in range(16, 32) if not world.is_wall(x, 17))
+world_target = next((x, 47) for x in range(48, 64) if not world.is_wall(x, 47))
+world_path = world.find_path(world_start, world_target)
+assert world_path[0] == world_start and world_path[-1] == world_target
+# With the chunks between the endpoints walled off, the only route leaves their box through other loaded chunks
+detour_world = StreamingWorld(seed=7, chunk_cells=16, background=False)
+detour_world.update(24, 8)
+for chunk_y in (-1, 0, 1):
+    detour_world.chunks[(1, chunk_y)] = [bytearray(b'\x01') * 16 for _ in range(16)]
+detour_path = detour_world.find_path((1, 1), (33, 1))
+assert detour_path[0] == (1, 1) and detour_path[-1] == (33, 1)
+assert max(y for _, y in detour_path) >= 32 or min(y for _, y in detour_path) < -16
+assert all(not detour_world.is_wall(x, y) for x, y in detour_path)
+detour_world.chunks[(1, 2)] = detour_world.chunks[(1, -2)] = [bytearray(b'\x01') * 16 for _ in range(16)]
+assert detour_world.find_path((1, 1), (33, 1)) == []
+print(f'Streaming world: {len(world.chunks)} chunks loaded, cross-chunk path of {len(world_path)} cells')
+
+
+# Allocation profiler test
+profiler = AllocationProfiler(window=10, top=3)
+profiler.start()
+retained = []
+for frame in range(20):
+    retained.append(bytearray(1000))
+    profiler.end_frame()
+profiler.stop()
+assert len(profiler.reports) == 2
+assert profiler.reports[-1]['net_bytes_per_frame'] >= 1000
+assert 'test_game.py' in profiler.reports[-1]['top_sites'][0][0]
+print(profiler.format_report(profiler.reports[-1]).splitlines()[0])
+
+
+# Maze analytics test
+stats = analyze_generator(maze)
+assert stats['solution_length'] == maze._get_path_length()
+assert stats['reachable_share'] == 1.0 and 0.0 < stats['off_solution_share'] < 1.0
+assert sum(stats['corridor_histogram'].values()) == stats['corridor_count']
+assert meets_target(stats, {'solution_length': (1, None)}) and not meets_target(stats, {'dead_ends': (None, -1)})
+rng_state = random.getstate()
+batch = analyze_batch([1, 2, 3], 400, 360, 20, workers=1)
+assert [result['seed'] for result in batch] == [1, 2, 3]
+assert random.getstate() == rng_state and batch == analyze_batch([1, 2, 3], 400, 360, 20, workers=1)
+print(f"Maze analytics: solution {stats['solution_length']}, {stats['dead_ends']} dead ends, "
+      f"{stats['junctions']} junctions, {stats['off_solution_share']:.0%} of cells off the solution")
+
+
+# Line of sight test
+sight = LineOfSight(maze.maze, maze.maze_width, maze.maze_height)
+sight_cells = [open_cells.cell(i) for i in range(0, len(open_cells), 3)]
+for x, y in sight_cells[:200]:
+    # Straight corridor spans must agree with walking the row and column cell by cell
+    for other_x in range(maze.maze_width):
+        between = maze.maze[y][min(x, other_x):max(x, other_x) + 1]
+        assert sight.can_see((x, y), (other_x, y)) == (not any(between))
+    for other in sight_cells[::7]:
+        assert sight.can_see((x, y), other) == sight.can_see(other, (x, y))
+assert not sight.can_see(sight_cells[0], sight_cells[-1], max_distance=1)
+print(f"Line of sight: {sight.get_stats()['cached']} cached rays, hit rate {sight.get_stats()['hit_rate']:.0%}")
+
+
+# Headless simulation test
+first_game = simulation.run_game(1, seed=4, max_ticks=300)
+assert first_game == simulation.run_game(1, seed=4, max_ticks=300)
+assert first_game['result'] in (simulation.WON, simulation.LOST, simulation.TIMEOUT) and first_game['distance'] > 0
+print(f"Simulation: bot game ended '{first_game['result']}' after {first_game['ticks']} ticks")
+
+
+# Multiplayer protocol and loopback server test
+baseline, mirrored = {}, {}
+for entities in ({1: (0, 30, 40), 129: (1, 500, 600)}, {1: (0, 33, 40), 129: (3, 500, 600)}, {1: (8, 900, 41)}):
+    net_protocol.apply_snapshot(net_protocol.encode_snapshot(7, entities, baseline)[net_protocol.HEADER.size:], mirrored)
+    assert mirrored == entities == baseline
+assert net_protocol.unpack_grid(net_protocol.pack_grid(maze.maze, maze.maze_width, maze.maze_height),
+                                maze.maze_width, maze.maze_height) == [[bool(cell) for cell in row] for row in maze.maze]
+
+async def loopback_game():
+    game_server.main.headless = True
+    host = game_server.GameServer()
+    port = await host.start('127.0.0.1', 0)
+    ticker = asyncio.create_task(host.run())
+    first, second = GameClient(), GameClient()
+    await first.connect('127.0.0.1', port, room='test', level=1)
+    await second.connect('127.0.0.1', port, room='test', level=1)
+    room = host.rooms['test']
+    assert first.welcome['maze'] == second.welcome['maze'] == [[bool(cell) for cell in row] for row in room.state['maze_generator'].maze]
+    await second.wait_for_tick(room.tick + 4)
+    start = first.player
+    for key in (net_protocol.KEY_LEFT, net_protocol.KEY_RIGHT, net_protocol.KEY_UP, net_protocol.KEY_DOWN):
+        first.send_keys(key)
+        await first.wait_for_tick(room.tick + 10)
+        if first.player != start:
+            break
+    assert first.player != start
+    assert second.entities == room.entities() or second.server_tick < room.tick
+    host.running = False
+    await ticker
+    await first.close()
+    await second.close()
+    await host.stop()
+    return len(first.entities), first.bytes_received
+
+saved_maze_generator = game_server.main.maze_generator
+entity_count, received = asyncio.run(loopback_game())
+assert game_server.main.maze_generator is saved_maze_generator
+rng_state = random.getstate()
+built = game_server.build_room_maze(1, seed=3)
+assert random.getstate() == rng_state and built[0].maze == game_server.build_room_maze(1, seed=3)[0].maze
+saved_room_globals = {name: getattr(game_server.main, name) for name in game_server.ROOM_GLOBALS}
+game_server.main.telemetry = game_server.main.endless_world = object()
+game_server.main.quality = game_server.main.QUALITY_LEVELS[-1]
+isolated = game_server.Room('isolated', 1, built)
+for _ in range(5):
+    isolated.step()
+assert set(isolated.state) == set(game_server.ROOM_GLOBALS)
+assert isolated.state['telemetry'] is None and isolated.state['endless_world'] is None
+assert isolated.state['quality'] is game_server.main.QUALITY_LEVELS[0] and isolated.state['enemy_roster'] == isolated.enemies
+isolated.close()
+for name, value in saved_room_globals.items():
+    setattr(game_server.main, name, value)
+print(f"Multiplayer: {entity_count} entities mirrored over loopback, {received} bytes received")
+
+
+# Quality governor test
+levels = [{'name': 'high'}, {'name': 'medium'}, {'name': 'low'}]
+governor = QualityGovernor(levels, budget_ms=10, window=5, upgrade_window=20)
+changes = [governor.record(25.0) for _ in range(10)]
+assert governor.level == 2 and [change['name'] for change in changes if change] == ['medium', 'low']
+for _ in range(19):
+    governor.record(2.0)
+assert governor.level == 2
+assert governor.record(2.0)['name'] == 'medium'
+assert [(change['from'], change['to']) for change in governor.history] == [(0, 1), (1, 2), (2, 1)]
+for bad_level in (3, -1):
+    try:
+        governor.pin(bad_level)
+        assert False, bad_level
+    except ValueError:
+        pass
+assert governor.level == 1 and not governor.pinned and len(governor.history) == 3
+bad_quality = subprocess.run([sys.executable, 'main.py', '--quality', '9'], capture_output=True, text=True, timeout=60,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+assert bad_quality.returncode != 0 and bad_quality.stderr.startswith('usage:'), bad_quality.stderr
+governor.pin(0)
+assert all(governor.record(50.0) is None for _ in range(30)) and governor.settings['name'] == 'high'
+print(f"Quality governor: {len(governor.history)} level changes, stats {governor.get_stats()}")
+
+
+# Distance oracle test
+oracle = DistanceOracle(maze.maze, maze.maze_width, maze.maze_height)
+oracle_cells = [open_cells.cell(i) for i in range(0, len(open_cells), 5)]
+for source in oracle_cells[:15]:
+    # Breadth-first distances from the source are the ground truth
+    expected = {source: 0}
+    frontier = [source]
+    for x, y in frontier:
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < maze.maze_width and 0 <= ny < maze.maze_height and not maze.maze[ny][nx] and (nx, ny) not in expected:
+                expected[(nx, ny)] = expected[(x, y)] + 1
+                frontier.append((nx, ny))
+    for target in oracle_cells:
+        assert oracle.distance(source, target) == expected.get(target)
+assert oracle.distance(maze.start_pos, maze.goal_pos) == maze._get_path_length()
+assert oracle.nearest(oracle_cells[0], [oracle_cells[-1], oracle_cells[0]]) == (1, 0)
+print(f"Distance oracle: {oracle.get_stats()['extra_edges']} non-tree edges, {oracle.get_stats()['portals']} portals")
+
+
+# Import-light core test: generation, pathfinding and analysis load without pygame
+core_modules = ['maze_generator', 'junction_graph', 'hierarchical_pathfinder', 'incremental_planner',
+                'pathfinding_service', 'path_scheduler', 'streaming_world', 'line_of_sight', 'distance_oracle',
+                'maze_analytics', 'maze_validation', 'net_protocol', 'quality_governor', 'telemetry', 'shared_state', 'rewind',
+                'level_loader', 'batch_solver']
+probe = f"import sys, {', '.join(core_modules)}; print('pygame' in sys.modules)"
+assert subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True).stdout.strip() == 'False'
+print(f"Core modules import without pygame: {len(core_modules)} checked")
+
+
+# Maze validation test
+rng_state = random.getstate()
+batch = validate_batch(range(25), [21, 61, 301], workers=1)
+assert not [result for result in batch if failed_checks(result)] and random.getstate() == rng_state
+# Union-find labels must split exactly where walls separate regions
+split = np.ones((5, 7), dtype=bool)
+split[:, 3] = False
+split[2, 3] = True
+labels = label_components(split)
+assert len(np.unique(labels[split])) == 1 and labels[0, 3] == -1
+split[2, 3] = False
+assert len(np.unique(label_components(split)[split])) == 2
+print(f"Maze validation: {len(batch)} mazes up to 301x301 passed, "
+      f"{max(result['validate_seconds'] for result in batch) * 1000:.0f} ms slowest validation")
+
+
+# Telemetry test
+# A maze is rebuilt exactly from its recorded seed
+seeded = [MazeGenerator(200, 200, cell_size=10, rng=random.Random(77)) for _ in range(2)]
+for generator in seeded:
+    generator.generate_maze()
+assert seeded[0].maze == seeded[1].maze and seeded[0].goal_pos == seeded[1].goal_pos
+ring = telemetry.RecordRing(capacity=8)
+for tick in range(6):
+    ring.push(telemetry.TRACKING, 1, 0, 1, tick, 1, 0.0, 0.0)
+assert len(ring.drain()) == 6 * telemetry.RECORD_SIZE
+for tick in range(10):
+    ring.push(telemetry.TRACKING, 1, 0, 1, tick, 0, 0.0, 0.0)
+assert ring.dropped == 2
+wrapped = np.frombuffer(ring.drain(), dtype=telemetry.HEADER_DTYPE)
+assert wrapped['tick'].tolist() == list(range(8))
+telemetry_dir = tempfile.mkdtemp()
+try:
+    recorder = telemetry.Telemetry(telemetry_dir, max_file_bytes=1, max_files=3)
+    for run in range(6):
+        recorder.run_started(2, run)
+        for tick in range(60):
+            recorder.frame(tick, 3.0 if tick % 2 else 30.0)
+        recorder.tracking_changed(60, 1, True, 50.0, 60.0)
+        recorder.tracking_changed(90, 1, False, 55.0, 60.0)
+        recorder.run_ended(120, telemetry.RESULT_WON if run % 3 else telemetry.RESULT_LOST, 12.0, 400.0,
+                           None if run % 3 else (10.0, 20.0))
+        recorder.writer.flush()
+    recorder.stop()
+    assert len(telemetry.log_files(telemetry_dir)) == 3  # A new file per flush; the oldest three are deleted
+    telemetry_summary = telemetry.summarize(telemetry.read_records(telemetry.log_files(telemetry_dir)))
+    medium = telemetry_summary['difficulties'][2]
+    assert medium['runs'] == 3 and medium['won'] + medium['lost'] == 3 and medium['mean_win_seconds'] == 12.0
+    assert telemetry_summary['hunts_started'] == telemetry_summary['hunts_ended'] == 3
+    assert telemetry_summary['frame_histogram']['<4ms'] == telemetry_summary['frame_histogram']['<33ms'] == 90
+finally:
+    shutil.rmtree(telemetry_dir)
+print(f"Telemetry: {recorder.get_stats()['written']} records written, {telemetry_summary['records']} read back "
+      f"after rotation")
+
+
+# Shared-state export test
+publisher = SharedStatePublisher(max_maze_cells=maze.maze_width * maze.maze_height, max_entities=4)
+try:
+    publisher.publish_maze(maze)
+    state_reader = SharedStateReader(publisher.name)
+    version, walls = state_reader.maze()
+    assert version == 1 and walls.shape == (maze.maze_height, maze.maze_width)
+    assert (walls == np.asarray(maze.maze, dtype=np.uint8)).all()
+    assert state_reader.maze_info()['goal'] == maze.goal_pos
+    publisher.publish(7, 2, [(0, 0, 12.5, 30.0), (128, 6, 40.0, 50.0)] + [(129, 1, 0.0, 0.0)] * 5)
+    tick, state, shared_entities = state_reader.snapshot()
+    assert tick == 7 and state == 2 and len(shared_entities) == 4
+    assert shared_entities[1].tolist() == (128, 6, 40.0, 50.0)
+    assert int(state_reader.header['sequence']) % 2 == 0
+    publisher.publish_maze(maze)
+    assert state_reader.maze_version == 2 and state_reader.snapshot()[2].size == 0
+    del walls
+    state_reader.close()
+finally:
+    publisher.close()
+print(f"Shared state: {maze.maze_width}x{maze.maze_height} maze and entities mapped from block '{publisher.name}'")
+
+
+# Death animation path layer test: each segment is stamped once however the reveal is split
+reveal_path = [(x, y) for x, y in Pathfinder(maze).get_solution_path()]
+reveal_layer = PathRevealLayer(reveal_path, maze.width, maze.height, (0, 255, 0))
+for count in range(0, len(reveal_path) + 5, 7):
+    reveal_layer.reveal(count)
+reveal_layer.reveal(len(reveal_path))
+assert reveal_layer.segments_drawn == len(reveal_path) - 1 and reveal_layer.revealed == len(reveal_path)
+assert all(reveal_layer.bounds.collidepoint(point) for point in reveal_path)
+goal_pixel = reveal_layer.surface.get_at(reveal_path[-1])
+assert goal_pixel.g == 255 and goal_pixel.a == 255
+reveal_layer.draw(pygame.Surface((maze.width, maze.height + 80)), Camera(0, 80, maze.width, maze.height, maze.width, maze.height))
+print(f"Path reveal layer: {reveal_layer.segments_drawn} segments stamped once for {len(reveal_path)} points")
+
+
+# Rewind test: a restore puts the player and every enemy back exactly as a recorded tick left them
+game = simulation.main
+random.seed(9)
+game.headless = True
+game.difficulty = 2
+game.game_state = game.PLAYING
+game.reset_game()
+bot = simulation.ScriptedBot()
+recorded = {}
+while game.frame_tick < 150 and not game.game_lost and not game.game_won:
+    game.update_playing(bot.keys(game.player, game.enemies))
+    recorded[game.frame_tick] = (game.player.x, game.player.y, [(e.x, e.y, e.is_tracking) for e in game.enemy_roster])
+clicked = game.enemies[0]
+game.enemies.remove(clicked)
+clicked.removed = True
+rewound_from = game.frame_tick
+in_flight = game.enemy_roster[-1]
+game.path_service.submit(in_flight, game.frame_tick, game.maze_generator.start_pos, game.maze_generator.goal_pos)
+assert game.rewind(1)
+assert rewound_from - game.frame_tick >= 60 and game.frame_tick in recorded
+assert recorded[game.frame_tick] == (game.player.x, game.player.y,
+                                     [(e.x, e.y, e.is_tracking) for e in game.enemy_roster])
+assert clicked in game.enemies and not clicked.removed
+assert not any(game.path_service.is_pending(enemy) for enemy in game.enemy_roster)
+assert in_flight not in game.path_service.poll(game.frame_tick)
+ring = game.snapshot_ring
+assert ring.frames['header']['tick'][(ring.count - 1) % ring.capacity] == game.frame_tick
+game.update_playing(bot.keys(game.player, game.enemies))
+game.path_service.shutdown()
+print(f"Rewind: tick {rewound_from} back to {game.frame_tick}, {ring.record_size} bytes per tick")
+
+
+# AI level of detail test: far enemies decide at about their far decision period, not at every waypoint
+for level in (1, 3):
+    random.seed(11)
+    game.difficulty = level
+    game.game_state = game.PLAYING
+    game.reset_game()
+    game.player.x, game.player.y = game.solution_path[len(game.solution_path) * 2 // 3]
+    game.player.rect.center = (game.player.x, game.player.y)
+    for enemy in game.enemies:
+        enemy.spawn_timer = 180
+        enemy.near_distance_sq = -1
+    decisions = 0
+    while game.frame_tick < 600 and not game.game_lost:
+        before = game.ai_decisions
+        game.update_playing(simulation.BotKeys())
+        decisions += (game.ai_decision_rate if game.frame_tick % 60 == 0 else game.ai_decisions) - before
+    far_rate = decisions * 60 / game.frame_tick / len(game.enemies)
+    assert game.frame_tick > 300 and far_rate <= 1.3 * 60 / game.DIFFICULTY_SETTINGS[level]['ai_far_decision_period'], far_rate
+    game.path_service.shutdown()
+print(f"AI level of detail: far enemies decide {far_rate:.1f} times/s on Hard")
+
+# Reaching the goal on the tick an enemy touches the player is a win, not a death
+game.difficulty = 1
+game.game_state = game.PLAYING
+game.reset_game()
+(before_x, before_y), (goal_x, goal_y) = game.solution_path[-2:]
+game.player.x, game.player.y = before_x, before_y
+toucher = game.enemies[0]
+toucher.is_spawned = True
+toucher.x, toucher.y = before_x, before_y
+step_key = (pygame.K_RIGHT if goal_x > before_x else pygame.K_LEFT if goal_x < before_x else
+            pygame.K_DOWN if goal_y > before_y else pygame.K_UP)
+game.update_playing(simulation.BotKeys([step_key]))
+assert game.game_won and not game.game_lost and game.game_state == game.GAME_WON
+game.path_service.shutdown()
+
+# Endless mode test: the player runs through the streaming world, far chunks unload and a chaser catches up
+random.seed(5)
+game.difficulty = 1
+game.game_state = game.ENDLESS
+game.reset_endless()
+endless = game.endless_world
+cell = endless.cell_size
+assert game.check_collision(game.player.x, game.player.y) is None and game.check_collision(0, 0) == 'wall'
+assert game.player.move(simulation.BotKeys([pygame.K_RIGHT])) is None
+target_chunk = 0
+while game.frame_tick < 2 * game.ENDLESS_SPAWN_INTERVAL:
+    target_chunk += 1
+    route = endless.find_path((int(game.player.x // cell), int(game.player.y // cell)),
+                              (target_chunk * endless.chunk_cells + 1, 1))
+    assert route, target_chunk
+    for x, y in route[1:]:
+        game.player.x, game.player.y = x * cell + cell // 2, y * cell + cell // 2
+        game.update_endless(simulation.BotKeys())
+assert game.game_state == game.ENDLESS and not game.game_lost
+assert (0, 0) not in endless.chunks and endless.chunks_unloaded > 0
+assert len(endless.chunks) <= (2 * endless.unload_radius + 1) ** 2
+assert len(game.chasers) == game.DIFFICULTY_SETTINGS[1]['enemies']
+endless_view = pygame.Surface((game.WIDTH, game.HEIGHT))
+game.camera.follow(game.player.x, game.player.y)
+game.endless_renderer.draw(endless_view, game.camera)
+assert game.endless_renderer.chunks_rendered > 0 and set(game.endless_renderer.chunks) <= set(endless.chunks)
+chaser = game.chasers[0]
+assert endless.chunk_of(int(chaser.x // cell), int(chaser.y // cell)) in endless.chunks
+game.player.x, game.player.y = chaser.x, chaser.y
+game.update_endless(simulation.BotKeys())
+assert game.game_lost and game.game_state == game.GAME_OVER
+endless_chunks = endless.chunks_generated
+game.reset_game()
+assert game.endless_world is None and not game.endless_mode
+print(f"Endless mode: ran to chunk {target_chunk}, {endless_chunks} chunks generated, caught by a chaser")
+
+
+# Level loader test: text and image levels parse to the same maze, bad ones are refused, the cache restores them
+level_dir = tempfile.mkdtemp()
+try:
+    level_text = level_loader.format_text(maze.maze, maze.start_pos, maze.goal_pos)
+    walls, start, goal = level_loader.parse_text(level_text)
+    assert walls.tolist() == [[bool(cell) for cell in row] for row in maze.maze]
+    assert (start, goal) == (tuple(maze.start_pos), tuple(maze.goal_pos))
+    with open(os.path.join(level_dir, 'text_level.txt'), 'wb') as level_file:
+        level_file.write(level_text)
+    image = pygame.Surface((maze.maze_width * 4, maze.maze_height * 4))
+    image.fill((255, 255, 255))
+    for y, row in enumerate(maze.maze):
+        for x, wall in enumerate(row):
+            color = (0, 255, 0) if (x, y) == start else (255, 0, 0) if (x, y) == goal else (0, 0, 0) if wall else None
+            if color:
+                image.fill(color, (x * 4, y * 4, 4, 4))
+    pygame.image.save(image, os.path.join(level_dir, 'image_level.png'))
+    image_walls, image_start, image_goal = level_loader.load_level(os.path.join(level_dir, 'image_level.png'), cell_pixels=4)
+    assert (image_walls == walls).all() and (image_start, image_goal) == (start, goal)
+    for bad_level in ('#####\n#S.G#\n#.S.#\n#####\n', '#####\n#S#G#\n#####\n', '#####\n#S?G#\n#####\n'):
+        try:
+            level_loader.check_level(*level_loader.parse_text(bad_level))
+            assert False, bad_level
+        except ValueError:
+            pass
+    with open(os.path.join(level_dir, 'unreachable.txt'), 'w') as level_file:
+        level_file.write('#####\n#S#G#\n#####\n')
+    # Same name in a subdirectory, same name in the same directory, and a name cut mid-character by the index
+    os.makedirs(os.path.join(level_dir, 'world2'))
+    long_name = 'x' + '\u00e9' * 60
+    for copy_name in (os.path.join('world2', 'text_level.txt'), 'image_level.txt', long_name + '.txt'):
+        with open(os.path.join(level_dir, copy_name), 'wb') as level_file:
+            level_file.write(level_text)
+    level_paths = level_loader.level_files(level_dir)
+    rejected = level_loader.build_cache(level_paths, os.path.join(level_dir, 'cache'), cell_pixels=4, workers=2)
+    assert sorted(os.path.basename(level['path']) for level in rejected) == ['image_level.txt', 'unreachable.txt']
+    level_cache = level_loader.LevelCache(os.path.join(level_dir, 'cache'))
+    assert sorted(level_cache.names()) == sorted(['image_level', 'text_level', 'world2/text_level', long_name[:48]])
+    assert level_cache.load('world2/text_level', maze.cell_size)[0].maze == walls.tolist()
+    loaded, loaded_path = level_cache.load('text_level', maze.cell_size)
+    assert loaded.maze == walls.tolist() and loaded.goal_pos == goal
+    assert list(loaded.open_cells.nearest) == list(maze.open_cells.nearest)
+    assert loaded.get_start_position() == maze.get_start_position()
+    assert len(loaded_path) == len(Pathfinder(maze).get_solution_path()) 
+    assert loaded_path[-1] == (goal[0] * maze.cell_size + maze.cell_size // 2, goal[1] * maze.cell_size + maze.cell_size // 2)
+finally:
+    shutil.rmtree(level_dir)
+print(f"Level loader: text and image levels cached, {len(rejected)} unreachable or duplicate levels refused")
+
+
+# Batch solver test: dead-end filling over a stack of mazes finds paths as short as A*, and no path when there is none
+solver_mazes = batch_solver.generate_mazes(70, 20) + [maze]
+cut_off = np.array(maze.maze, dtype=bool)
+cut_off[maze.goal_pos[1] - 1:maze.goal_pos[1] + 2, maze.goal_pos[0] - 1:maze.goal_pos[0] + 2] = True
+cut_off[maze.goal_pos[1], maze.goal_pos[0]] = False
+solver_walls, solver_starts, solver_goals = batch_solver.stack_mazes(solver_mazes + [(cut_off, maze.start_pos, maze.goal_pos)])
+solution_masks, solution_lengths = batch_solver.solve_batch(solver_walls, solver_starts, solver_goals)
+assert batch_solver.compare_with_astar(solver_mazes, solution_masks, solution_lengths) == []
+assert solution_lengths[-1] == 0 and not solution_masks[-1].any()
+corridors, fill_rounds = batch_solver.fill_dead_ends(solver_walls, solver_starts, solver_goals)
+assert (corridors >= solution_masks).all() and not (corridors & solver_walls).any()
+print(f"Batch solver: {len(solver_mazes)} mazes solved as short as A* after {fill_rounds} dead-end filling rounds")